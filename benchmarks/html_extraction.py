@@ -0,0 +1,89 @@
+"""
+Micro-benchmark: lxml extraction engine vs. the previous BeautifulSoup fallback.
+
+Builds listicle-sized pages from the saved article in tests/article.txt,
+wrapped in typical blog boilerplate, and times both extraction paths.
+
+Usage (from the repository root):
+    python -m benchmarks.html_extraction [--repeat 20]
+"""
+
+import argparse
+import html
+import statistics
+import time
+
+from bs4 import BeautifulSoup
+
+from tools.html_extractor import extract_main_text
+
+ARTICLE_PATH = "./tests/article.txt"
+PAGE_SCALES = (1, 10, 50)  # How many times the saved article is repeated per page
+
+
+def legacy_extract(page: str):
+    """The BeautifulSoup + html.parser fallback this engine replaced."""
+    soup = BeautifulSoup(page, "html.parser")
+    article_content = None
+    for tag in ["article", "main", "section"]:
+        article_content = soup.find(tag)
+        if article_content:
+            break
+    if not article_content:
+        return None
+    for unwanted in article_content.find_all(
+        ["script", "style", "aside", "nav", "footer"]
+    ):
+        unwanted.extract()
+    return article_content.get_text(separator="\n", strip=True)
+
+
+def build_page(article_text: str, scale: int) -> str:
+    """Wraps the saved article in a blog layout with navigation, sidebars and scripts."""
+    paragraphs = "".join(
+        f"<p>{html.escape(line)}</p>" for line in article_text.splitlines() if line.strip()
+    )
+    nav = "<nav><ul>" + "".join(f'<li><a href="/c/{i}">Category {i}</a></li>' for i in range(40)) + "</ul></nav>"
+    sidebar = "<aside>" + "".join(f'<div class="ad"><a href="/ad/{i}">Sponsored {i}</a></div>' for i in range(20)) + "</aside>"
+    script = "<script>" + "var tracking = {};" * 200 + "</script>"
+    body = "".join(
+        f"<section><h2>Part {i + 1}</h2>{paragraphs}{script}</section>" for i in range(scale)
+    )
+    return (
+        f"<html><head><title>Benchmark</title>{script}<style>p{{margin:0}}</style></head>"
+        f"<body>{nav}<div class='layout'><article>{body}</article>{sidebar}</div>"
+        f"<footer>{nav}</footer></body></html>"
+    )
+
+
+def time_call(fn, page: str, repeat: int) -> float:
+    """Returns the median wall time of `fn(page)` in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(page)
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with open(ARTICLE_PATH, "r") as file:
+        article_text = file.read()
+
+    print(f"{'page size':>12} {'bs4 (ms)':>10} {'lxml (ms)':>10} {'speedup':>8}")
+    for scale in PAGE_SCALES:
+        page = build_page(article_text, scale)
+        legacy_ms = time_call(legacy_extract, page, args.repeat)
+        lxml_ms = time_call(extract_main_text, page, args.repeat)
+        print(
+            f"{len(page) / 1024:>9.0f} KB {legacy_ms:>10.2f} {lxml_ms:>10.2f} "
+            f"{legacy_ms / lxml_ms:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
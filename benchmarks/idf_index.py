@@ -0,0 +1,96 @@
+"""
+Benchmark: TF-IDF keyword scoring as the corpus index grows.
+
+Fills a temporary IDF index with synthetic documents (Zipf-distributed terms
+over a large vocabulary, like real article text) up to 100k documents. At
+each checkpoint it times scoring the term counts of tests/article.txt against
+the index (what `top_single_words` does for every article) and reports the
+update throughput and the on-disk size of the index.
+
+Usage (from the repository root):
+    python -m benchmarks.idf_index [--documents 1000 10000 100000]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from collections import Counter
+
+import numpy as np
+
+from tools.idf_index import IdfIndex
+from tools.tokenize_text import get_stop_words, stream_tokens
+
+ARTICLE_PATH = "./tests/article.txt"
+VOCABULARY_SIZE = 200_000  # Synthetic corpus vocabulary
+TERMS_PER_DOCUMENT = 400  # Token draws per synthetic document (before dedup)
+ZIPF_EXPONENT = 1.1
+SCORING_REPEATS = 200
+
+
+def synthetic_documents(count: int, vocabulary: list, rng: np.random.Generator):
+    """Yields (distinct terms, key) per synthetic document."""
+    for key in range(count):
+        ranks = rng.zipf(ZIPF_EXPONENT, TERMS_PER_DOCUMENT)
+        yield {vocabulary[rank % len(vocabulary)] for rank in ranks}, key + 1
+
+
+def directory_size(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+
+def time_scoring(index: IdfIndex, term_counts: dict) -> float:
+    """Median seconds of one `top_terms` call."""
+    timings = []
+    for _ in range(SCORING_REPEATS):
+        started = time.perf_counter()
+        index.top_terms(term_counts, 100)
+        timings.append(time.perf_counter() - started)
+    return float(np.median(timings))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="IDF index scoring benchmark.")
+    parser.add_argument(
+        "--documents", type=int, nargs="+", default=[1_000, 10_000, 100_000],
+        help="Corpus sizes to measure at",
+    )
+    args = parser.parse_args()
+    rng = np.random.default_rng(42)
+
+    with open(ARTICLE_PATH, "r") as file:
+        article = file.read()
+    stop_words = get_stop_words()
+    word_counts = Counter(token for token in stream_tokens(article) if token not in stop_words)
+    candidates = {word: count for word, count in word_counts.items() if count >= 3}
+
+    # Article words take the most frequent ranks, so the index knows them with realistic dfs
+    vocabulary = list(word_counts) + [f"term{i}" for i in range(VOCABULARY_SIZE - len(word_counts))]
+
+    print(f"article: {len(word_counts)} distinct words, {len(candidates)} scored candidates")
+    print(f"{'documents':>10} {'add docs/s':>11} {'score us':>9} {'index MB':>9}  top words")
+    with tempfile.TemporaryDirectory() as directory:
+        index = IdfIndex(directory)
+        indexed = 0
+        for target in sorted(args.documents):
+            started = time.perf_counter()
+            for terms, key in synthetic_documents(target - indexed, vocabulary, rng):
+                index.add_terms(terms, key + indexed)
+            add_rate = (target - indexed) / (time.perf_counter() - started)
+            indexed = target
+            index.flush()
+
+            score_us = time_scoring(index, candidates) * 1e6
+            top = list(index.top_terms(candidates, 5))
+            print(
+                f"{indexed:>10} {add_rate:>11.0f} {score_us:>9.1f} "
+                f"{directory_size(directory) / 1e6:>9.2f}  {', '.join(top)}"
+            )
+
+    frequency_top = [word for word, _ in Counter(candidates).most_common(5)]
+    print(f"{'raw frequency top words':>42}  {', '.join(frequency_top)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Memory benchmark: streaming keyword counting vs. the previous materializing path.
+
+Builds multi-megabyte articles by repeating tests/article.txt and measures the
+tracemalloc peak (on top of the input text itself) and the run time of the
+counting stage. The old path lowercased the whole text, built a full token
+list, a stopword-filtered copy of it, and then tokenized the text again for
+phrase counting; the streaming path makes one chunked pass with both counters.
+
+YAKE! phrase extraction needs the whole text in both paths and dominates
+the run time on huge inputs, so both paths count the same fixed phrase list
+(extracted once from the base article).
+
+Usage (from the repository root):
+    python -m benchmarks.keyword_memory [--sizes 1 4 16]
+"""
+
+import argparse
+import time
+import tracemalloc
+from collections import Counter
+
+from tools import tokenize_text
+from tools.tokenize_text import (
+    count_keyword_occurrences,
+    extract_long_tail_keywords,
+    remove_stopwords,
+    tokenize_text as materialize_tokens,
+)
+
+ARTICLE_PATH = "./tests/article.txt"
+
+
+def legacy_frequencies(text: str, phrases: list) -> list:
+    """The materializing path: full lowercase copy, token list and filtered list."""
+    tokens = materialize_tokens(text)
+    word_counts = Counter(remove_stopwords(tokens))
+    single = {word: count for word, count in word_counts.most_common(100) if count >= 3}
+    occurrences = count_keyword_occurrences(text, phrases, tokens=materialize_tokens(text))
+    return list(occurrences.items()) + list(single.items())
+
+
+def measure(function, *args) -> tuple:
+    """Returns (result, tracemalloc peak in bytes, seconds)."""
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = function(*args)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, peak, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Keyword counting memory benchmark.")
+    parser.add_argument("--sizes", type=float, nargs="+", default=[1, 4, 16], help="Text sizes in MB")
+    args = parser.parse_args()
+
+    with open(ARTICLE_PATH, "r") as file:
+        article = file.read()
+    phrases = extract_long_tail_keywords(article)
+    tokenize_text.extract_long_tail_keywords = lambda text, *a, **kw: phrases
+    tokenize_text.IDF_RANKING = False  # The legacy path ranks by raw frequency
+    tokenize_text.get_stop_words()  # Load once, outside the measurements
+
+    print(f"{'text MB':>8} {'legacy peak MB':>15} {'stream peak MB':>15} {'legacy s':>9} {'stream s':>9}")
+    for size in args.sizes:
+        text = article * max(1, int(size * 1024 * 1024 / len(article)))
+        legacy, legacy_peak, legacy_time = measure(legacy_frequencies, text, phrases)
+        streamed, stream_peak, stream_time = measure(
+            tokenize_text.compute_keyword_frequencies, text
+        )
+        assert sorted(legacy) == sorted(streamed), "streaming counts differ from the legacy path"
+        print(
+            f"{len(text) / 1e6:>8.1f} {legacy_peak / 1e6:>15.1f} {stream_peak / 1e6:>15.1f} "
+            f"{legacy_time:>9.2f} {stream_time:>9.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
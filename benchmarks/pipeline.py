@@ -0,0 +1,413 @@
+"""
+Offline end-to-end benchmark of the blog workflow.
+
+Everything external is replaced by reproducible stand-ins:
+  - Google Custom Search and the blog hosts are served by a local HTTP server
+    replaying `tests/t.json` (links rewritten to the server) and pages built
+    from `tests/article.txt`;
+  - the LLM is a deterministic fake with configurable first-token and
+    per-token latency.
+Caches live in a throwaway directory and every run uses a distinct topic, so
+each run is cold (search, scrape, keyword extraction and generation all do
+their full work) unless --warm is given.
+
+Measured:
+  - per-stage (node) latency and end-to-end latency of sequential runs,
+  - throughput of N concurrent runs on the async graph,
+  - tracemalloc peak memory of get_workflow() and of one full run.
+
+Results are written as JSON; with --baseline the run fails (exit code 1)
+when a stage or the end-to-end p50 regressed by more than --tolerance.
+
+Usage (from the repository root):
+    python -m benchmarks.pipeline [--runs 10] [--concurrency 8] [--output results.json]
+    python -m benchmarks.pipeline --baseline benchmarks/results/pipeline.json
+"""
+
+import argparse
+import asyncio
+import http.server
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from html import escape
+from typing import List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tests")
+DEFAULT_OUTPUT = os.path.join("benchmarks", "results", "pipeline.json")
+DEFAULT_RUNS = 10
+DEFAULT_CONCURRENCY = 8
+DEFAULT_FIRST_TOKEN_LATENCY = 0.2  # seconds
+DEFAULT_TOKEN_LATENCY = 0.001  # seconds per streamed token
+DEFAULT_OUTPUT_TOKENS = 300
+DEFAULT_TOLERANCE = 0.2  # Allowed p50 slowdown against the baseline (20%)
+
+
+# --------------- LOCAL STAND-IN FOR GOOGLE AND THE BLOG HOSTS ---------------
+def load_fixtures() -> tuple:
+    with open(os.path.join(FIXTURES_DIR, "t.json")) as file:
+        search_response = json.load(file)
+    with open(os.path.join(FIXTURES_DIR, "article.txt")) as file:
+        article = file.read()
+    return search_response, article
+
+
+def render_page(topic: str, article: str) -> bytes:
+    """Wraps the recorded article in typical blog boilerplate (nav, sidebar, footer)."""
+    paragraphs = "".join(
+        f"<p>{escape(line)}</p>" for line in article.splitlines() if line.strip()
+    )
+    return (
+        "<html><head><title>Blog</title><script>window.dataLayer = [];</script></head><body>"
+        '<nav><a href="/">Home</a> <a href="/blog">Blog</a> <a href="/contact">Contact</a></nav>'
+        f"<article><h1>{escape(topic.title())}</h1><p>Notes on {escape(topic)}.</p>{paragraphs}</article>"
+        "<aside><h3>Subscribe</h3><p>Get new posts by email.</p></aside>"
+        "<footer><p>Copyright. All rights reserved.</p></footer></body></html>"
+    ).encode("utf-8")
+
+
+class ReplayServer:
+    """
+    Serves the recorded search response at /customsearch/v1 and a page for
+    every result at /<topic>/<rank>/<original host and path>.
+    """
+
+    def __init__(self):
+        self.search_response, self.article = load_fixtures()
+        self.httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), self.handler())
+        self.base_url = f"http://127.0.0.1:{self.httpd.server_port}"
+
+    def handler(self):
+        server = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_HEAD(self):
+                self.do_GET(send_body=False)
+
+            def do_GET(self, send_body: bool = True):
+                parts = urlsplit(self.path)
+                if parts.path == "/customsearch/v1":
+                    query = parse_qs(parts.query).get("q", [""])[0]
+                    body = json.dumps(server.search_results(query)).encode("utf-8")
+                    content_type = "application/json"
+                else:
+                    topic = parts.path.strip("/").split("/")[0].replace("-", " ")
+                    body = render_page(topic, server.article)
+                    content_type = "text/html; charset=utf-8"
+
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if send_body:
+                    self.wfile.write(body)
+
+        return Handler
+
+    def search_results(self, query: str) -> dict:
+        slug = "-".join(query.lower().split()) or "topic"
+        items = []
+        for rank, item in enumerate(self.search_response.get("items", [])):
+            original = item["link"].split("//", 1)[-1]
+            items.append({**item, "link": f"{self.base_url}/{slug}/{rank}/{original}"})
+        return {**self.search_response, "items": items}
+
+    def start(self) -> "ReplayServer":
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+
+
+# --------------- DETERMINISTIC FAKE LLM ---------------
+def make_fake_model(first_token_latency: float, token_latency: float, output_tokens: int):
+    """Returns a chat model that streams a fixed, prompt-derived post with the given latency."""
+    from langchain_core.language_models.chat_models import BaseChatModel
+    from langchain_core.messages import AIMessage, AIMessageChunk
+    from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+    class FakeBlogModel(BaseChatModel):
+        first_token_latency: float
+        token_latency: float
+        output_tokens: int
+
+        @property
+        def _llm_type(self) -> str:
+            return "benchmark-fake"
+
+        def _pieces(self, messages) -> List[str]:
+            words = " ".join(str(message.content) for message in messages).split() or ["post"]
+            return [f"{words[i % len(words)]} " for i in range(self.output_tokens)]
+
+        def _usage(self, messages) -> dict:
+            input_tokens = sum(len(str(message.content).split()) for message in messages)
+            return {
+                "input_tokens": input_tokens,
+                "output_tokens": self.output_tokens,
+                "total_tokens": input_tokens + self.output_tokens,
+            }
+
+        def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+            time.sleep(self.first_token_latency + self.token_latency * self.output_tokens)
+            message = AIMessage(
+                content="".join(self._pieces(messages)), usage_metadata=self._usage(messages)
+            )
+            return ChatResult(generations=[ChatGeneration(message=message)])
+
+        def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+            time.sleep(self.first_token_latency)
+            for piece in self._pieces(messages):
+                yield ChatGenerationChunk(message=AIMessageChunk(content=piece))
+                time.sleep(self.token_latency)
+            yield ChatGenerationChunk(
+                message=AIMessageChunk(content="", usage_metadata=self._usage(messages))
+            )
+
+        async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+            await asyncio.sleep(self.first_token_latency)
+            for piece in self._pieces(messages):
+                yield ChatGenerationChunk(message=AIMessageChunk(content=piece))
+                await asyncio.sleep(self.token_latency)
+            yield ChatGenerationChunk(
+                message=AIMessageChunk(content="", usage_metadata=self._usage(messages))
+            )
+
+    return FakeBlogModel(
+        first_token_latency=first_token_latency,
+        token_latency=token_latency,
+        output_tokens=output_tokens,
+    )
+
+
+# --------------- MEASUREMENT ---------------
+def summarize(samples: List[float]) -> dict:
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+    return {
+        "count": len(ordered),
+        "mean": statistics.fmean(ordered),
+        "p50": ordered[len(ordered) // 2],
+        "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        "max": ordered[-1],
+    }
+
+
+def clear_caches() -> None:
+    """Empties every local cache so the next run does its full work."""
+    from core import llm_cache
+    from tools import content_cache, google_search
+
+    for cache in (
+        google_search.search_cache,
+        content_cache.article_cache,
+        content_cache.keyword_cache,
+        llm_cache.llm_cache,
+        llm_cache.similarity_index,
+    ):
+        cache.clear()
+
+
+def run_succeeded(state: dict) -> bool:
+    from langchain_core.messages import AIMessage
+
+    messages = state.get("messages") or []
+    return bool(messages) and isinstance(messages[-1], AIMessage)
+
+
+def measure_memory(topic: str) -> dict:
+    """tracemalloc peaks of compiling the graph and of one full (sync) run."""
+    from langchain_core.messages import HumanMessage
+    from workflows import main
+
+    main.build_workflow.cache_clear()
+    tracemalloc.start()
+    graph = main.get_workflow()
+    _, build_peak = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    graph.invoke({"messages": [HumanMessage(content=topic)]})
+    _, run_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"get_workflow_peak_bytes": build_peak, "run_peak_bytes": run_peak}
+
+
+def measure_sequential(runs: int, warm: bool, research_mode: bool) -> dict:
+    from langchain_core.messages import HumanMessage
+    from core import instrumentation
+    from workflows import main
+
+    stage_samples = defaultdict(list)
+
+    def record_stage(name, duration, stats):
+        stage_samples[name].append(duration)
+
+    instrumentation.add_node_listener(record_stage)
+    graph = main.build_workflow(research_mode=research_mode)
+    end_to_end, failures = [], 0
+
+    for run in range(runs):
+        if not warm:
+            clear_caches()
+        topic = "web design" if warm else f"web design {run}"
+        started = time.perf_counter()
+        state = graph.invoke({"messages": [HumanMessage(content=topic)]})
+        end_to_end.append(time.perf_counter() - started)
+        failures += not run_succeeded(state)
+
+    instrumentation.remove_node_listener(record_stage)
+    return {
+        "end_to_end": summarize(end_to_end),
+        "stages": {name: summarize(samples) for name, samples in sorted(stage_samples.items())},
+        "failures": failures,
+    }
+
+
+def measure_throughput(concurrency: int, warm: bool, research_mode: bool) -> dict:
+    from langchain_core.messages import HumanMessage
+    from workflows import main
+
+    graph = main.build_workflow(research_mode=research_mode, use_async=True)
+    if not warm:
+        clear_caches()
+
+    async def run_all() -> list:
+        return await asyncio.gather(
+            *(
+                graph.ainvoke({"messages": [HumanMessage(content=f"seo basics {i}")]})
+                for i in range(concurrency)
+            )
+        )
+
+    started = time.perf_counter()
+    states = asyncio.run(run_all())
+    duration = time.perf_counter() - started
+    return {
+        "concurrency": concurrency,
+        "duration": duration,
+        "runs_per_second": concurrency / duration,
+        "failures": sum(not run_succeeded(state) for state in states),
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> List[str]:
+    """Returns a message for every p50 that is more than `tolerance` slower than the baseline."""
+    pairs = [("end_to_end", results["sequential"]["end_to_end"], baseline["sequential"]["end_to_end"])]
+    for name, summary in results["sequential"]["stages"].items():
+        previous = baseline["sequential"]["stages"].get(name)
+        if previous:
+            pairs.append((f"stage {name}", summary, previous))
+
+    regressions = []
+    for label, current, previous in pairs:
+        if previous.get("p50") and current.get("p50", 0) > previous["p50"] * (1 + tolerance):
+            regressions.append(
+                f"{label}: p50 {current['p50'] * 1000:.1f} ms vs {previous['p50'] * 1000:.1f} ms"
+            )
+    return regressions
+
+
+def run_benchmark(args) -> dict:
+    logging.basicConfig(level=logging.WARNING)  # Keep the per-node INFO lines out of the report
+    # Must be configured before the repository modules are imported
+    os.environ["BLOG_AGENT_CACHE_DIR"] = tempfile.mkdtemp(prefix="blog-agent-bench-")
+    os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+    os.environ.setdefault("GOOGLE_API_KEY", "benchmark")
+    os.environ.setdefault("GOOGLE_CSE_ID", "benchmark")
+    server = ReplayServer().start()
+    os.environ["GOOGLE_SEARCH_ENDPOINT"] = f"{server.base_url}/customsearch/v1"
+
+    from workflows import main
+
+    model = make_fake_model(args.first_token_latency, args.token_latency, args.output_tokens)
+    main.get_model = lambda model_name=main.SELECTED_MODEL: model
+
+    try:
+        memory = measure_memory("memory probe")
+        sequential = measure_sequential(args.runs, args.warm, args.research)
+        throughput = measure_throughput(args.concurrency, args.warm, args.research)
+    finally:
+        server.stop()
+
+    return {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "config": {
+            "runs": args.runs,
+            "concurrency": args.concurrency,
+            "warm": args.warm,
+            "research_mode": args.research,
+            "first_token_latency": args.first_token_latency,
+            "token_latency": args.token_latency,
+            "output_tokens": args.output_tokens,
+        },
+        "sequential": sequential,
+        "throughput": throughput,
+        "memory": memory,
+    }
+
+
+def print_report(results: dict) -> None:
+    sequential = results["sequential"]
+    for name, summary in sequential["stages"].items():
+        print(f"{name:<18} p50 {summary['p50'] * 1000:9.1f} ms   p95 {summary['p95'] * 1000:9.1f} ms")
+    e2e = sequential["end_to_end"]
+    print(f"{'end to end':<18} p50 {e2e['p50'] * 1000:9.1f} ms   p95 {e2e['p95'] * 1000:9.1f} ms")
+    throughput = results["throughput"]
+    print(
+        f"throughput         {throughput['runs_per_second']:.2f} runs/s "
+        f"at {throughput['concurrency']} concurrent"
+    )
+    memory = results["memory"]
+    print(f"get_workflow peak  {memory['get_workflow_peak_bytes'] / 1e6:.2f} MB")
+    print(f"single run peak    {memory['run_peak_bytes'] / 1e6:.2f} MB")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Offline end-to-end pipeline benchmark.")
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS, help="Sequential runs")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Concurrent async runs")
+    parser.add_argument("--first-token-latency", type=float, default=DEFAULT_FIRST_TOKEN_LATENCY)
+    parser.add_argument("--token-latency", type=float, default=DEFAULT_TOKEN_LATENCY)
+    parser.add_argument("--output-tokens", type=int, default=DEFAULT_OUTPUT_TOKENS)
+    parser.add_argument("--warm", action="store_true", help="Keep caches between runs")
+    parser.add_argument("--research", action="store_true", help="Benchmark multi-source research mode")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="JSON results file")
+    parser.add_argument("--baseline", help="Earlier results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args(argv)
+
+    results = run_benchmark(args)
+    print_report(results)
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w") as file:
+        json.dump(results, file, indent=2)
+    print(f"results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(results, json.load(file), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+"""
+Micro-benchmark: compiled result classifier vs. the previous list scans.
+
+Generates synthetic allow/deny lists of tens of thousands of domains, loads
+them through list files like a deployment would, and classifies batches of
+search results with both implementations.
+
+Usage (from the repository root):
+    python -m benchmarks.result_classifier [--results 10000]
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from tools.result_classifier import BLOG, ResultClassifier
+
+LIST_SIZES = (1_000, 10_000, 50_000)  # Entries per allow and deny list
+LEGACY_SAMPLE = 200  # Results timed with the legacy scan (it is O(results x entries))
+BLOG_PATTERNS = ["/blog/", "/post/", "/articles/"]
+TLDS = ["com", "org", "net", "io", "co.uk", "dev"]
+
+
+def legacy_filter(items, allow, deny):
+    """The `any(... in url)` / `domain in list` scan this classifier replaced."""
+    candidates = []
+    for result in items:
+        url = result.get("link", "").lower()
+        domain = result.get("displayLink", "").lower()
+        if any(blacklisted in url for blacklisted in deny):
+            continue
+        if len(url) < 10 or not url.startswith("http"):
+            continue
+        is_blog_post = any(pattern in url for pattern in BLOG_PATTERNS) or domain in allow
+        if is_blog_post and url not in candidates:
+            candidates.append(url)
+    return candidates
+
+
+def make_domains(count: int, prefix: str, rng: random.Random) -> list:
+    return [f"{prefix}{i}-{rng.randrange(10**6)}.{rng.choice(TLDS)}" for i in range(count)]
+
+
+def make_results(count: int, allow: list, deny: list, rng: random.Random) -> list:
+    """Search results mixing listed, unlisted, blog-path and subdomain links."""
+    results = []
+    for _ in range(count):
+        roll = rng.random()
+        if roll < 0.25:
+            host = rng.choice(deny)
+        elif roll < 0.5:
+            host = "www." + rng.choice(allow)
+        else:
+            host = f"site{rng.randrange(10**6)}.{rng.choice(TLDS)}"
+        path = rng.choice(["/blog/post-title", "/products/item", "/articles/guide", "/about"])
+        results.append({"link": f"https://{host}{path}", "displayLink": host})
+    return results
+
+
+def write_list(directory: str, name: str, domains: list) -> str:
+    path = os.path.join(directory, name)
+    with open(path, "w") as file:
+        file.write("# generated benchmark list\n" + "\n".join(domains) + "\n")
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Result classifier benchmark.")
+    parser.add_argument("--results", type=int, default=10_000, help="Results per classify batch")
+    args = parser.parse_args()
+    rng = random.Random(42)
+
+    print(f"{'entries':>8} {'load ms':>9} {'classify us/result':>19} {'legacy us/result':>17} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as directory:
+        for size in LIST_SIZES:
+            allow = make_domains(size, "allow", rng)
+            deny = make_domains(size, "deny", rng)
+            classifier = ResultClassifier(
+                blog_patterns=BLOG_PATTERNS,
+                allow_path=write_list(directory, f"allow-{size}.txt", allow),
+                deny_path=write_list(directory, f"deny-{size}.txt", deny),
+            )
+            results = make_results(args.results, allow, deny, rng)
+
+            started = time.perf_counter()
+            classifier.reload()
+            load_ms = (time.perf_counter() - started) * 1000
+
+            started = time.perf_counter()
+            labels = classifier.classify(results)
+            classify_us = (time.perf_counter() - started) / len(results) * 1e6
+
+            sample = results[:LEGACY_SAMPLE]
+            started = time.perf_counter()
+            legacy = legacy_filter(sample, allow, deny)
+            legacy_us = (time.perf_counter() - started) / len(sample) * 1e6
+
+            compiled = [r["link"] for r, label in zip(sample, labels) if label == BLOG]
+            assert set(legacy) <= set(compiled), "compiled classifier dropped a legacy candidate"
+            print(
+                f"{size:>8} {load_ms:>9.1f} {classify_us:>19.2f} {legacy_us:>17.2f} "
+                f"{legacy_us / classify_us:>7.0f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
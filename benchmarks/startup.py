@@ -0,0 +1,78 @@
+"""
+Startup benchmark: worker cold start with lazy imports and a memoized graph.
+
+Each sample runs in a fresh interpreter and measures:
+  - lazy:  `import workflows.main` as it is now (heavy deps deferred)
+  - eager: the same import plus newspaper, nltk, yake and langchain_openai loaded
+           up front, which is what every import used to pay (before it also
+           fired a live Google search)
+and, in-process, the first vs. repeated `get_workflow()` call.
+
+Usage (from the repository root):
+    python -m benchmarks.startup [--repeat 5]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+LAZY_IMPORT = "import workflows.main"
+EAGER_IMPORT = (
+    "import workflows.main\n"
+    "import newspaper, nltk.corpus, yake\n"
+    "from langchain_openai import ChatOpenAI\n"
+    "ChatOpenAI(model=workflows.main.SELECTED_MODEL)"
+)
+WORKFLOW_CALLS = (
+    "import time\n"
+    "import workflows.main as m\n"
+    "started = time.perf_counter(); m.get_workflow(); first = time.perf_counter() - started\n"
+    "started = time.perf_counter(); m.get_workflow(); again = time.perf_counter() - started\n"
+    "print(first * 1000, again * 1000)"
+)
+
+
+def run_timed(code: str) -> str:
+    """Runs `code` in a fresh interpreter and returns its stdout."""
+    env = {**os.environ, "OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY", "sk-benchmark")}
+    timed = (
+        "import time\n_started = time.perf_counter()\n"
+        f"{code}\n"
+        "print('__elapsed__', (time.perf_counter() - _started) * 1000)"
+    )
+    result = subprocess.run(
+        [sys.executable, "-W", "ignore", "-c", timed],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    return result.stdout
+
+
+def elapsed_ms(output: str) -> float:
+    for line in output.splitlines():
+        if line.startswith("__elapsed__"):
+            return float(line.split()[1])
+    raise ValueError("benchmark subprocess printed no timing")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Worker cold-start benchmark.")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    lazy = [elapsed_ms(run_timed(LAZY_IMPORT)) for _ in range(args.repeat)]
+    eager = [elapsed_ms(run_timed(EAGER_IMPORT)) for _ in range(args.repeat)]
+    calls = [run_timed(WORKFLOW_CALLS).splitlines()[0].split() for _ in range(args.repeat)]
+
+    print(f"import workflows.main (lazy):   {statistics.median(lazy):8.1f} ms")
+    print(f"import with eager heavy deps:   {statistics.median(eager):8.1f} ms")
+    print(f"get_workflow() first call:      {statistics.median(float(c[0]) for c in calls):8.2f} ms")
+    print(f"get_workflow() repeated call:   {statistics.median(float(c[1]) for c in calls):8.4f} ms")
+
+
+if __name__ == "__main__":
+    main()
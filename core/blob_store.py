@@ -0,0 +1,219 @@
+"""
+Content-addressed local blob store for large workflow artifacts.
+
+Article text, raw HTML, keyword tables and prompts are written here once
+and the workflow state only carries a small `BlobRef` (hash, size, media
+type). Checkpoints and the served API then serialize a few hundred bytes per
+artifact instead of the artifact itself, and nodes load the content lazily
+when they actually need it.
+
+Blobs are addressed by the SHA-256 of their content, so the same article
+scraped by many runs is stored once. They are zstd-compressed when the
+`zstandard` package is available.
+
+Writers prune blobs that were not stored for BLOB_MAX_AGE in the background,
+at most once per BLOB_PRUNE_INTERVAL. A reference whose blob was pruned
+raises `MissingBlobError`; callers treat it as "fetch or compute it again".
+"""
+
+import hashlib
+import os
+import threading
+import time
+from typing import Optional, TypedDict, Union
+
+import orjson
+
+from core.cache import CACHE_DIR, MemoryLRU
+
+BLOB_DIR = os.getenv("BLOG_AGENT_BLOB_DIR", os.path.join(CACHE_DIR, "blobs"))
+BLOB_MAX_AGE = 7 * 24 * 60 * 60  # Unused blobs are removed by `prune` after this (seconds)
+BLOB_PRUNE_INTERVAL = 24 * 60 * 60  # `put` starts a background `prune` at most this often (None disables)
+ZSTD_LEVEL = 3
+MEMORY_BLOBS = 64  # Recently used blobs kept decoded in memory...
+MEMORY_BLOB_MAX_BYTES = 1_000_000  # ...unless they are larger than this
+PRUNE_MARKER = ".pruned"  # File in the store root whose mtime is the last prune
+
+
+class BlobRef(TypedDict):
+    """Reference to a stored blob, small enough to live in the workflow state."""
+
+    blob: str  # SHA-256 of the uncompressed content
+    size: int  # Uncompressed size in bytes
+    media_type: str  # e.g. "text/plain", "text/html", "application/json"
+
+
+class MissingBlobError(KeyError):
+    """A referenced blob is not (or no longer) in the store."""
+
+
+def is_blob_ref(value) -> bool:
+    return isinstance(value, dict) and "blob" in value and "media_type" in value
+
+
+class BlobStore:
+    """
+    Directory of immutable blobs named after their content hash
+    (`<root>/<first two hex digits>/<hash>[.zst]`).
+
+    Writes go to a temporary file that is renamed into place, so concurrent
+    writers of the same content are harmless and readers never see partial
+    blobs.
+    """
+
+    def __init__(self, root: str = BLOB_DIR, compress: bool = True):
+        self.root = root
+        self.compress = compress
+        self.memory = MemoryLRU(MEMORY_BLOBS)
+        self._local = threading.local()  # zstd contexts are not thread-safe
+        self._next_prune = 0.0  # time.time() before which `maybe_prune` does nothing
+        self._prune_lock = threading.Lock()
+
+    def _codec(self):
+        """Returns this thread's (compressor, decompressor), or None without zstandard."""
+        codec = getattr(self._local, "codec", False)
+        if codec is False:
+            try:
+                import zstandard  # Optional dependency, deferred until first use
+
+                codec = (
+                    zstandard.ZstdCompressor(level=ZSTD_LEVEL),
+                    zstandard.ZstdDecompressor(),
+                )
+            except ImportError:
+                codec = None
+            self._local.codec = codec
+        return codec
+
+    def _remember(self, digest: str, data: bytes) -> None:
+        if len(data) <= MEMORY_BLOB_MAX_BYTES:
+            self.memory.set(digest, data)
+
+    def _path(self, digest: str, compressed: bool) -> str:
+        name = f"{digest}.zst" if compressed else digest
+        return os.path.join(self.root, digest[:2], name)
+
+    def put(self, data: bytes, media_type: str = "application/octet-stream") -> BlobRef:
+        """Stores `data` (once per distinct content) and returns its reference."""
+        digest = hashlib.sha256(data).hexdigest()
+        ref = BlobRef(blob=digest, size=len(data), media_type=media_type)
+        self._remember(digest, data)
+
+        for compressed in (True, False):
+            try:
+                os.utime(self._path(digest, compressed))  # Stored again: restart its age (see `prune`)
+                return ref
+            except FileNotFoundError:
+                continue  # Not stored (or just pruned), write it below
+
+        codec = self._codec() if self.compress else None
+        path = self._path(digest, codec is not None)
+        payload = codec[0].compress(data) if codec is not None else data
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporary, "wb") as file:
+            file.write(payload)
+        os.replace(temporary, path)
+        self.maybe_prune()
+        return ref
+
+    def get(self, ref: BlobRef) -> bytes:
+        """Returns the content of a blob; raises MissingBlobError if it is missing."""
+        digest = ref["blob"]
+        data = self.memory.get(digest)
+        if data is not None:
+            return data
+
+        for compressed in (True, False):
+            path = self._path(digest, compressed)
+            try:
+                with open(path, "rb") as file:
+                    payload = file.read()
+            except FileNotFoundError:
+                continue
+            if compressed:
+                codec = self._codec()
+                if codec is None:
+                    raise MissingBlobError(
+                        f"blob {digest} is zstd-compressed but zstandard is missing"
+                    )
+                payload = codec[1].decompress(payload)
+            self._remember(digest, payload)
+            return payload
+
+        raise MissingBlobError(f"blob {digest} not found in {self.root}")
+
+    def maybe_prune(self, interval: Optional[float] = BLOB_PRUNE_INTERVAL) -> bool:
+        """
+        Starts `prune` in a background thread unless this store was pruned (by
+        any process) within `interval` seconds. Returns True if it started one.
+        """
+        if not interval or time.time() < self._next_prune:
+            return False
+        with self._prune_lock:
+            now = time.time()
+            if now < self._next_prune:
+                return False
+            marker = os.path.join(self.root, PRUNE_MARKER)
+            try:
+                last = os.path.getmtime(marker)
+            except FileNotFoundError:
+                last = 0.0
+            if now - last < interval:
+                self._next_prune = last + interval
+                return False
+            self._next_prune = now + interval
+            os.makedirs(self.root, exist_ok=True)
+            with open(marker, "a"):
+                pass
+            os.utime(marker)
+
+        threading.Thread(target=self.prune, name="blob-prune", daemon=True).start()
+        return True
+
+    def prune(self, max_age: float = BLOB_MAX_AGE) -> int:
+        """Deletes blobs not written or re-stored for `max_age` seconds; returns the count."""
+        cutoff = time.time() - max_age
+        removed = 0
+        for directory, _, files in os.walk(self.root):
+            for name in files:
+                if name == PRUNE_MARKER:
+                    continue
+                path = os.path.join(directory, name)
+                try:
+                    if os.path.getmtime(path) < cutoff:
+                        os.remove(path)
+                        removed += 1
+                except FileNotFoundError:
+                    pass
+        return removed
+
+
+blob_store = BlobStore()
+
+
+def put_text(text: str, media_type: str = "text/plain") -> BlobRef:
+    return blob_store.put(text.encode("utf-8"), media_type)
+
+
+def load_text(ref: BlobRef) -> str:
+    return blob_store.get(ref).decode("utf-8")
+
+
+def put_json(value) -> BlobRef:
+    return blob_store.put(orjson.dumps(value), "application/json")
+
+
+def load_json(ref: BlobRef):
+    return orjson.loads(blob_store.get(ref))
+
+
+def resolve_text(value: Union[BlobRef, str, None]) -> Optional[str]:
+    """Loads a text blob; plain strings (state written before blobs existed) pass through."""
+    return load_text(value) if is_blob_ref(value) else value
+
+
+def resolve_json(value):
+    """Loads a JSON blob; inline values (state written before blobs existed) pass through."""
+    return load_json(value) if is_blob_ref(value) else value
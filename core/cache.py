@@ -0,0 +1,234 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+import msgpack
+
+from core.instrumentation import record_cache
+
+# Root directory for every local cache file (override per deployment)
+CACHE_DIR = os.getenv("BLOG_AGENT_CACHE_DIR", ".cache")
+
+
+class DiskCache:
+    """
+    Persistent key/value cache stored in a local SQLite file.
+
+    Values are serialized with msgpack, expire after `ttl` seconds and the
+    least recently used entries are evicted once `max_entries` is exceeded.
+    The database is opened lazily on first use, so creating a cache has no
+    side effects.
+    """
+
+    def __init__(
+        self, name: str, ttl: Optional[float] = None, max_entries: int = 1000
+    ):
+        self.name = name
+        self.path = os.path.join(CACHE_DIR, f"{name}.sqlite3")
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, "
+                "created REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)"
+            )
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str) -> Optional[Any]:
+        """Returns the cached value, or None on a miss or an expired entry."""
+        entry = self.get_entry(key)
+        return entry[0] if entry is not None else None
+
+    def get_entry(self, key: str) -> Optional[tuple]:
+        """Like `get`, but returns (value, created time) so callers can honour the TTL."""
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT value, created FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row and self.ttl is not None and now - row[1] > self.ttl:
+                conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                conn.commit()
+                row = None
+
+            if not row:
+                self.misses += 1
+                record_cache(self.name, hit=False)
+                return None
+
+            conn.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+            conn.commit()
+            self.hits += 1
+            record_cache(self.name, hit=True)
+
+        return msgpack.unpackb(row[0], raw=False), row[1]
+
+    def set(self, key: str, value: Any) -> None:
+        """Stores a value and evicts least recently used entries above the size cap."""
+        now = time.time()
+        blob = msgpack.packb(value, use_bin_type=True)
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, created, accessed) "
+                "VALUES (?, ?, ?, ?)",
+                (key, blob, now, now),
+            )
+            overflow = (
+                conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+                - self.max_entries
+            )
+            if overflow > 0:
+                conn.execute(
+                    "DELETE FROM entries WHERE key IN ("
+                    "SELECT key FROM entries ORDER BY accessed LIMIT ?)",
+                    (overflow,),
+                )
+                self.evictions += overflow
+            conn.commit()
+
+    def delete(self, key: str) -> None:
+        """Removes a single entry."""
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            conn.commit()
+
+    def clear(self) -> None:
+        """Removes every entry and resets the statistics."""
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM entries")
+            conn.commit()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> dict:
+        """Returns hit/miss/eviction counters and the current entry count."""
+        with self._lock:
+            size = self._connect().execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "size": size,
+        }
+
+
+class MemoryLRU:
+    """Thread-safe in-process LRU with an optional TTL."""
+
+    def __init__(self, max_entries: int = 256, ttl: Optional[float] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and self.ttl is not None and time.time() - entry[1] > self.ttl:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key: str, value: Any, created: Optional[float] = None) -> None:
+        with self._lock:
+            self._entries[key] = (value, created or time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "size": len(self._entries),
+        }
+
+
+class TieredCache:
+    """
+    Two-level cache: an in-memory LRU in front of a persistent DiskCache.
+
+    Reads check memory first and promote disk hits into memory (keeping the
+    entry's original creation time, so it expires from memory when it would
+    from disk); writes go to both levels.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        ttl: Optional[float] = None,
+        max_entries: int = 10000,
+        memory_entries: int = 256,
+    ):
+        self.memory = MemoryLRU(memory_entries, ttl=ttl)
+        self.disk = DiskCache(name, ttl=ttl, max_entries=max_entries)
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self.memory.get(key)
+        if value is not None:
+            record_cache(self.disk.name, hit=True)  # Disk lookups record themselves
+            return value
+        entry = self.disk.get_entry(key)
+        if entry is None:
+            return None
+        value, created = entry
+        self.memory.set(key, value, created=created)
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        self.memory.set(key, value)
+        self.disk.set(key, value)
+
+    def delete(self, key: str) -> None:
+        self.memory.delete(key)
+        self.disk.delete(key)
+
+    def clear(self) -> None:
+        self.memory.clear()
+        self.disk.clear()
+
+    def stats(self) -> dict:
+        """Returns hit/miss statistics per level."""
+        return {"memory": self.memory.stats(), "disk": self.disk.stats()}
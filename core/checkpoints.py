@@ -0,0 +1,76 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import weakref
+from typing import Optional
+
+from core.cache import CACHE_DIR
+
+# Local SQLite file holding the per-thread workflow checkpoints
+CHECKPOINT_DB = os.getenv(
+    "BLOG_AGENT_CHECKPOINT_DB", os.path.join(CACHE_DIR, "checkpoints.sqlite3")
+)
+
+_saver = None
+_saver_lock = threading.Lock()
+
+# Async savers wrap an aiosqlite connection bound to the loop that uses it
+_async_savers = weakref.WeakKeyDictionary()  # loop -> AsyncSqliteSaver
+
+
+def _ensure_directory(path: str) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+
+def get_checkpointer(path: Optional[str] = None):
+    """
+    Returns the process-wide SQLite checkpointer for sync graphs, opened on first use.
+
+    Every node's output is persisted per `thread_id`, so a failed or interrupted
+    run can continue from its last completed node.
+    """
+    global _saver
+    if _saver is None:
+        with _saver_lock:
+            if _saver is None:
+                from langgraph.checkpoint.sqlite import SqliteSaver  # Deferred until first use
+
+                path = path or CHECKPOINT_DB
+                _ensure_directory(path)
+                conn = sqlite3.connect(path, check_same_thread=False)
+                conn.execute("PRAGMA journal_mode=WAL")
+                _saver = SqliteSaver(conn)
+    return _saver
+
+
+def get_async_checkpointer(path: Optional[str] = None):
+    """Returns the SQLite checkpointer for async graphs on the running event loop."""
+    loop = asyncio.get_running_loop()
+    saver = _async_savers.get(loop)
+    if saver is None:
+        import aiosqlite  # Deferred until first use
+        from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+        path = path or CHECKPOINT_DB
+        _ensure_directory(path)
+        # The connection thread is started lazily by the saver's first query
+        saver = AsyncSqliteSaver(aiosqlite.connect(path))
+        _async_savers[loop] = saver
+    return saver
+
+
+async def aclose_checkpointer() -> None:
+    """Closes the running event loop's async checkpointer connection."""
+    saver = _async_savers.pop(asyncio.get_running_loop(), None)
+    if saver is not None:
+        await saver.conn.close()
+
+
+def close_checkpointer() -> None:
+    """Closes the sync checkpointer connection."""
+    global _saver
+    with _saver_lock:
+        if _saver is not None:
+            _saver.conn.close()
+            _saver = None
@@ -0,0 +1,295 @@
+"""
+Per-node instrumentation for the LangGraph workflow.
+
+Every node registered in `build_workflow` is wrapped by `instrument_node`, which
+records wall time, network bytes, cache lookups, output state size and LLM token
+counts. Work done on behalf of a node (HTTP downloads, cache lookups) is
+attributed to it through a context variable, so concurrent runs and fan-out
+branches do not mix their numbers.
+
+Metrics are kept as in-process histograms/counters and exported in the
+Prometheus text exposition format (`render_prometheus`, `write_metrics`).
+"""
+
+import asyncio
+import contextvars
+import functools
+import logging
+import random
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional, Tuple
+
+METRIC_PREFIX = "blog_agent"
+DURATION_BUCKETS = (0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+BYTES_BUCKETS = (1e3, 1e4, 5e4, 1e5, 5e5, 1e6, 5e6, 1e7, 5e7)
+
+# Callbacks invoked as listener(node name, duration, NodeStats) after every node call
+NODE_LISTENERS: List[Callable] = []
+
+# Share of runs whose full prompt/response payloads are logged at DEBUG level
+PAYLOAD_LOG_SAMPLE_RATE = 0.05
+
+
+class NodeStats:
+    """Accumulates the side costs (network, cache) of one node invocation."""
+
+    __slots__ = ("network_bytes", "requests", "cache")
+
+    def __init__(self):
+        self.network_bytes = 0
+        self.requests = 0
+        self.cache = defaultdict(int)  # (cache name, "hit"/"miss") -> count
+
+
+_current: contextvars.ContextVar[Optional[NodeStats]] = contextvars.ContextVar(
+    "blog_agent_node_stats", default=None
+)
+
+
+class Histogram:
+    """Cumulative-bucket histogram with one series per label set."""
+
+    def __init__(self, name: str, help_text: str, buckets: Tuple[float, ...]):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(sorted(buckets))
+        self.series: Dict[tuple, list] = {}  # labels -> [bucket counts, sum, count]
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(sorted(labels.items()))
+        series = self.series.setdefault(key, [[0] * len(self.buckets), 0.0, 0])
+        index = bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            series[0][index] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, (counts, total, count) in sorted(self.series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(
+                    f"{self.name}_bucket{format_labels(key, le=format_value(bound))} {cumulative}"
+                )
+            lines.append(f"{self.name}_bucket{format_labels(key, le='+Inf')} {count}")
+            lines.append(f"{self.name}_sum{format_labels(key)} {format_value(total)}")
+            lines.append(f"{self.name}_count{format_labels(key)} {count}")
+        return lines
+
+
+class Counter:
+    """Monotonic counter with one series per label set."""
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self.series: Dict[tuple, float] = defaultdict(float)
+
+    def inc(self, value: float = 1, **labels) -> None:
+        self.series[tuple(sorted(labels.items()))] += value
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self.series.items()):
+            lines.append(f"{self.name}{format_labels(key)} {format_value(value)}")
+        return lines
+
+
+def format_labels(key: tuple, **extra) -> str:
+    pairs = list(key) + list(extra.items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{escape_label(value)}"' for name, value in pairs) + "}"
+
+
+def escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+_lock = threading.Lock()
+node_duration = Histogram(
+    f"{METRIC_PREFIX}_node_duration_seconds", "Wall time of one node call.", DURATION_BUCKETS
+)
+node_network_bytes = Histogram(
+    f"{METRIC_PREFIX}_node_network_bytes", "Bytes downloaded by one node call.", BYTES_BUCKETS
+)
+node_state_bytes = Histogram(
+    f"{METRIC_PREFIX}_node_state_bytes", "Approximate size of a node's output state.", BYTES_BUCKETS
+)
+node_calls = Counter(f"{METRIC_PREFIX}_node_calls_total", "Node calls by outcome.")
+http_requests = Counter(f"{METRIC_PREFIX}_http_requests_total", "HTTP requests sent per node.")
+cache_lookups = Counter(f"{METRIC_PREFIX}_cache_lookups_total", "Cache lookups per node, cache and result.")
+llm_tokens = Counter(f"{METRIC_PREFIX}_llm_tokens_total", "LLM tokens per node and direction.")
+flight_calls = Counter(
+    f"{METRIC_PREFIX}_singleflight_calls_total",
+    "Single-flight calls per flight, executed (leader) or joined to an in-flight call (coalesced).",
+)
+METRICS = (
+    node_duration,
+    node_network_bytes,
+    node_state_bytes,
+    node_calls,
+    http_requests,
+    cache_lookups,
+    llm_tokens,
+    flight_calls,
+)
+
+
+# --------------- HOOKS (called by the HTTP client and the caches) ---------------
+def record_network(num_bytes: int) -> None:
+    """Attributes one HTTP response of `num_bytes` to the node currently running."""
+    stats = _current.get()
+    if stats is not None:
+        stats.network_bytes += num_bytes
+        stats.requests += 1
+
+
+def record_cache(name: str, hit: bool) -> None:
+    """Attributes one cache lookup to the node currently running."""
+    stats = _current.get()
+    if stats is not None:
+        stats.cache[(name, "hit" if hit else "miss")] += 1
+
+
+def record_flight(name: str, coalesced: bool) -> None:
+    """Counts one single-flight call, and whether it joined a call already in flight."""
+    with _lock:
+        flight_calls.inc(flight=name, role="coalesced" if coalesced else "leader")
+
+
+def payload_size(value) -> int:
+    """Cheap estimate of a state's size in bytes (string/bytes lengths, walked recursively)."""
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(payload_size(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(payload_size(item) for item in value)
+    content = getattr(value, "content", None)  # LangChain messages
+    if content is not None:
+        return payload_size(content)
+    return 8
+
+
+def should_log_payload() -> bool:
+    """True for a PAYLOAD_LOG_SAMPLE_RATE sample of calls when DEBUG logging is enabled."""
+    return (
+        logging.getLogger().isEnabledFor(logging.DEBUG)
+        and random.random() < PAYLOAD_LOG_SAMPLE_RATE
+    )
+
+
+# --------------- NODE WRAPPER ---------------
+def observe_node(name: str, state, result, stats: NodeStats, duration: float, outcome: str) -> None:
+    state_bytes = payload_size(result) if isinstance(result, dict) else None
+    with _lock:
+        node_duration.observe(duration, node=name)
+        node_network_bytes.observe(stats.network_bytes, node=name)
+        node_calls.inc(node=name, outcome=outcome)
+        if stats.requests:
+            http_requests.inc(stats.requests, node=name)
+        for (cache, lookup), count in stats.cache.items():
+            cache_lookups.inc(count, node=name, cache=cache, result=lookup)
+
+        if state_bytes is not None:
+            node_state_bytes.observe(state_bytes, node=name)
+            metrics = result.get("generation_metrics")
+            # Count tokens of fresh generations only (not carried-over or cached ones)
+            if (
+                metrics
+                and not metrics.get("cache")
+                and metrics is not (state or {}).get("generation_metrics")
+            ):
+                for direction in ("input", "output"):
+                    if metrics.get(f"{direction}_tokens"):
+                        llm_tokens.inc(metrics[f"{direction}_tokens"], node=name, direction=direction)
+
+    for listener in NODE_LISTENERS:
+        listener(name, duration, stats)
+
+    logging.debug(
+        f"⏱️ {name}: {duration:.3f}s, {stats.network_bytes} bytes over "
+        f"{stats.requests} requests, cache {dict(stats.cache)}"
+    )
+
+
+def instrument_node(name: str, node: Callable) -> Callable:
+    """
+    Wraps a (sync or async) LangGraph node so every call is measured.
+
+    The wrapper keeps the node's signature (`functools.wraps`), so LangGraph
+    still passes `config` to nodes that accept it.
+    """
+    if asyncio.iscoroutinefunction(node):
+
+        @functools.wraps(node)
+        async def async_wrapper(state, *args, **kwargs):
+            stats = NodeStats()
+            token = _current.set(stats)
+            started = time.perf_counter()
+            result, outcome = None, "error"
+            try:
+                result = await node(state, *args, **kwargs)
+                outcome = "ok"
+                return result
+            finally:
+                _current.reset(token)
+                observe_node(name, state, result, stats, time.perf_counter() - started, outcome)
+
+        return async_wrapper
+
+    @functools.wraps(node)
+    def wrapper(state, *args, **kwargs):
+        stats = NodeStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        result, outcome = None, "error"
+        try:
+            result = node(state, *args, **kwargs)
+            outcome = "ok"
+            return result
+        finally:
+            _current.reset(token)
+            observe_node(name, state, result, stats, time.perf_counter() - started, outcome)
+
+    return wrapper
+
+
+# --------------- EXPORT ---------------
+def render_prometheus() -> str:
+    """Returns every metric in the Prometheus text exposition format."""
+    with _lock:
+        lines = [line for metric in METRICS for line in metric.render()]
+    return "\n".join(lines) + "\n"
+
+
+def write_metrics(path: str) -> None:
+    """Writes the metrics to `path` (e.g. for the node exporter's textfile collector)."""
+    with open(path, "w") as file:
+        file.write(render_prometheus())
+
+
+def add_node_listener(listener: Callable) -> None:
+    """Registers `listener(name, duration, stats)` to receive every node measurement."""
+    NODE_LISTENERS.append(listener)
+
+
+def remove_node_listener(listener: Callable) -> None:
+    NODE_LISTENERS.remove(listener)
+
+
+def reset_metrics() -> None:
+    """Drops every recorded series."""
+    with _lock:
+        for metric in METRICS:
+            metric.series.clear()
@@ -0,0 +1,88 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+
+# Which provider each pipeline stage talks to (for provider rate limits)
+STAGE_PROVIDERS = {
+    "search": "google",
+    "scrape": None,  # Arbitrary blog hosts, bounded by concurrency only
+    "llm": "openai",
+}
+
+
+class RateLimiter:
+    """
+    Async token bucket: allows `rate_per_minute` acquisitions per minute with
+    bursts of up to `burst` back-to-back calls.
+    """
+
+    def __init__(self, rate_per_minute: float, burst: int = 1):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.capacity, self.tokens + (now - self.updated) * self.rate
+                )
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+_stage_semaphores: Dict[str, asyncio.Semaphore] = {}
+_provider_limiters: Dict[str, RateLimiter] = {}
+
+
+def configure_stage(stage: str, concurrency: Optional[int]) -> None:
+    """Caps how many async node calls of `stage` run at once (None removes the cap)."""
+    if concurrency:
+        _stage_semaphores[stage] = asyncio.Semaphore(concurrency)
+    else:
+        _stage_semaphores.pop(stage, None)
+
+
+def configure_provider(
+    provider: str, rate_per_minute: Optional[float], burst: int = 1
+) -> None:
+    """Rate-limits calls to `provider` (None removes the limit)."""
+    if rate_per_minute:
+        _provider_limiters[provider] = RateLimiter(rate_per_minute, burst)
+    else:
+        _provider_limiters.pop(provider, None)
+
+
+def reset_limits() -> None:
+    """Removes every stage cap and provider rate limit."""
+    _stage_semaphores.clear()
+    _provider_limiters.clear()
+
+
+@asynccontextmanager
+async def stage_slot(stage: str):
+    """
+    Holds a slot of `stage` for the duration of the block and waits for the
+    stage provider's rate limit. Stages without configured limits pass straight
+    through, so single runs are unaffected.
+    """
+    semaphore = _stage_semaphores.get(stage)
+    limiter = _provider_limiters.get(STAGE_PROVIDERS.get(stage))
+
+    if semaphore is None:
+        if limiter is not None:
+            await limiter.acquire()
+        yield
+        return
+
+    async with semaphore:
+        if limiter is not None:
+            await limiter.acquire()
+        yield
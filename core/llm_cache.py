@@ -0,0 +1,118 @@
+import hashlib
+import re
+import time
+from typing import Iterable, List, Optional
+
+import orjson
+
+from core.cache import DiskCache
+
+# Completed generations (o1-preview calls are slow and expensive to repeat)
+LLM_CACHE_TTL = 30 * 24 * 60 * 60  # seconds
+LLM_CACHE_MAX_ENTRIES = 5000
+llm_cache = DiskCache("llm_generations", ttl=LLM_CACHE_TTL, max_entries=LLM_CACHE_MAX_ENTRIES)
+
+# Near-duplicate lookup: generations per (model, topic) with their keyword sets
+SIMILARITY_THRESHOLD = None  # Jaccard similarity (e.g. 0.9) to reuse near-duplicates; None = exact only
+SIMILAR_CANDIDATES_PER_TOPIC = 20
+similarity_index = DiskCache(
+    "llm_generation_index", ttl=LLM_CACHE_TTL, max_entries=LLM_CACHE_MAX_ENTRIES
+)
+
+# Matches one "('keyword', count)" pair of the keyword string built by sort_for_model
+KEYWORD_PAIR_PATTERN = re.compile(r"\('(.*?)', \d+\)")
+
+
+def stable_hash(value) -> str:
+    """SHA-256 of a JSON-serializable value, independent of dict ordering."""
+    return hashlib.sha256(orjson.dumps(value, option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+
+def generation_key(model_name: str, params: dict, messages: Iterable) -> str:
+    """
+    Cache key of one completion: model name, sampling parameters and the fully
+    formatted prompt (message roles and contents).
+    """
+    prompt = [[message.type, message.content] for message in messages]
+    return stable_hash({"model": model_name, "params": params, "prompt": prompt})
+
+
+def keyword_set(keywords: str) -> frozenset:
+    """Normalizes a `sort_for_model` keyword string into a set of lowercase keywords."""
+    return frozenset(
+        " ".join(keyword.lower().split())
+        for keyword in KEYWORD_PAIR_PATTERN.findall(keywords or "")
+    )
+
+
+def jaccard(a: frozenset, b: frozenset) -> float:
+    """Jaccard similarity of two sets (1.0 for two empty sets)."""
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def topic_key(model_name: str, params: dict, topic: str) -> str:
+    return stable_hash(
+        {"model": model_name, "params": params, "topic": " ".join(topic.lower().split())}
+    )
+
+
+def get_generation(key: str) -> Optional[dict]:
+    """Returns the cached {content, usage_metadata, response_metadata, metrics, created} entry."""
+    return llm_cache.get(key)
+
+
+def find_similar_generation(
+    model_name: str,
+    params: dict,
+    topic: str,
+    keywords: str,
+    threshold: Optional[float] = SIMILARITY_THRESHOLD,
+) -> Optional[dict]:
+    """
+    Returns the cached generation for the same model and topic whose keyword set
+    is most similar to `keywords`, if that similarity reaches `threshold`.
+    """
+    if threshold is None or not topic:
+        return None
+
+    wanted = keyword_set(keywords)
+    best_key, best_score = None, threshold
+    for key, candidate in similarity_index.get(topic_key(model_name, params, topic)) or []:
+        score = jaccard(wanted, frozenset(candidate))
+        if score >= best_score:
+            best_key, best_score = key, score
+
+    return llm_cache.get(best_key) if best_key else None
+
+
+def store_generation(
+    key: str,
+    entry: dict,
+    model_name: str,
+    params: dict,
+    topic: Optional[str] = None,
+    keywords: Optional[str] = None,
+) -> None:
+    """
+    Caches a completed generation and registers it for near-duplicate lookups
+    under (model, params, topic).
+    """
+    llm_cache.set(key, {**entry, "created": time.time()})
+    if not topic:
+        return
+
+    index_key = topic_key(model_name, params, topic)
+    candidates: List[list] = [
+        candidate
+        for candidate in similarity_index.get(index_key) or []
+        if candidate[0] != key
+    ]
+    candidates.append([key, sorted(keyword_set(keywords))])
+    similarity_index.set(index_key, candidates[-SIMILAR_CANDIDATES_PER_TOPIC:])
+
+
+def llm_cache_stats() -> dict:
+    """Returns hit/miss statistics of the generation cache."""
+    return llm_cache.stats()
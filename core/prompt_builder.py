@@ -1,25 +1,46 @@
+import logging
+import math
+import os
+import threading
+import time
+from functools import lru_cache
+from typing import Optional, Tuple, Union
+
 from langchain_core.messages import SystemMessage, HumanMessage
 
+from core.cache import CACHE_DIR
 
-def build_prompt(
-    blog_topic: str, extracted_keywords_str: str, blog_length: int = 1000
-) -> list:
-    """
-    Constructs a structured prompt for an AI model to generate an SEO-optimized blog post
-    using specified keywords, citations, and image descriptions, with a clickbait title
-    and meta description.
+# Input token budget per model for the whole prompt (template, topic and keywords)
+MODEL_INPUT_BUDGETS = {
+    "gpt-4o": 4000,
+    "o1-preview": 4000,
+}
+DEFAULT_INPUT_BUDGET = 4000
+INPUT_BUDGET_OVERRIDE = os.getenv("BLOG_AGENT_PROMPT_TOKEN_BUDGET")  # Applies to every model
 
-    Parameters:
-        - blog_topic (str): The main subject of the blog.
-        - extracted_keywords_str (str): A formatted string of keywords with their frequency count.
-        - blog_length (int): Minimum required length of the blog post in characters. Default is 1000.
+# Chat framing overhead (OpenAI's documented per-message and reply-priming tokens)
+TOKENS_PER_MESSAGE = 3
+REPLY_PRIMING_TOKENS = 3
 
-    Returns:
-        - List: A structured prompt containing system and user messages.
-    """
+# Offline estimate used when no tiktoken encoding can be loaded
+CHARS_PER_TOKEN = 4
+
+# tiktoken keeps downloaded BPE files here, so an encoding is fetched once per
+# cache directory (pre-populate it to deploy without network access)
+TIKTOKEN_CACHE_DIR = os.getenv("TIKTOKEN_CACHE_DIR", os.path.join(CACHE_DIR, "tiktoken"))
+FALLBACK_ENCODING = "o200k_base"  # Used for models tiktoken does not know
+ENCODING_LOAD_TIMEOUT = 10.0  # Seconds a prompt waits for an encoding before estimating
+ENCODING_RETRY_SECONDS = 60.0  # A failed encoding load is retried after this
 
-    # 1. System Message: Guides the AI on how to structure and write the blog.
-    system_prompt = f""" 
+_encodings = {}  # Encoding name -> loaded tiktoken.Encoding
+_encoding_loaders = {}  # Encoding name -> thread loading it
+_encoding_failures = {}  # Encoding name -> time.monotonic() of the last failed load
+_encodings_lock = threading.Lock()
+NO_KEYWORDS = "No relevant keywords found."
+KEYWORD_SEPARATOR = ", "
+
+# 1. System Message: Guides the AI on how to structure and write the blog.
+SYSTEM_TEMPLATE = """ 
     You are an AI-powered expert content writer specializing in SEO-optimized blog creation.
 
     ## Capabilities
@@ -70,12 +91,12 @@ def build_prompt(
     - The article must be **highly engaging, well-researched, and reader-friendly**, optimized for both SEO and human readability.
     """
 
-    # 2. User Message: Provides the specific blog topic and keywords to be used.
-    user_prompt = f"""
+# 2. User Message: Provides the specific blog topic and keywords to be used.
+USER_TEMPLATE = """
     **Blog Topic:** {blog_topic}
 
     **Keywords and Frequency Count:** 
-    {extracted_keywords_str}
+    {keywords}
 
     Please write a **comprehensive, SEO-optimized blog post** on the above topic, 
     ensuring meaningful and **natural** integration of the given keywords.
@@ -95,11 +116,224 @@ def build_prompt(
     Make sure it **DOES NOT SOUND AI GENERATED**
     """
 
-    # Constructing messages for the AI
-    system_message = SystemMessage(content=system_prompt)
-    human_message = HumanMessage(content=user_prompt)
 
-    return [system_message, human_message]
+def load_encoding(name: str) -> None:
+    """Loads a tiktoken encoding into `_encodings` (downloading it into TIKTOKEN_CACHE_DIR once)."""
+    try:
+        os.environ.setdefault("TIKTOKEN_CACHE_DIR", TIKTOKEN_CACHE_DIR)
+        import tiktoken  # Deferred until the first prompt is counted
+
+        _encodings[name] = tiktoken.get_encoding(name)
+        _encoding_failures.pop(name, None)
+    except Exception as e:
+        _encoding_failures[name] = time.monotonic()
+        logging.warning(f"⚠️ Could not load tokenizer {name}, estimating token counts: {e}")
+    finally:
+        with _encodings_lock:
+            _encoding_loaders.pop(name, None)
+
+
+def encoding_name(model_name: str) -> str:
+    """Name of the tiktoken encoding used for a model."""
+    try:
+        from tiktoken.model import encoding_name_for_model
+
+        return encoding_name_for_model(model_name)
+    except (ImportError, KeyError):
+        return FALLBACK_ENCODING
+
+
+def get_encoding(model_name: str):
+    """
+    Returns the tiktoken encoding for a model, or None when it is not loaded yet.
+
+    The encoding loads in a background thread (tiktoken downloads without a
+    timeout) that callers wait on for at most ENCODING_LOAD_TIMEOUT. Until it
+    succeeds token counts fall back to a CHARS_PER_TOKEN estimate; a failed load
+    is retried ENCODING_RETRY_SECONDS later.
+    """
+    name = encoding_name(model_name)
+    encoding = _encodings.get(name)
+    if encoding is not None:
+        return encoding
+
+    with _encodings_lock:
+        loader = _encoding_loaders.get(name)
+        if loader is None:
+            failed = _encoding_failures.get(name)
+            if failed is not None and time.monotonic() - failed < ENCODING_RETRY_SECONDS:
+                return None
+            loader = _encoding_loaders[name] = threading.Thread(
+                target=load_encoding, args=(name,), name=f"tiktoken-{name}", daemon=True
+            )
+            loader.start()
+    loader.join(ENCODING_LOAD_TIMEOUT)
+    return _encodings.get(name)
+
+
+def count_tokens(text: str, model_name: str) -> int:
+    """Counts the tokens `text` takes for `model_name` (estimated when offline)."""
+    if not text:
+        return 0
+    encoding = get_encoding(model_name)
+    if encoding is None:
+        return math.ceil(len(text) / CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def input_budget(model_name: str) -> int:
+    """Returns the prompt token budget for a model."""
+    if INPUT_BUDGET_OVERRIDE:
+        return int(INPUT_BUDGET_OVERRIDE)
+    return MODEL_INPUT_BUDGETS.get(model_name, DEFAULT_INPUT_BUDGET)
+
+
+@lru_cache(maxsize=32)
+def render_template(blog_length: int) -> Tuple[str, Tuple[str, str, str]]:
+    """
+    Renders the static parts of the prompt once per blog length.
+
+    Returns:
+        - Tuple: (system prompt, (user prompt text before the topic, between topic
+          and keywords, after the keywords)).
+    """
+    system_prompt = SYSTEM_TEMPLATE.format(blog_length=blog_length)
+    user_parts = USER_TEMPLATE.format(
+        blog_topic="\0", keywords="\0", blog_length=blog_length
+    ).split("\0")
+    return system_prompt, tuple(user_parts)
+
+
+def template_tokens(model_name: str, blog_length: int, merge_messages: bool) -> int:
+    """Token count of the pre-rendered static template, including message framing."""
+    # Keyed by the encoding too, so an estimate is not kept once the tokenizer loads
+    return cached_template_tokens(
+        model_name, blog_length, merge_messages, get_encoding(model_name) is not None
+    )
+
+
+@lru_cache(maxsize=32)
+def cached_template_tokens(
+    model_name: str, blog_length: int, merge_messages: bool, tokenized: bool
+) -> int:
+    system_prompt, user_parts = render_template(blog_length)
+    messages = 1 if merge_messages else 2
+    separator = count_tokens("\n\n", model_name) if merge_messages else 0
+    return (
+        count_tokens(system_prompt, model_name)
+        + sum(count_tokens(part, model_name) for part in user_parts)
+        + separator
+        + messages * TOKENS_PER_MESSAGE
+        + REPLY_PRIMING_TOKENS
+    )
+
+
+def format_keyword(keyword: str, count) -> str:
+    return f"('{keyword}', {count})"
+
+
+def fit_keywords(keywords: list, max_tokens: int, model_name: str) -> Tuple[str, int]:
+    """
+    Keeps keywords in rank order (best first) while they fit in `max_tokens`.
+
+    Parameters:
+        - keywords (list): (keyword, frequency) tuples, in rank order.
+        - max_tokens (int): Tokens available for the keyword list.
+        - model_name (str): Model whose tokenizer is used for counting.
+
+    Returns:
+        - Tuple[str, int]: The formatted keyword list and the number of keywords kept.
+    """
+    separator_tokens = count_tokens(KEYWORD_SEPARATOR, model_name)
+    entries, used = [], 0
+
+    for keyword, count in keywords:
+        entry = format_keyword(keyword, count)
+        cost = count_tokens(entry, model_name) + (separator_tokens if entries else 0)
+        if used + cost > max_tokens:
+            break
+        entries.append(entry)
+        used += cost
+
+    return KEYWORD_SEPARATOR.join(entries), len(entries)
+
+
+def assemble_prompt(
+    blog_topic: str,
+    keywords: Union[list, str],
+    model_name: str,
+    blog_length: int = 1000,
+    merge_messages: bool = False,
+    budget: Optional[int] = None,
+) -> dict:
+    """
+    Builds the generation prompt within the model's input token budget.
+
+    The static template is rendered once; only the topic and the keyword list are
+    filled in per call. Keywords keep their rank order and the lowest-ranked ones
+    are dropped once the prompt would exceed the budget.
+
+    Parameters:
+        - blog_topic (str): The main subject of the blog.
+        - keywords (list | str): (keyword, frequency) tuples in rank order, or an already formatted
+          keyword string (used as is).
+        - model_name (str): Model the prompt is for (tokenizer and default budget).
+        - blog_length (int): Minimum required length of the blog post in characters.
+        - merge_messages (bool): Returns one user message instead of system + user
+          (for models without system message support, e.g. o1-preview).
+        - budget (int): Input token budget. Defaults to `input_budget(model_name)`.
+
+    Returns:
+        - dict: {"messages", "prompt_tokens", "budget", "keywords_used", "keywords_total"}.
+    """
+    budget = budget or input_budget(model_name)
+    system_prompt, (head, middle, tail) = render_template(blog_length)
+    fixed_tokens = template_tokens(model_name, blog_length, merge_messages) + count_tokens(
+        blog_topic, model_name
+    )
+
+    if isinstance(keywords, str):
+        keywords_str, used, total = keywords, None, None
+    elif not keywords:
+        keywords_str, used, total = NO_KEYWORDS, 0, 0
+    else:
+        keywords_str, used = fit_keywords(keywords, max(0, budget - fixed_tokens), model_name)
+        total = len(keywords)
+
+    user_prompt = "".join((head, blog_topic, middle, keywords_str, tail))
+    if merge_messages:
+        messages = [HumanMessage(content="\n\n".join((system_prompt, user_prompt)))]
+    else:
+        messages = [SystemMessage(content=system_prompt), HumanMessage(content=user_prompt)]
+
+    return {
+        "messages": messages,
+        "prompt_tokens": fixed_tokens + count_tokens(keywords_str, model_name),
+        "budget": budget,
+        "keywords_used": used,
+        "keywords_total": total,
+    }
+
+
+def build_prompt(
+    blog_topic: str, extracted_keywords_str: str, blog_length: int = 1000
+) -> list:
+    """
+    Constructs a structured prompt for an AI model to generate an SEO-optimized blog post
+    using specified keywords, citations, and image descriptions, with a clickbait title
+    and meta description.
+
+    Parameters:
+        - blog_topic (str): The main subject of the blog.
+        - extracted_keywords_str (str): A formatted string of keywords with their frequency count.
+        - blog_length (int): Minimum required length of the blog post in characters. Default is 1000.
+
+    Returns:
+        - List: A structured prompt containing system and user messages.
+    """
+    system_prompt, (head, middle, tail) = render_template(blog_length)
+    user_prompt = "".join((head, str(blog_topic), middle, extracted_keywords_str, tail))
+    return [SystemMessage(content=system_prompt), HumanMessage(content=user_prompt)]
 
 
 # print('build_prompt(web design): ', build_prompt('web design'))
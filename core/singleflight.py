@@ -0,0 +1,95 @@
+import asyncio
+import threading
+import weakref
+from typing import Any, Callable, Dict, Hashable
+
+from core.instrumentation import record_flight
+
+
+class _Call:
+    """One in-flight sync call that followers wait on."""
+
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Collapses concurrent calls with the same key into one execution.
+
+    The first caller of a key (the leader) runs the function; callers arriving
+    while it is in flight wait and receive the same result (or exception).
+    Nothing is kept once the call finishes, so repeat calls after that go
+    through the caches as usual.
+
+    Sync calls (`do`) are shared across threads, async calls (`ado`) across the
+    tasks of one event loop. Followers receive the leader's result object
+    itself, so results must be treated as read-only.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.coalesced = 0
+        self._lock = threading.Lock()
+        self._in_flight: Dict[Hashable, _Call] = {}
+        # Async calls are tasks bound to the loop that runs them
+        self._tasks = weakref.WeakKeyDictionary()  # loop -> {key: task}
+
+    def _count(self, coalesced: bool) -> None:
+        self.calls += 1
+        self.coalesced += coalesced
+        record_flight(self.name, coalesced)
+
+    def do(self, key: Hashable, function: Callable, *args, **kwargs) -> Any:
+        """Returns `function(*args, **kwargs)`, sharing it with concurrent calls of `key`."""
+        with self._lock:
+            call = self._in_flight.get(key)
+            leader = call is None
+            if leader:
+                call = self._in_flight[key] = _Call()
+            self._count(not leader)
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = function(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            call.done.set()
+
+    async def ado(self, key: Hashable, function: Callable, *args, **kwargs) -> Any:
+        """Async version of `do`; `function` returns an awaitable."""
+        loop = asyncio.get_running_loop()
+        tasks = self._tasks.setdefault(loop, {})
+        task = tasks.get(key)
+        with self._lock:
+            self._count(task is not None)
+
+        if task is None:
+            task = tasks[key] = asyncio.ensure_future(function(*args, **kwargs))
+            task.add_done_callback(lambda done: tasks.pop(key, None))
+
+        # A cancelled caller must not cancel the call other callers are waiting on
+        return await asyncio.shield(task)
+
+    def stats(self) -> dict:
+        """Returns total and coalesced call counts."""
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "coalesced_rate": self.coalesced / self.calls if self.calls else 0.0,
+        }
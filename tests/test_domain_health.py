@@ -0,0 +1,184 @@
+import pytest
+
+from tools import domain_health
+from tools.domain_health import (
+    FAILURE_THRESHOLD,
+    OPEN_SECONDS,
+    SLOW_LATENCY,
+    TRIAL_TIMEOUT,
+    HealthTracker,
+    domain_of,
+)
+
+URL = "https://www.example.com/blog/post"
+
+
+class Clock:
+    """Stands in for the `time` module so cooldowns can be stepped through."""
+
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self) -> float:
+        return self.now
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(domain_health, "time", clock)
+    return clock
+
+
+def open_circuit(tracker: HealthTracker, url: str = URL) -> None:
+    for _ in range(FAILURE_THRESHOLD):
+        tracker.record_failure(url, "timeout")
+
+
+def test_circuit_opens_after_consecutive_failures(clock):
+    tracker = HealthTracker(path=None)
+    for _ in range(FAILURE_THRESHOLD - 1):
+        tracker.record_failure(URL, "timeout")
+    assert tracker.allow(URL)
+
+    tracker.record_failure(URL, "timeout")
+    assert not tracker.allow(URL)
+    assert tracker.stats("example.com")["state"] == "open"
+
+
+def test_success_resets_the_failure_streak(clock):
+    tracker = HealthTracker(path=None)
+    for _ in range(FAILURE_THRESHOLD - 1):
+        tracker.record_failure(URL, "timeout")
+    tracker.record_success(URL, 0.1)
+    tracker.record_failure(URL, "timeout")
+    assert tracker.allow(URL)
+    assert tracker.stats(URL)["consecutive_failures"] == 1
+
+
+def test_expired_cooldown_lets_one_trial_through(clock):
+    tracker = HealthTracker(path=None)
+    open_circuit(tracker)
+
+    clock.advance(OPEN_SECONDS - 1)
+    assert not tracker.allow(URL)
+    clock.advance(1)
+    assert tracker.allow(URL)
+    assert tracker.stats(URL)["state"] == "half_open"
+    assert not tracker.allow(URL)  # The trial is still in flight
+
+
+def test_trial_that_never_reports_back_is_retried(clock):
+    tracker = HealthTracker(path=None)
+    open_circuit(tracker)
+    clock.advance(OPEN_SECONDS)
+    assert tracker.allow(URL)
+
+    clock.advance(TRIAL_TIMEOUT - 1)
+    assert not tracker.allow(URL)
+    clock.advance(1)
+    assert tracker.allow(URL)
+
+
+def test_failed_trial_reopens_with_doubled_cooldown(clock):
+    tracker = HealthTracker(path=None)
+    open_circuit(tracker)
+    clock.advance(OPEN_SECONDS)
+    assert tracker.allow(URL)
+
+    tracker.record_failure(URL, "HTTP 503")
+    assert tracker.stats(URL)["state"] == "open"
+    clock.advance(OPEN_SECONDS)
+    assert not tracker.allow(URL)
+    clock.advance(OPEN_SECONDS)
+    assert tracker.allow(URL)
+
+
+def test_successful_trial_closes_and_resets_the_cooldown(clock):
+    tracker = HealthTracker(path=None)
+    open_circuit(tracker)
+    clock.advance(OPEN_SECONDS)
+    assert tracker.allow(URL)
+    tracker.record_failure(URL, "timeout")  # Re-opened for 2 * OPEN_SECONDS
+    clock.advance(2 * OPEN_SECONDS)
+    assert tracker.allow(URL)
+
+    tracker.record_success(URL, 0.2)
+    assert tracker.stats(URL)["state"] == "closed"
+    assert tracker.allow(URL)
+
+    open_circuit(tracker)
+    clock.advance(OPEN_SECONDS)
+    assert tracker.allow(URL)  # Back to the first cooldown
+
+
+def test_rank_skips_open_circuits_and_moves_slow_domains_last(clock):
+    tracker = HealthTracker(path=None)
+    open_circuit(tracker, "https://down.com/a")
+    for _ in range(10):
+        tracker.record_success("https://slow.com/a", SLOW_LATENCY + 1)
+        tracker.record_success("https://fast.com/a", 0.1)
+
+    urls = ["https://slow.com/a", "https://down.com/a", "https://fast.com/a", "https://new.com/a"]
+    assert tracker.rank(urls) == ["https://fast.com/a", "https://new.com/a", "https://slow.com/a"]
+
+
+def test_rank_keeps_candidates_when_every_circuit_is_open(clock):
+    tracker = HealthTracker(path=None)
+    open_circuit(tracker, "https://a.com/x")
+    open_circuit(tracker, "https://b.com/x")
+    assert tracker.rank(["https://a.com/x", "https://b.com/x"]) == ["https://a.com/x", "https://b.com/x"]
+
+
+def test_state_survives_a_save_and_reload(clock, tmp_path):
+    path = str(tmp_path / "health.json")
+    tracker = HealthTracker(path=path)
+    open_circuit(tracker)
+    tracker.record_success("https://other.com/a", 1.5)
+    tracker.record_newspaper("https://other.com/a", False)
+    tracker.save()
+
+    reloaded = HealthTracker(path=path)
+    assert reloaded.stats(URL) == tracker.stats(URL)
+    assert reloaded.stats("other.com") == tracker.stats("other.com")
+    assert not reloaded.allow(URL)
+    clock.advance(OPEN_SECONDS)  # Cooldowns use the wall clock, so they carry over
+    assert reloaded.allow(URL)
+
+
+def test_unreadable_file_starts_empty(clock, tmp_path):
+    path = tmp_path / "health.json"
+    path.write_text("{not json")
+    tracker = HealthTracker(path=str(path))
+    assert tracker.allow(URL)
+    assert tracker.stats(URL) is None
+
+
+def test_exit_hook_is_registered_on_first_use(clock, tmp_path, monkeypatch):
+    registered = []
+    monkeypatch.setattr(domain_health.atexit, "register", registered.append)
+    tracker = HealthTracker(path=str(tmp_path / "health.json"))
+    assert registered == []
+
+    tracker.record_success(URL, 0.1)
+    tracker.record_failure(URL, "timeout")
+    assert registered == [tracker.save]
+
+
+@pytest.mark.parametrize(
+    "url, domain",
+    [
+        ("https://www.Example.com/a", "example.com"),
+        ("http://example.com:8080/a", "example.com:8080"),
+        ("https://example.com:99999/blog/a", "example.com"),
+        ("https://example.com./a", "example.com"),
+    ],
+)
+def test_domain_of(url, domain):
+    assert domain_of(url) == domain
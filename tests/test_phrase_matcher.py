@@ -0,0 +1,33 @@
+from tools.phrase_matcher import PhraseMatcher
+
+
+def test_counts_whole_token_sequences():
+    matcher = PhraseMatcher([("web", "design"), ("design",)])
+    tokens = "good web design beats web designs and design".split()
+    assert matcher.count(tokens) == {("web", "design"): 1, ("design",): 2}
+
+
+def test_counts_overlapping_and_nested_phrases():
+    matcher = PhraseMatcher([("a", "b"), ("b", "c"), ("a", "b", "c"), ("c",)])
+    assert matcher.count("a b c a b c".split()) == {
+        ("a", "b"): 2,
+        ("b", "c"): 2,
+        ("a", "b", "c"): 2,
+        ("c",): 2,
+    }
+
+
+def test_recovers_from_partial_matches():
+    matcher = PhraseMatcher([("a", "a", "b")])
+    assert matcher.count("a a a b a a x a a b".split()) == {("a", "a", "b"): 2}
+
+
+def test_ignores_empty_and_duplicate_phrases():
+    matcher = PhraseMatcher([(), ["seo", "tips"], ("seo", "tips")])
+    assert matcher.phrases == [("seo", "tips")]
+    assert matcher.count(["seo", "tips"]) == {("seo", "tips"): 1}
+
+
+def test_reports_unmatched_phrases_as_zero():
+    matcher = PhraseMatcher([("missing", "phrase")])
+    assert matcher.count(iter(["other", "words"])) == {("missing", "phrase"): 0}
@@ -0,0 +1,81 @@
+import json
+import os
+
+import pytest
+
+from tools.result_classifier import BLOG, DENIED, INVALID, OTHER, DomainIndex, ResultClassifier
+
+SEARCH_RESPONSE = os.path.join(os.path.dirname(__file__), "t.json")  # Saved Google response
+
+
+def test_matches_registered_domain_and_subdomains():
+    index = DomainIndex(["hubspot.com"])
+    assert index.match("hubspot.com")
+    assert index.match("www.hubspot.com")
+    assert index.match("blog.hubspot.com")
+    assert not index.match("nothubspot.com")
+    assert not index.match("hubspot.co")
+
+
+def test_path_entries_match_whole_segments():
+    index = DomainIndex(["webflow.com/blog"])
+    assert index.match("webflow.com", "/blog")
+    assert index.match("webflow.com", "/blog/post")
+    assert not index.match("webflow.com", "/blogging")
+    assert not index.match("webflow.com", "/")
+
+
+def test_domain_entry_covers_every_path():
+    index = DomainIndex(["webflow.com/blog", "webflow.com"])
+    assert index.match("webflow.com", "/pricing")
+    assert len(index) == 1
+
+
+def test_entries_are_normalized():
+    index = DomainIndex(["https://www.Medium.com/", "  ", "example.org:8080"])
+    assert len(index) == 2
+    assert index.match("medium.com", "/@user/post")
+    assert index.match("example.org")
+
+
+def test_never_matches_a_bare_tld():
+    index = DomainIndex(["com"])
+    assert not index.match("example.com")
+
+
+@pytest.fixture
+def search_items():
+    with open(SEARCH_RESPONSE) as file:
+        return json.load(file)["items"]
+
+
+def test_classifies_a_saved_search_response(search_items):
+    classifier = ResultClassifier(
+        allow=["smashingmagazine.com"],
+        deny=["reddit.com", "wikipedia.org", "medium.com"],
+        blog_patterns=["/article/"],
+    )
+    labels = dict(zip((item["link"] for item in search_items), classifier.classify(search_items)))
+
+    assert labels["https://www.reddit.com/r/web_design/"] == DENIED
+    assert labels["https://michalmalewicz.medium.com/is-web-design-over-c14fe246125e"] == DENIED
+    assert labels["https://www.smashingmagazine.com/2008/01/10-principles-of-effective-web-design/"] == BLOG
+    assert labels["https://alistapart.com/article/dao/"] == BLOG
+    assert labels["https://www.coursera.org/specializations/web-design"] == OTHER
+
+
+def test_invalid_links():
+    classifier = ResultClassifier()
+    assert classifier.classify([{"link": "ftp://example.com/a"}, {}]) == [INVALID, INVALID]
+
+
+def test_list_files_extend_the_built_in_entries(tmp_path):
+    deny_path = tmp_path / "deny.txt"
+    deny_path.write_text("# Deny list\nexample.com  # spam\n\n")
+    classifier = ResultClassifier(allow=["example.org"], deny_path=str(deny_path))
+    results = [{"link": "https://blog.example.com/post"}, {"link": "https://example.org/post"}]
+    assert classifier.classify(results) == [DENIED, BLOG]
+
+    deny_path.write_text("")
+    classifier.reload()
+    assert classifier.classify(results) == [OTHER, BLOG]
@@ -0,0 +1,141 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from core.singleflight import SingleFlight
+
+
+def run_concurrently(count: int, target) -> tuple:
+    """Starts `count` threads calling `target`; returns (threads, results)."""
+    results = [None] * count
+    threads = [
+        threading.Thread(target=lambda i=i: results.__setitem__(i, target())) for i in range(count)
+    ]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight("test")
+    release = threading.Event()
+    calls = []
+
+    def work():
+        calls.append(1)
+        release.wait(5)
+        return {"value": 42}
+
+    threads, results = run_concurrently(4, lambda: flight.do("key", work))
+    while flight.calls < 4:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert flight.stats()["coalesced"] == 3
+
+
+def test_followers_receive_the_leaders_exception():
+    flight = SingleFlight("test")
+    release = threading.Event()
+    errors = []
+
+    def work():
+        release.wait(5)
+        raise ValueError("boom")
+
+    def call():
+        try:
+            flight.do("key", work)
+        except ValueError as e:
+            errors.append(e)
+
+    threads, _ = run_concurrently(3, call)
+    while flight.calls < 3:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(errors) == 3
+    assert all(error is errors[0] for error in errors)
+
+
+def test_finished_calls_are_not_kept():
+    flight = SingleFlight("test")
+    counter = iter(range(10))
+    assert flight.do("key", lambda: next(counter)) == 0
+    assert flight.do("key", lambda: next(counter)) == 1
+    assert flight.do("other", lambda: next(counter)) == 2
+    assert flight.stats()["coalesced"] == 0
+
+
+def test_async_calls_share_one_task():
+    flight = SingleFlight("test")
+    calls = []
+
+    async def work(value):
+        calls.append(value)
+        await asyncio.sleep(0.01)
+        return value
+
+    async def main():
+        return await asyncio.gather(*(flight.ado("key", work, i) for i in range(5)))
+
+    assert asyncio.run(main()) == [0] * 5
+    assert calls == [0]
+
+
+def test_cancelled_async_caller_does_not_cancel_the_others():
+    flight = SingleFlight("test")
+
+    async def work():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def main():
+        first = asyncio.ensure_future(flight.ado("key", work))
+        second = asyncio.ensure_future(flight.ado("key", work))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(main()) == "done"
+
+
+def test_single_and_multi_post_lookups_do_not_share_results(monkeypatch):
+    from tools import google_search
+
+    release = threading.Event()
+
+    def find_post(keyword):
+        release.wait(5)
+        return {"url": "https://example.com/a"}
+
+    def find_posts(keyword, limit, read_timeout=None):
+        release.wait(5)
+        return [{"url": "https://example.com/a"}]
+
+    monkeypatch.setattr(google_search, "find_top_blog_post", find_post)
+    monkeypatch.setattr(google_search, "find_top_blog_posts", find_posts)
+    results = {}
+    threads = [
+        threading.Thread(target=lambda: results.update(post=google_search.get_top_blog_post("Web design"))),
+        threading.Thread(target=lambda: results.update(posts=google_search.get_top_blog_posts("web design", 1))),
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert isinstance(results["post"], dict)
+    assert isinstance(results["posts"], list)
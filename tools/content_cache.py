@@ -0,0 +1,99 @@
+import hashlib
+import time
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from core.cache import TieredCache
+
+# Scraped article text, keyed by canonical URL and revalidated with ETag/Last-Modified
+ARTICLE_CACHE_TTL = 7 * 24 * 60 * 60  # seconds
+ARTICLE_CACHE_MAX_ENTRIES = 20000
+article_cache = TieredCache(
+    "articles", ttl=ARTICLE_CACHE_TTL, max_entries=ARTICLE_CACHE_MAX_ENTRIES
+)
+
+# Keyword counts, keyed by a hash of the article text (content-addressed, never stale)
+KEYWORD_CACHE_MAX_ENTRIES = 20000
+KEYWORD_CACHE_VERSION = "v3"  # Bump when extraction changes to invalidate old results
+keyword_cache = TieredCache("keywords", max_entries=KEYWORD_CACHE_MAX_ENTRIES)
+
+# Query parameters that never change page content
+TRACKING_PARAMS = frozenset({"fbclid", "gclid", "mc_cid", "mc_eid", "ref", "ref_src"})
+
+
+def canonical_url(url: str) -> str:
+    """
+    Normalizes a URL so trivially different links share one cache entry:
+    lowercases scheme and host, drops default ports, fragments and tracking
+    parameters (utm_*, fbclid, ...), and sorts the remaining query parameters.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and (scheme, parts.port) not in (("http", 80), ("https", 443)):
+        host = f"{host}:{parts.port}"
+
+    query = sorted(
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in TRACKING_PARAMS
+    )
+    return urlunsplit((scheme, host, parts.path or "/", urlencode(query), ""))
+
+
+def text_hash(text: str) -> str:
+    """Returns the content address (SHA-256) of a text."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def page_validators(headers: Optional[dict]) -> dict:
+    """Extracts the ETag/Last-Modified validators from response headers."""
+    headers = {key.lower(): value for key, value in (headers or {}).items()}
+    return {
+        "etag": headers.get("etag"),
+        "last_modified": headers.get("last-modified"),
+    }
+
+
+def get_cached_article(url: str) -> Optional[dict]:
+    """Returns the cached {url, text, etag, last_modified, fetched} entry for a URL."""
+    return article_cache.get(canonical_url(url))
+
+
+def store_article(url: str, text: str, headers: Optional[dict] = None) -> None:
+    """Caches scraped article text together with the page validators."""
+    article_cache.set(
+        canonical_url(url),
+        {"url": url, "text": text, "fetched": time.time(), **page_validators(headers)},
+    )
+
+
+def conditional_headers(cached: Optional[dict]) -> dict:
+    """Builds If-None-Match/If-Modified-Since headers to revalidate a cached article."""
+    if not cached:
+        return {}
+    headers = {}
+    if cached.get("etag"):
+        headers["If-None-Match"] = cached["etag"]
+    if cached.get("last_modified"):
+        headers["If-Modified-Since"] = cached["last_modified"]
+    return headers
+
+
+def is_unchanged(cached: Optional[dict], page: dict) -> bool:
+    """True when a downloaded page is confirmed to match the cached article."""
+    if not cached:
+        return False
+    if page.get("status_code") == 304:
+        return True
+    validators = page_validators(page.get("headers"))
+    if cached.get("etag") and validators["etag"]:
+        return cached["etag"] == validators["etag"]
+    if cached.get("last_modified") and validators["last_modified"]:
+        return cached["last_modified"] == validators["last_modified"]
+    return False
+
+
+def content_cache_stats() -> dict:
+    """Returns hit/miss statistics for the article and keyword caches."""
+    return {"articles": article_cache.stats(), "keywords": keyword_cache.stats()}
@@ -0,0 +1,303 @@
+import atexit
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+import orjson
+
+from core.cache import CACHE_DIR
+
+# Local file the tracker is persisted to, so worker restarts keep their memory
+HEALTH_PATH = os.getenv(
+    "BLOG_AGENT_DOMAIN_HEALTH", os.path.join(CACHE_DIR, "domain_health.json")
+)
+
+# Circuit breaker states
+CLOSED = "closed"  # Healthy, requests go through
+OPEN = "open"  # Failing, requests are skipped until the cooldown expires
+HALF_OPEN = "half_open"  # Cooldown expired, one trial request decides
+
+FAILURE_THRESHOLD = 3  # Consecutive failures that open a domain's circuit
+OPEN_SECONDS = 15 * 60  # First cooldown; doubles every time the circuit re-opens
+MAX_OPEN_SECONDS = 24 * 60 * 60
+TRIAL_TIMEOUT = 60.0  # A half-open trial that never reported back is retried after this
+
+LATENCY_WINDOW = 50  # Recent latency samples kept per domain
+SLOW_LATENCY = 4.0  # Domains with a p90 above this (seconds) are tried last
+
+# Newspaper3k is skipped for a domain once it failed this often without succeeding more
+NEWSPAPER_FAILURE_LIMIT = 3
+
+MAX_DOMAINS = 5000  # Least recently seen domains are dropped beyond this
+SAVE_INTERVAL = 30.0  # Minimum seconds between writes of the health file
+
+
+def domain_of(url: str) -> str:
+    """Returns the host (and non-default port) a URL's health is tracked under."""
+    parts = urlsplit(url.strip().lower())
+    host = (parts.hostname or "").rstrip(".")
+    if host.startswith("www."):
+        host = host[4:]
+    try:
+        port = parts.port
+    except ValueError:  # Out of range or not a number
+        port = None
+    return f"{host}:{port}" if port else host
+
+
+def percentile(samples: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile (q in 0..100) of `samples`, or None if there are none."""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    rank = max(1, round(q / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+class DomainHealth:
+    """Latency samples, failure counts and circuit state of one domain."""
+
+    __slots__ = (
+        "latencies",
+        "successes",
+        "failures",
+        "consecutive_failures",
+        "state",
+        "opened_at",
+        "open_count",
+        "trial_started",
+        "last_error",
+        "last_seen",
+        "newspaper_successes",
+        "newspaper_failures",
+    )
+
+    def __init__(self, **fields):
+        self.latencies: List[float] = []
+        self.successes = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.state = CLOSED
+        self.opened_at = 0.0  # Wall clock, so cooldowns survive restarts
+        self.open_count = 0
+        self.trial_started = 0.0
+        self.last_error: Optional[str] = None
+        self.last_seen = 0.0
+        self.newspaper_successes = 0
+        self.newspaper_failures = 0
+        for name, value in fields.items():
+            if name in self.__slots__:
+                setattr(self, name, value)
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__ if name != "trial_started"}
+
+    def cooldown(self) -> float:
+        return min(MAX_OPEN_SECONDS, OPEN_SECONDS * 2 ** max(0, self.open_count - 1))
+
+
+class HealthTracker:
+    """
+    Per-domain health tracker with a circuit breaker.
+
+    Probes and scrapes report each request's outcome and latency. After
+    FAILURE_THRESHOLD consecutive failures (timeouts, connection errors,
+    4xx/5xx answers, unextractable pages) a domain's circuit opens and its
+    candidates are skipped. Once the cooldown expires one trial request is
+    let through: success closes the circuit, failure re-opens it with a
+    doubled cooldown. Healthy but slow domains are tried after faster ones.
+
+    The tracker is loaded from `path` on first use and written back at most
+    every SAVE_INTERVAL seconds and at exit (registered on first use, so
+    importing the module has no side effects).
+    """
+
+    def __init__(self, path: Optional[str] = HEALTH_PATH):
+        self.path = path
+        self._domains: Optional[Dict[str, DomainHealth]] = None
+        self._dirty = False
+        self._saved = 0.0
+        self._lock = threading.Lock()
+
+    # --------------- PERSISTENCE ---------------
+    def _entries(self) -> Dict[str, DomainHealth]:
+        """Returns the domain table, loading it on first use (caller holds the lock)."""
+        if self._domains is None:
+            self._domains = {}
+            if self.path:
+                atexit.register(self.save)
+            if self.path and os.path.exists(self.path):
+                try:
+                    with open(self.path, "rb") as file:
+                        data = orjson.loads(file.read())
+                    self._domains = {
+                        domain: DomainHealth(**fields) for domain, fields in data.items()
+                    }
+                except (OSError, orjson.JSONDecodeError) as e:
+                    print(f"Ignoring unreadable domain health file {self.path}: {e}")
+            self._saved = time.monotonic()
+        return self._domains
+
+    def save(self) -> None:
+        """Writes the tracker to its file (atomically, via a temporary file)."""
+        if not self.path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            domains = self._entries()
+            if len(domains) > MAX_DOMAINS:
+                recent = sorted(domains, key=lambda d: domains[d].last_seen, reverse=True)
+                for domain in recent[MAX_DOMAINS:]:
+                    del domains[domain]
+            payload = orjson.dumps({domain: h.to_dict() for domain, h in domains.items()})
+            self._dirty = False
+            self._saved = time.monotonic()
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        temporary = f"{self.path}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as file:
+            file.write(payload)
+        os.replace(temporary, self.path)
+
+    def _changed(self) -> bool:
+        """Marks the table dirty; True when it is time to save (caller holds the lock)."""
+        self._dirty = True
+        return time.monotonic() - self._saved > SAVE_INTERVAL
+
+    def _health(self, url: str) -> DomainHealth:
+        domain = domain_of(url)
+        domains = self._entries()
+        health = domains.get(domain)
+        if health is None:
+            health = domains[domain] = DomainHealth()
+        health.last_seen = time.time()
+        return health
+
+    # --------------- RECORDING ---------------
+    def record_success(self, url: str, latency: float) -> None:
+        """Records a successful request to the URL's domain; closes its circuit."""
+        with self._lock:
+            health = self._health(url)
+            health.latencies = (health.latencies + [round(latency, 4)])[-LATENCY_WINDOW:]
+            health.successes += 1
+            health.consecutive_failures = 0
+            if health.state != CLOSED:
+                print(f"Circuit closed for {domain_of(url)}")
+            health.state = CLOSED
+            health.open_count = 0
+            due = self._changed()
+        if due:
+            self.save()
+
+    def record_failure(self, url: str, reason: str, latency: Optional[float] = None) -> None:
+        """Records a failed request (timeout, error, 4xx/5xx, no content) to the URL's domain."""
+        with self._lock:
+            health = self._health(url)
+            if latency is not None:
+                health.latencies = (health.latencies + [round(latency, 4)])[-LATENCY_WINDOW:]
+            health.failures += 1
+            health.consecutive_failures += 1
+            health.last_error = reason
+            if health.state == HALF_OPEN or (
+                health.state == CLOSED and health.consecutive_failures >= FAILURE_THRESHOLD
+            ):
+                health.state = OPEN
+                health.opened_at = time.time()
+                health.open_count += 1
+                print(
+                    f"Circuit opened for {domain_of(url)} for {health.cooldown():.0f}s "
+                    f"after {health.consecutive_failures} failures ({reason})"
+                )
+            due = self._changed()
+        if due:
+            self.save()
+
+    def record_newspaper(self, url: str, ok: bool) -> None:
+        """Records whether Newspaper3k could parse a page of the URL's domain."""
+        with self._lock:
+            health = self._health(url)
+            if ok:
+                health.newspaper_successes += 1
+            else:
+                health.newspaper_failures += 1
+            self._dirty = True
+
+    # --------------- QUERIES ---------------
+    def allow(self, url: str) -> bool:
+        """
+        True if a request to the URL's domain should be attempted. An open circuit
+        whose cooldown expired lets exactly one trial request through.
+        """
+        with self._lock:
+            health = self._entries().get(domain_of(url))
+            if health is None or health.state == CLOSED:
+                return True
+            now = time.time()
+            if health.state == OPEN:
+                if now - health.opened_at < health.cooldown():
+                    return False
+                health.state = HALF_OPEN
+            elif now - health.trial_started < TRIAL_TIMEOUT:
+                return False  # Another trial request is in flight
+            health.trial_started = now
+            return True
+
+    def is_slow(self, url: str) -> bool:
+        with self._lock:
+            health = self._entries().get(domain_of(url))
+            p90 = percentile(health.latencies, 90) if health else None
+        return p90 is not None and p90 > SLOW_LATENCY
+
+    def use_newspaper(self, url: str) -> bool:
+        """False once Newspaper3k keeps failing on the URL's domain."""
+        with self._lock:
+            health = self._entries().get(domain_of(url))
+            return health is None or not (
+                health.newspaper_failures >= NEWSPAPER_FAILURE_LIMIT
+                and health.newspaper_failures > health.newspaper_successes
+            )
+
+    def rank(self, urls: List[str]) -> List[str]:
+        """
+        Orders candidate URLs for probing: domains with an open circuit are
+        skipped, slow domains move behind the others, rank order is kept otherwise.
+        If every candidate's circuit is open they are returned unchanged.
+        """
+        allowed = [url for url in urls if self.allow(url)]
+        if not allowed:
+            if urls:
+                print("Every candidate domain has an open circuit; probing them anyway")
+            return list(urls)
+        slow = [url for url in allowed if self.is_slow(url)]
+        return [url for url in allowed if url not in slow] + slow
+
+    def stats(self, url_or_domain: str) -> Optional[dict]:
+        """Returns the latency percentiles, counts and circuit state of one domain."""
+        domain = domain_of(url_or_domain if "//" in url_or_domain else f"//{url_or_domain}")
+        with self._lock:
+            health = self._entries().get(domain)
+            if health is None:
+                return None
+            return {
+                "state": health.state,
+                "successes": health.successes,
+                "failures": health.failures,
+                "consecutive_failures": health.consecutive_failures,
+                "last_error": health.last_error,
+                "p50": percentile(health.latencies, 50),
+                "p90": percentile(health.latencies, 90),
+                "p99": percentile(health.latencies, 99),
+                "newspaper_failures": health.newspaper_failures,
+            }
+
+    def reset(self) -> None:
+        """Forgets every domain (the file is rewritten on the next save)."""
+        with self._lock:
+            self._entries().clear()
+            self._dirty = True
+
+
+domain_health = HealthTracker()
@@ -1,15 +1,35 @@
-import requests
+import asyncio
+import contextvars
+import httpx
 import os
-from typing import Optional
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Optional
+from urllib.parse import urlparse
 import json
 
-# Load saved Google Search API response (for testing)
-with open("./tests/t.json", "r") as file:
-    google_response = json.load(file)
+from core.cache import DiskCache
+from core.singleflight import SingleFlight
+from tools import http_client
+from tools.content_cache import conditional_headers, get_cached_article
+from tools.domain_health import domain_health
+from tools.result_classifier import BLOG, ResultClassifier
 
 # Set up API keys (store in environment variables for security)
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 GOOGLE_CSE_ID = os.getenv("GOOGLE_CSE_ID")
+SEARCH_ENDPOINT = os.getenv(
+    "GOOGLE_SEARCH_ENDPOINT", "https://www.googleapis.com/customsearch/v1"
+)  # Overridable for local stand-ins (benchmarks)
+
+# Search response cache (repeat topics make up most of the traffic)
+SEARCH_CACHE_TTL = 24 * 60 * 60  # seconds
+SEARCH_CACHE_MAX_ENTRIES = 5000
+search_cache = DiskCache(
+    "google_search", ttl=SEARCH_CACHE_TTL, max_entries=SEARCH_CACHE_MAX_ENTRIES
+)
 
 # Define filters
 BLACKLISTED_DOMAINS = [
@@ -86,61 +106,531 @@ WHITELISTED_DOMAINS = [
     "grammarly.com/blog",
 ]
 
+# Optional external allow/deny lists (one domain or domain/path per line), reloaded when changed
+ALLOWLIST_PATH = os.getenv("BLOG_AGENT_ALLOWLIST")
+DENYLIST_PATH = os.getenv("BLOG_AGENT_DENYLIST")
+result_classifier = ResultClassifier(
+    allow=WHITELISTED_DOMAINS,
+    deny=BLACKLISTED_DOMAINS,
+    blog_patterns=BLOG_PATTERNS,
+    allow_path=ALLOWLIST_PATH,
+    deny_path=DENYLIST_PATH,
+)
+
+# Candidate validation settings
+VALIDATION_DEADLINE = 8.0  # Overall budget (seconds) for validating all candidates
+VALIDATION_TIMEOUT = 5.0  # Upper bound for a single probe
+VALIDATION_MAX_WORKERS = 10
+VALIDATION_PER_HOST_LIMIT = 2  # Concurrent probes allowed against one host
+PAGE_READ_TIMEOUT = 20.0  # Seconds a validated page's body may take to download
+
 
-def is_valid_url(url):
+def is_valid_url(url, timeout: float = VALIDATION_TIMEOUT):
     """Checks if the URL is reachable and valid."""
     try:
-        response = requests.head(url, allow_redirects=True, timeout=5)
+        response = http_client.head(
+            url, follow_redirects=True, timeout=timeout, retries=0
+        )
         return response.status_code < 400
-    except requests.RequestException:
+    except Exception:  # Invalid URLs (bad port, control characters) aren't httpx.HTTPError
         return False
 
 
+def probe_page(url, timeout: float = VALIDATION_TIMEOUT) -> Optional[httpx.Response]:
+    """
+    Validates the URL from the status and headers of a streamed GET, without
+    reading the body. Pages already in the article cache are revalidated with a
+    conditional GET; a 304 Not Modified answer counts as valid.
+
+    Returns:
+        - httpx.Response: The open response if the URL is reachable (finish it with
+          `read_probed_page` or `http_client.close_page`), else None.
+    """
+    started = time.perf_counter()
+    try:
+        response = http_client.open_page(
+            url, timeout=timeout, headers=conditional_headers(get_cached_article(url))
+        )
+    except Exception as e:  # Any failure of a single probe means "unreachable"
+        record_probe_error(url, e, time.perf_counter() - started, timeout)
+        return None
+    if not record_probe(url, response.status_code, time.perf_counter() - started):
+        http_client.close_page(response)
+        return None
+    return response
+
+
+def read_probed_page(
+    url: str, response: httpx.Response, timeout: Optional[float] = None
+) -> Optional[dict]:
+    """
+    Downloads the body of a `probe_page` response, giving up after `timeout`
+    seconds. The page buffer is handed to the scraper, so validation and
+    extraction share one download.
+    """
+    deadline = time.monotonic() + timeout if timeout is not None else None
+    try:
+        return http_client.read_page(url, response, deadline=deadline)
+    except Exception as e:
+        print(f"Failed to read validated page {url}: {e}")
+        domain_health.record_failure(url, type(e).__name__)
+        return None
+
+
+def fetch_valid_page(url, timeout: float = VALIDATION_TIMEOUT) -> Optional[dict]:
+    """Validates the URL and returns the downloaded page if reachable."""
+    response = probe_page(url, timeout)
+    return read_probed_page(url, response) if response is not None else None
+
+
+def record_probe(url: str, status_code: int, latency: float) -> bool:
+    """Reports a probe's answer to the domain health tracker; True if it is valid."""
+    if status_code >= 400:
+        domain_health.record_failure(url, f"HTTP {status_code}", latency)
+        return False
+    domain_health.record_success(url, latency)
+    return True
+
+
+def record_probe_error(url: str, error: Exception, latency: float, timeout: float) -> None:
+    """Reports a failed probe to the domain health tracker."""
+    if isinstance(error, httpx.TimeoutException) and timeout < VALIDATION_TIMEOUT:
+        return  # Cut short by the validation deadline; says nothing about the host
+    domain_health.record_failure(url, type(error).__name__, latency)
+
+
+def filter_candidates(items: List[dict]) -> List[str]:
+    """
+    Applies the blog filters to raw search results.
+
+    Domains whose circuit is open (repeated timeouts or errors) are skipped and
+    slow domains are moved behind the others, see `HealthTracker.rank`.
+
+    Returns:
+        - List[str]: Candidate URLs that look like blog posts, in search rank order.
+    """
+    candidates = []
+    for result, label in zip(items, result_classifier.classify(items)):
+        url = result.get("link", "").lower()  # Ensure case insensitivity
+        if label == BLOG and url not in candidates:
+            candidates.append(url)
+    return domain_health.rank(candidates)
+
+
+def select_confirmed(
+    results: list, limit: int, require_resolved: bool
+) -> Optional[list]:
+    """
+    Picks the `limit` best-ranked confirmed candidates from probe results
+    (None = still running, False = unreachable, (url, response) = reachable).
+
+    With `require_resolved`, returns None while the selection could still change,
+    i.e. until `limit` pages are confirmed with every better-ranked probe resolved,
+    or every probe has resolved.
+    """
+    confirmed = []
+    for page in results:
+        if page is None and require_resolved:
+            return None  # A better-ranked probe is still running
+        if page:
+            confirmed.append(page)
+            if len(confirmed) == limit:
+                break
+    return confirmed
+
+
+def read_winners(winners: list, timeout: float) -> List[dict]:
+    """Downloads the selected probes' bodies concurrently, each within `timeout` seconds."""
+    if len(winners) == 1:
+        pages = [read_probed_page(*winners[0], timeout)]
+    else:
+        with ThreadPoolExecutor(max_workers=len(winners)) as executor:
+            futures = [
+                executor.submit(
+                    contextvars.copy_context().run, read_probed_page, url, response, timeout
+                )
+                for url, response in winners
+            ]
+            pages = [future.result() for future in futures]
+    return [page for page in pages if page]
+
+
+def release_probe(future, winners: list) -> None:
+    """Closes a finished probe's open response unless it was selected."""
+    if future.cancelled() or future.exception() is not None:
+        return
+    result = future.result()
+    if result and result not in winners:
+        http_client.close_page(result[1])
+
+
+def validate_top_candidates(
+    urls: List[str],
+    limit: int = 1,
+    deadline: float = VALIDATION_DEADLINE,
+    per_host_limit: int = VALIDATION_PER_HOST_LIMIT,
+    max_workers: int = VALIDATION_MAX_WORKERS,
+    read_timeout: float = PAGE_READ_TIMEOUT,
+) -> List[dict]:
+    """
+    Probes all candidate URLs concurrently and returns the `limit` highest-ranked reachable pages.
+
+    Probes only wait for each response's status and headers (see `probe_page`).
+    The result is final as soon as `limit` candidates are confirmed and every
+    better-ranked candidate has resolved; outstanding probes are then cancelled,
+    the other responses are closed unread, and only the winners' bodies are
+    downloaded (concurrently). When the deadline expires, the candidates
+    confirmed so far are returned.
+
+    Parameters:
+        - urls (List[str]): Candidate URLs in rank order (best first).
+        - limit (int): How many reachable pages to return.
+        - deadline (float): Overall time budget in seconds for the whole sweep.
+        - per_host_limit (int): Maximum concurrent probes against a single host.
+        - max_workers (int): Size of the probe thread pool.
+        - read_timeout (float): Seconds each winner's body may take to download.
+
+    Returns:
+        - List[dict]: Fetched pages (see `http_client.fetch_page`) in rank order.
+    """
+    if not urls or limit < 1:
+        return []
+
+    started = time.monotonic()
+    cancelled = threading.Event()
+    host_slots = defaultdict(lambda: threading.BoundedSemaphore(per_host_limit))
+    for url in urls:
+        host_slots[urlparse(url).netloc]  # Create semaphores before workers start
+
+    def probe(url: str):
+        with host_slots[urlparse(url).netloc]:
+            remaining = deadline - (time.monotonic() - started)
+            if cancelled.is_set() or remaining <= 0:
+                return False
+            response = probe_page(url, timeout=min(VALIDATION_TIMEOUT, remaining))
+            return (url, response) if response is not None else False
+
+    # None = still running, False = unreachable, (url, response) = reachable
+    results: list = [None] * len(urls)
+    winners: list = []
+
+    executor = ThreadPoolExecutor(max_workers=min(max_workers, len(urls)))
+    # Each probe runs in a copy of the caller's context so its downloads are
+    # attributed to the calling workflow node
+    futures = {
+        executor.submit(contextvars.copy_context().run, probe, url): rank
+        for rank, url in enumerate(urls)
+    }
+    try:
+        for future in as_completed(futures, timeout=deadline):
+            results[futures[future]] = future.result()
+            selected = select_confirmed(results, limit, require_resolved=True)
+            if selected is not None:
+                winners = selected
+                break
+        else:
+            winners = select_confirmed(results, limit, require_resolved=False)
+    except TimeoutError:
+        print(f"Candidate validation hit the {deadline}s deadline")
+        winners = select_confirmed(results, limit, require_resolved=False)
+    finally:
+        cancelled.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+        for future in futures:  # Probes still running close theirs when they finish
+            future.add_done_callback(lambda done: release_probe(done, winners))
+
+    return read_winners(winners, read_timeout)
+
+
+def validate_candidates(urls: List[str], **kwargs) -> Optional[dict]:
+    """
+    Returns the highest-ranked reachable page among the candidates, or None.
+    See `validate_top_candidates` for the keyword arguments.
+    """
+    pages = validate_top_candidates(urls, limit=1, **kwargs)
+    return pages[0] if pages else None
+
+
+def normalize_query(keyword: str) -> str:
+    """Normalizes a search query so equivalent topics share one cache entry."""
+    return " ".join(keyword.lower().split())
+
+
+def compact_search_response(data: dict) -> dict:
+    """Keeps only the result fields the blog filters read."""
+    items = []
+    for result in data.get("items", []):
+        meta_tags = result.get("pagemap", {}).get("metatags", [{}])[0]
+        items.append(
+            {
+                "link": result.get("link", ""),
+                "displayLink": result.get("displayLink", ""),
+                "pagemap": {"metatags": [{"og:type": meta_tags.get("og:type", "")}]},
+            }
+        )
+    return {"items": items}
+
+
+def search_google(keyword: str, num: int = 10) -> dict:
+    """
+    Calls the Custom Search API, serving repeat queries from the local cache.
+
+    Returns:
+        - dict: The (compacted) search response with an "items" list.
+    """
+    query = normalize_query(keyword)
+    cache_key = f"{GOOGLE_CSE_ID}:{num}:{query}"
+
+    cached = search_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    response = http_client.get(SEARCH_ENDPOINT, params=search_params(query, num))
+    data = response.json()
+
+    # Only cache successful responses; quota errors and outages should be retried
+    if response.status_code == 200 and "error" not in data:
+        data = compact_search_response(data)
+        search_cache.set(cache_key, data)
+
+    return data
+
+
+def search_params(query: str, num: int) -> dict:
+    """Builds the Custom Search API query parameters."""
+    return {"q": query, "key": GOOGLE_API_KEY, "cx": GOOGLE_CSE_ID, "num": num}
+
+
+def search_cache_stats() -> dict:
+    """Returns hit/miss statistics for the search response cache."""
+    return search_cache.stats()
+
+
+# Concurrent runs on the same (normalized) topic share one search and validation.
+# Keys are ("post", query) or ("posts", query, limit, read_timeout): the two lookups
+# return different shapes.
+search_flight = SingleFlight("top_blog_posts")
+
+
 def get_top_blog_post(keyword: str = "Web Design") -> Optional[dict]:
     """
-    Searches Google for the given keyword and returns the first valid blog post.
+    Searches Google for the given keyword and returns the highest-ranked valid blog post.
+
+    Concurrent calls for the same normalized keyword share one in-flight lookup.
     """
+    return search_flight.do(("post", normalize_query(keyword)), find_top_blog_post, keyword)
+
+
+def find_top_blog_post(keyword: str) -> Optional[dict]:
+    """Uncoalesced `get_top_blog_post`."""
     # Uncomment this for live API requests
-    search_url = f"https://www.googleapis.com/customsearch/v1?q={keyword}&key={GOOGLE_API_KEY}&cx={GOOGLE_CSE_ID}&num=10"
-    response = requests.get(search_url)
-    data = response.json()
+    data = search_google(keyword)
 
     # Use local JSON file (for testing)
-    # data = google_response
+    # data = load_saved_response()
 
     if not data.get("items"):  # Ensures "items" exists and is not empty
         return None
 
-    for result in data["items"]:
-        url = result.get("link", "").lower()  # Ensure case insensitivity
-        domain = result.get("displayLink", "").lower()
+    page = validate_candidates(filter_candidates(data["items"]))
+    if page:
+        return {
+            "url": page["url"],
+            "page": page,  # Downloaded body, final URL and headers
+        }
+
+    return None  # No blog post found
 
-        # Skip blacklisted domains
-        if any(blacklisted in url for blacklisted in BLACKLISTED_DOMAINS):
-            continue
 
-        # Skip results without a valid link
-        if len(url) < 10 or not url.startswith("http"):
-            continue
+def get_top_blog_posts(
+    keyword: str = "Web Design", limit: int = 3, read_timeout: float = PAGE_READ_TIMEOUT
+) -> List[dict]:
+    """
+    Searches Google for the given keyword and returns up to `limit` valid blog posts,
+    best-ranked first, each with the page downloaded during validation (within
+    `read_timeout` seconds per page).
+    """
+    return search_flight.do(
+        ("posts", normalize_query(keyword), limit, read_timeout),
+        find_top_blog_posts,
+        keyword,
+        limit,
+        read_timeout,
+    )
+
+
+def find_top_blog_posts(
+    keyword: str, limit: int, read_timeout: float = PAGE_READ_TIMEOUT
+) -> List[dict]:
+    """Uncoalesced `get_top_blog_posts`."""
+    data = search_google(keyword)
 
-        # Check if it's a blog post (by URL pattern or whitelisted domain)
-        is_blog_post = (
-            any(pattern in url for pattern in BLOG_PATTERNS)
-            or domain in WHITELISTED_DOMAINS
+    if not data.get("items"):
+        return []
+
+    pages = validate_top_candidates(
+        filter_candidates(data["items"]), limit=limit, read_timeout=read_timeout
+    )
+    return [{"url": page["url"], "page": page} for page in pages]
+
+
+# --------------- ASYNC API ---------------
+async def aprobe_page(url, timeout: float = VALIDATION_TIMEOUT) -> Optional[httpx.Response]:
+    """Async version of `probe_page`."""
+    started = time.perf_counter()
+    try:
+        cached = await asyncio.to_thread(get_cached_article, url)
+        response = await http_client.aopen_page(
+            url, timeout=timeout, headers=conditional_headers(cached)
         )
+    except Exception as e:  # Any failure of a single probe means "unreachable"
+        record_probe_error(url, e, time.perf_counter() - started, timeout)
+        return None
+    if not record_probe(url, response.status_code, time.perf_counter() - started):
+        await http_client.aclose_page(response)
+        return None
+    return response
 
-        # Try to use Open Graph metadata if available
-        meta_tags = result.get("pagemap", {}).get("metatags", [{}])[0]
-        is_article = meta_tags.get("og:type", "").lower() == "article"
 
-        # Final validation before returning
-        if (is_blog_post or is_article) and is_valid_url(url):
-            return {
-                "url": url,
-            }
+async def aread_probed_page(
+    url: str, response: httpx.Response, timeout: Optional[float] = None
+) -> Optional[dict]:
+    """Async version of `read_probed_page`."""
+    try:
+        return await asyncio.wait_for(http_client.aread_page(url, response), timeout)
+    except Exception as e:
+        print(f"Failed to read validated page {url}: {e}")
+        domain_health.record_failure(url, type(e).__name__)
+        return None
 
-    return None  # No blog post found
+
+async def afetch_valid_page(url, timeout: float = VALIDATION_TIMEOUT) -> Optional[dict]:
+    """Async version of `fetch_valid_page`."""
+    response = await aprobe_page(url, timeout)
+    return await aread_probed_page(url, response) if response is not None else None
+
+
+async def avalidate_top_candidates(
+    urls: List[str],
+    limit: int = 1,
+    deadline: float = VALIDATION_DEADLINE,
+    per_host_limit: int = VALIDATION_PER_HOST_LIMIT,
+    read_timeout: float = PAGE_READ_TIMEOUT,
+) -> List[dict]:
+    """Async version of `validate_top_candidates`, running one task per candidate."""
+    if not urls or limit < 1:
+        return []
+
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    host_slots = {
+        urlparse(url).netloc: asyncio.Semaphore(per_host_limit) for url in urls
+    }
+
+    async def probe(url: str):
+        async with host_slots[urlparse(url).netloc]:
+            remaining = deadline - (loop.time() - started)
+            if remaining <= 0:
+                return False
+            response = await aprobe_page(
+                url, timeout=min(VALIDATION_TIMEOUT, remaining)
+            )
+            return (url, response) if response is not None else False
+
+    results: list = [None] * len(urls)
+    winners = None
+    tasks = {asyncio.create_task(probe(url)): rank for rank, url in enumerate(urls)}
+    pending = set(tasks)
+    try:
+        while pending:
+            remaining = deadline - (loop.time() - started)
+            if remaining <= 0:
+                print(f"Candidate validation hit the {deadline}s deadline")
+                break
+            done, pending = await asyncio.wait(
+                pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                results[tasks[task]] = task.result()
+            winners = select_confirmed(results, limit, require_resolved=True)
+            if winners is not None:
+                break
+        if winners is None:
+            winners = select_confirmed(results, limit, require_resolved=False)
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+            elif not task.cancelled() and task.exception() is None:
+                result = task.result()
+                if result and result not in (winners or []):
+                    await http_client.aclose_page(result[1])
+
+    pages = await asyncio.gather(
+        *(aread_probed_page(url, response, read_timeout) for url, response in winners)
+    )
+    return [page for page in pages if page]
+
+
+async def asearch_google(keyword: str, num: int = 10) -> dict:
+    """Async version of `search_google`."""
+    query = normalize_query(keyword)
+    cache_key = f"{GOOGLE_CSE_ID}:{num}:{query}"
+
+    cached = await asyncio.to_thread(search_cache.get, cache_key)
+    if cached is not None:
+        return cached
+
+    response = await http_client.aget(SEARCH_ENDPOINT, params=search_params(query, num))
+    data = response.json()
+
+    if response.status_code == 200 and "error" not in data:
+        data = compact_search_response(data)
+        await asyncio.to_thread(search_cache.set, cache_key, data)
+
+    return data
+
+
+async def aget_top_blog_post(keyword: str = "Web Design") -> Optional[dict]:
+    """Async version of `get_top_blog_post`."""
+    posts = await aget_top_blog_posts(keyword, limit=1)
+    return posts[0] if posts else None
+
+
+async def aget_top_blog_posts(
+    keyword: str = "Web Design", limit: int = 3, read_timeout: float = PAGE_READ_TIMEOUT
+) -> List[dict]:
+    """Async version of `get_top_blog_posts`."""
+    return await search_flight.ado(
+        ("posts", normalize_query(keyword), limit, read_timeout),
+        afind_top_blog_posts,
+        keyword,
+        limit,
+        read_timeout,
+    )
+
+
+async def afind_top_blog_posts(
+    keyword: str, limit: int, read_timeout: float = PAGE_READ_TIMEOUT
+) -> List[dict]:
+    """Async version of `find_top_blog_posts`."""
+    data = await asearch_google(keyword)
+
+    if not data.get("items"):
+        return []
+
+    pages = await avalidate_top_candidates(
+        filter_candidates(data["items"]), limit=limit, read_timeout=read_timeout
+    )
+    return [{"url": page["url"], "page": page} for page in pages]
+
+
+def load_saved_response(path: str = "./tests/t.json") -> dict:
+    """Loads the saved Google Search API response (for testing without quota)."""
+    with open(path, "r") as file:
+        return json.load(file)
 
 
 # Test it
-print(get_top_blog_post("web design"))
+if __name__ == "__main__":
+    print(get_top_blog_post("web design"))
@@ -0,0 +1,147 @@
+from typing import Iterator, Optional
+
+from lxml import etree
+from lxml import html as lxml_html
+
+# Boilerplate removed before scoring (ads, scripts, sidebars, menus)
+PRUNED_TAGS = ("script", "style", "nav", "aside", "footer")
+
+# Elements whose text is counted towards their ancestors' content score
+PARAGRAPH_TAGS = ("p", "pre", "blockquote", "li", "td", "h2", "h3", "h4")
+
+# Elements that start a new line when streaming text out
+BLOCK_TAGS = frozenset(
+    {
+        "address", "article", "blockquote", "br", "dd", "div", "dl", "dt",
+        "figcaption", "figure", "h1", "h2", "h3", "h4", "h5", "h6", "header",
+        "hr", "li", "main", "ol", "p", "pre", "section", "table", "td", "th",
+        "tr", "ul",
+    }
+)
+
+MIN_PARAGRAPH_LENGTH = 25  # Shorter blocks (buttons, captions) carry no signal
+
+MAX_TEXT_CHARS = 1_000_000  # Extracted article text is cut after this many characters
+
+_parser = lxml_html.HTMLParser(remove_comments=True, remove_pis=True)
+
+
+def parse_html(html: str) -> Optional[etree._Element]:
+    """Parses an HTML buffer with lxml and prunes boilerplate elements in one pass."""
+    if not html or not html.strip():
+        return None
+
+    try:
+        root = lxml_html.fromstring(html, parser=_parser)
+    except ValueError:
+        # lxml refuses str input carrying an XML encoding declaration
+        root = lxml_html.fromstring(html.encode("utf-8"), parser=_parser)
+    except etree.ParserError:
+        return None
+
+    etree.strip_elements(root, *PRUNED_TAGS, with_tail=False)
+    return root
+
+
+def link_density(element: etree._Element) -> float:
+    """Returns the share of an element's text that sits inside links."""
+    text_length = len(element.text_content())
+    if not text_length:
+        return 1.0
+    link_length = sum(len(link.text_content()) for link in element.iter("a"))
+    return link_length / text_length
+
+
+def find_main_content(root: etree._Element) -> etree._Element:
+    """
+    Picks the element that holds the article body using text-density scoring.
+
+    Every paragraph-like block adds its text length to its parent and half of it
+    to its grandparent; the best candidate is then penalized by its link density.
+    Falls back to <article>, <main> or <body> when no block scores.
+    """
+    scores = {}
+    for block in root.iter(*PARAGRAPH_TAGS):
+        length = len(block.text_content().strip())
+        if length < MIN_PARAGRAPH_LENGTH:
+            continue
+        parent = block.getparent()
+        if parent is None:
+            continue
+        scores[parent] = scores.get(parent, 0.0) + length
+        grandparent = parent.getparent()
+        if grandparent is not None:
+            scores[grandparent] = scores.get(grandparent, 0.0) + length / 2
+
+    if scores:
+        top_candidates = sorted(scores, key=scores.get, reverse=True)[:5]
+        return max(
+            top_candidates,
+            key=lambda element: scores[element] * (1 - link_density(element)),
+        )
+
+    for tag in ("article", "main", "body"):
+        element = root.find(f".//{tag}")
+        if element is not None:
+            return element
+    return root
+
+
+def iter_text_lines(element: etree._Element) -> Iterator[str]:
+    """Streams whitespace-normalized text lines out of an element, split at block tags."""
+    buffer = []
+
+    def flush() -> str:
+        line = " ".join("".join(buffer).split())
+        buffer.clear()
+        return line
+
+    for event, node in etree.iterwalk(element, events=("start", "end")):
+        is_block = isinstance(node.tag, str) and node.tag in BLOCK_TAGS
+
+        if event == "start":
+            if is_block and buffer:
+                line = flush()
+                if line:
+                    yield line
+            if node.text:
+                buffer.append(node.text)
+            continue
+
+        if is_block and buffer:
+            line = flush()
+            if line:
+                yield line
+        if node is not element and node.tail:
+            buffer.append(node.tail)
+
+    line = flush()
+    if line:
+        yield line
+
+
+def iter_main_text(html: str) -> Iterator[str]:
+    """Parses a page and streams the text lines of its main content block."""
+    root = parse_html(html)
+    if root is None:
+        return
+    yield from iter_text_lines(find_main_content(root))
+
+
+def extract_main_text(html: str, max_chars: Optional[int] = MAX_TEXT_CHARS) -> Optional[str]:
+    """
+    Extracts the main content text of a page, one block per line.
+
+    Lines are streamed out of the tree and collection stops once `max_chars`
+    is reached, so giant pages never build their full text.
+    """
+    lines, size = [], 0
+    for line in iter_main_text(html):
+        lines.append(line)
+        size += len(line) + 1
+        if max_chars is not None and size >= max_chars:
+            break
+    text = "\n".join(lines)
+    if max_chars is not None:
+        text = text[:max_chars]
+    return text or None
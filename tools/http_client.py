@@ -0,0 +1,414 @@
+import asyncio
+import importlib.util
+import sys
+import threading
+import time
+from typing import Optional
+from urllib.parse import urlparse
+import weakref
+
+import httpx
+
+from core.instrumentation import record_network
+
+# Connection pool settings shared by every tool
+HTTP_TIMEOUT = httpx.Timeout(10.0, connect=5.0)
+HTTP_MAX_CONNECTIONS = 100
+HTTP_MAX_KEEPALIVE_CONNECTIONS = 20
+HTTP_KEEPALIVE_EXPIRY = 30.0  # seconds an idle connection stays open
+HTTP_PER_HOST_LIMIT = 6  # Concurrent requests allowed against one host
+
+# Retry settings (exponential backoff: backoff, 2 * backoff, 4 * backoff, ...)
+HTTP_RETRIES = 2
+HTTP_BACKOFF = 0.5  # seconds
+HTTP_MAX_BACKOFF = 8.0  # seconds
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+DEFAULT_HEADERS = {"User-Agent": "Mozilla/5.0"}
+
+# Pages are read up to this many (decoded) bytes; the rest is dropped (None = unlimited)
+MAX_PAGE_BYTES = 5 * 1024 * 1024
+
+# HTTP/2 needs the optional `h2` package; fall back to HTTP/1.1 without it
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+_client: Optional[httpx.Client] = None
+_client_lock = threading.Lock()
+# Per-host semaphores only live while a request holds them, so idle hosts cost nothing
+_host_slots = weakref.WeakValueDictionary()  # host -> threading.BoundedSemaphore
+_host_slots_lock = threading.Lock()
+
+# Async clients and host semaphores are bound to the event loop that created them
+_async_clients = weakref.WeakKeyDictionary()  # loop -> httpx.AsyncClient
+_async_host_slots = weakref.WeakKeyDictionary()  # loop -> {host: asyncio.Semaphore} (weak values)
+
+
+def _client_options() -> dict:
+    return {
+        "http2": HTTP2_AVAILABLE,
+        "timeout": HTTP_TIMEOUT,
+        "headers": DEFAULT_HEADERS,
+        "limits": httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        ),
+    }
+
+
+def get_client() -> httpx.Client:
+    """Returns the process-wide pooled HTTP client, creating it on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = httpx.Client(**_client_options())
+    return _client
+
+
+def close_client() -> None:
+    """Closes the shared client and its pooled connections."""
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+
+
+def _host_slot(url: str) -> threading.BoundedSemaphore:
+    host = urlparse(url).netloc
+    with _host_slots_lock:
+        slot = _host_slots.get(host)
+        if slot is None:
+            slot = _host_slots[host] = threading.BoundedSemaphore(HTTP_PER_HOST_LIMIT)
+        return slot
+
+
+def backoff_delay(attempt: int, response: Optional[httpx.Response] = None) -> float:
+    """Returns how long to wait before retry `attempt`, honouring Retry-After."""
+    if response is not None:
+        retry_after = response.headers.get("Retry-After", "")
+        if retry_after.isdigit():
+            return min(float(retry_after), HTTP_MAX_BACKOFF)
+    return min(HTTP_BACKOFF * (2**attempt), HTTP_MAX_BACKOFF)
+
+
+def time_left(deadline: float, request: Optional[httpx.Request] = None) -> float:
+    """
+    Returns the seconds left until `deadline` (a `time.monotonic()` value).
+
+    Raises:
+        - httpx.TimeoutException: When the deadline has passed.
+    """
+    left = deadline - time.monotonic()
+    if left <= 0:
+        raise httpx.TimeoutException("Deadline exceeded", request=request)
+    return left
+
+
+def capped_response(response: httpx.Response, chunks: list, max_bytes: int) -> httpx.Response:
+    """
+    Rebuilds a streamed response from the body chunks read so far, cut at `max_bytes`.
+
+    The body is already decoded, so transfer headers are dropped; truncation is
+    reported as `response.extensions["truncated"]`.
+    """
+    body = b"".join(chunks)
+    headers = [
+        (name, value)
+        for name, value in response.headers.multi_items()
+        if name.lower() not in ("content-encoding", "content-length", "transfer-encoding")
+    ]
+    return httpx.Response(
+        response.status_code,
+        headers=headers,
+        content=body[:max_bytes],
+        request=response.request,
+        history=response.history,
+        extensions={**response.extensions, "truncated": len(body) > max_bytes},
+    )
+
+
+def send_capped(
+    client: httpx.Client, method: str, url: str, max_bytes: int, follow_redirects: bool = False, **kwargs
+) -> httpx.Response:
+    """Sends a request and reads at most `max_bytes` of the body before closing the stream."""
+    response = client.send(
+        client.build_request(method, url, **kwargs),
+        stream=True,
+        follow_redirects=follow_redirects,
+    )
+    return read_capped(response, max_bytes)
+
+
+def read_capped(
+    response: httpx.Response, max_bytes: int, deadline: Optional[float] = None
+) -> httpx.Response:
+    """
+    Reads at most `max_bytes` of a streamed response's body, then closes the stream.
+    A body still arriving at `deadline` raises httpx.TimeoutException.
+    """
+    chunks, size = [], 0
+    try:
+        for chunk in response.iter_bytes():
+            chunks.append(chunk)
+            size += len(chunk)
+            if size > max_bytes:
+                break
+            if deadline is not None:
+                time_left(deadline, response.request)
+    finally:
+        response.close()
+    record_network(response.num_bytes_downloaded)
+    return capped_response(response, chunks, max_bytes)
+
+
+def request(
+    method: str,
+    url: str,
+    retries: int = HTTP_RETRIES,
+    max_bytes: Optional[int] = None,
+    **kwargs,
+) -> httpx.Response:
+    """
+    Sends a request through the shared connection pool.
+
+    Transport errors and retryable status codes are retried with exponential
+    backoff. Concurrent requests against the same host are capped at
+    HTTP_PER_HOST_LIMIT.
+
+    Parameters:
+        - method (str): HTTP method.
+        - url (str): Target URL.
+        - retries (int): Extra attempts after the first one (0 disables retrying).
+        - max_bytes (int): Stream the body and keep at most this many bytes (None reads it all).
+        - **kwargs: Passed through to `httpx.Client.request` (params, headers, timeout, ...).
+
+    Returns:
+        - httpx.Response: The last response received.
+
+    Raises:
+        - httpx.HTTPError: When every attempt failed at the transport level.
+    """
+    client = get_client()
+
+    with _host_slot(url):
+        for attempt in range(retries + 1):
+            try:
+                if max_bytes is None:
+                    response = client.request(method, url, **kwargs)
+                    record_network(response.num_bytes_downloaded)
+                else:
+                    response = send_capped(client, method, url, max_bytes, **kwargs)
+            except httpx.TransportError:
+                if attempt == retries:
+                    raise
+                time.sleep(backoff_delay(attempt))
+                continue
+
+            if response.status_code in RETRY_STATUS_CODES and attempt < retries:
+                time.sleep(backoff_delay(attempt, response))
+                continue
+
+            return response
+
+
+def get(url: str, **kwargs) -> httpx.Response:
+    """Sends a GET request through the shared connection pool."""
+    return request("GET", url, **kwargs)
+
+
+def head(url: str, **kwargs) -> httpx.Response:
+    """Sends a HEAD request through the shared connection pool."""
+    return request("HEAD", url, **kwargs)
+
+
+def fetch_page(url: str, max_bytes: Optional[int] = MAX_PAGE_BYTES, **kwargs) -> dict:
+    """
+    Downloads a page (following redirects) into an in-memory buffer.
+
+    The returned dict is plain data so it can be carried through the workflow
+    state and parsed later without fetching the URL again. Bodies are streamed
+    and cut after `max_bytes`, so a huge page cannot blow up worker memory.
+
+    Returns:
+        - dict: {"url", "final_url", "status_code", "headers", "html", "truncated"}.
+    """
+    response = get(url, follow_redirects=True, max_bytes=max_bytes, **kwargs)
+    return page_from_response(url, response)
+
+
+def open_page(url: str, **kwargs) -> httpx.Response:
+    """
+    Sends a GET (following redirects) and returns as soon as the status line and
+    headers arrived, with the body still unread. Finish it with `read_page`, or
+    `close_page` to drop the body without downloading it. Not retried.
+    """
+    client = get_client()
+    with _host_slot(url):
+        return client.send(
+            client.build_request("GET", url, **kwargs), stream=True, follow_redirects=True
+        )
+
+
+def read_page(
+    url: str,
+    response: httpx.Response,
+    max_bytes: Optional[int] = MAX_PAGE_BYTES,
+    deadline: Optional[float] = None,
+) -> dict:
+    """
+    Reads the body of an `open_page` response into a page dict (see `fetch_page`).
+    A body still arriving at `deadline` raises httpx.TimeoutException.
+    """
+    return page_from_response(url, read_capped(response, max_bytes or sys.maxsize, deadline))
+
+
+def close_page(response: httpx.Response) -> None:
+    """Closes an `open_page` response without reading its body."""
+    response.close()
+    record_network(response.num_bytes_downloaded)
+
+
+def page_from_response(url: str, response: httpx.Response) -> dict:
+    return {
+        "url": url,
+        "final_url": str(response.url),
+        "status_code": response.status_code,
+        "headers": dict(response.headers),
+        "html": response.text,
+        "truncated": response.extensions.get("truncated", False),
+    }
+
+
+# --------------- ASYNC API (one pooled client per event loop) ---------------
+def get_async_client() -> httpx.AsyncClient:
+    """Returns the pooled async HTTP client of the running event loop."""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(**_client_options())
+        _async_clients[loop] = client
+    return client
+
+
+async def aclose_client() -> None:
+    """Closes the running event loop's async client."""
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+def _async_host_slot(url: str) -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    slots = _async_host_slots.get(loop)
+    if slots is None:
+        slots = _async_host_slots[loop] = weakref.WeakValueDictionary()
+    host = urlparse(url).netloc
+    slot = slots.get(host)
+    if slot is None:
+        slot = slots[host] = asyncio.Semaphore(HTTP_PER_HOST_LIMIT)
+    return slot
+
+
+async def asend_capped(
+    client: httpx.AsyncClient, method: str, url: str, max_bytes: int, follow_redirects: bool = False, **kwargs
+) -> httpx.Response:
+    """Async version of `send_capped`."""
+    response = await client.send(
+        client.build_request(method, url, **kwargs),
+        stream=True,
+        follow_redirects=follow_redirects,
+    )
+    return await aread_capped(response, max_bytes)
+
+
+async def aread_capped(
+    response: httpx.Response, max_bytes: int, deadline: Optional[float] = None
+) -> httpx.Response:
+    """Async version of `read_capped`."""
+    chunks, size = [], 0
+    try:
+        async for chunk in response.aiter_bytes():
+            chunks.append(chunk)
+            size += len(chunk)
+            if size > max_bytes:
+                break
+            if deadline is not None:
+                time_left(deadline, response.request)
+    finally:
+        await response.aclose()
+    record_network(response.num_bytes_downloaded)
+    return capped_response(response, chunks, max_bytes)
+
+
+async def arequest(
+    method: str,
+    url: str,
+    retries: int = HTTP_RETRIES,
+    max_bytes: Optional[int] = None,
+    **kwargs,
+) -> httpx.Response:
+    """Async version of `request`: same pooling, per-host cap and retry policy."""
+    client = get_async_client()
+
+    async with _async_host_slot(url):
+        for attempt in range(retries + 1):
+            try:
+                if max_bytes is None:
+                    response = await client.request(method, url, **kwargs)
+                    record_network(response.num_bytes_downloaded)
+                else:
+                    response = await asend_capped(client, method, url, max_bytes, **kwargs)
+            except httpx.TransportError:
+                if attempt == retries:
+                    raise
+                await asyncio.sleep(backoff_delay(attempt))
+                continue
+
+            if response.status_code in RETRY_STATUS_CODES and attempt < retries:
+                await asyncio.sleep(backoff_delay(attempt, response))
+                continue
+
+            return response
+
+
+async def aget(url: str, **kwargs) -> httpx.Response:
+    """Sends an async GET request through the shared connection pool."""
+    return await arequest("GET", url, **kwargs)
+
+
+async def ahead(url: str, **kwargs) -> httpx.Response:
+    """Sends an async HEAD request through the shared connection pool."""
+    return await arequest("HEAD", url, **kwargs)
+
+
+async def afetch_page(url: str, max_bytes: Optional[int] = MAX_PAGE_BYTES, **kwargs) -> dict:
+    """Async version of `fetch_page`."""
+    response = await aget(url, follow_redirects=True, max_bytes=max_bytes, **kwargs)
+    return page_from_response(url, response)
+
+
+async def aopen_page(url: str, **kwargs) -> httpx.Response:
+    """Async version of `open_page`."""
+    client = get_async_client()
+    async with _async_host_slot(url):
+        return await client.send(
+            client.build_request("GET", url, **kwargs), stream=True, follow_redirects=True
+        )
+
+
+async def aread_page(
+    url: str,
+    response: httpx.Response,
+    max_bytes: Optional[int] = MAX_PAGE_BYTES,
+    deadline: Optional[float] = None,
+) -> dict:
+    """Async version of `read_page`."""
+    return page_from_response(url, await aread_capped(response, max_bytes or sys.maxsize, deadline))
+
+
+async def aclose_page(response: httpx.Response) -> None:
+    """Async version of `close_page`."""
+    await response.aclose()
+    record_network(response.num_bytes_downloaded)
@@ -0,0 +1,217 @@
+"""
+Corpus-level document frequency index for TF-IDF keyword scoring.
+
+Every article the scraper extracts is added once (deduplicated by content
+hash). The index lives in three append-friendly files under IDF_DIR:
+
+  - vocab.txt: one term per line; a term's line number is its id
+  - df.u32:    memory-mapped uint32 document frequencies, indexed by term id
+  - docs.u64:  64-bit content hashes of the indexed documents (their count is N)
+
+Scoring a document's term counts against the index is a handful of NumPy
+operations, independent of the corpus size. Writers in several processes
+serialize on a lock file and catch up with each other's terms before adding
+their own; readers pick up updates from other processes within
+RELOAD_INTERVAL seconds.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from typing import Dict, Iterable, Mapping, Optional, Sequence
+
+import numpy as np
+from filelock import FileLock
+
+from core.cache import CACHE_DIR
+
+IDF_DIR = os.getenv("BLOG_AGENT_IDF_DIR", os.path.join(CACHE_DIR, "idf"))
+INITIAL_CAPACITY = 1 << 16  # Term slots in df.u32; doubled when the vocabulary outgrows it
+MIN_DOCUMENTS = 20  # Below this corpus size, IDF is too noisy to rank by
+RELOAD_INTERVAL = 30.0  # Seconds between checks for updates by other processes
+
+
+def document_key(text: str) -> int:
+    """64-bit content hash identifying a document in the index."""
+    return int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+
+
+class IdfIndex:
+    """
+    Persistent term -> document frequency index.
+
+    Files are opened lazily on first use, so creating an index has no side
+    effects.
+    """
+
+    def __init__(self, directory: str = IDF_DIR):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._file_lock = FileLock(os.path.join(directory, "write.lock"))
+        self._vocab: Optional[Dict[str, int]] = None
+        self._df: Optional[np.memmap] = None
+        self._docs: set = set()
+        self._vocab_bytes = 0  # How much of vocab.txt has been read
+        self._checked = 0.0
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    # --------------- STORAGE (callers hold the lock) ---------------
+    def _map(self, capacity: int) -> None:
+        """Maps df.u32 with room for `capacity` terms, growing the file if needed."""
+        path = self._path("df.u32")
+        size = capacity * np.dtype(np.uint32).itemsize
+        with open(path, "ab") as file:
+            if file.tell() < size:
+                file.truncate(size)
+        if self._df is not None:
+            self._df.flush()
+        self._df = np.memmap(path, dtype=np.uint32, mode="r+", shape=(capacity,))
+
+    def _load(self) -> None:
+        if self._vocab is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self._vocab = {}
+            self._docs = set()
+            self._vocab_bytes = 0
+            self._read_updates()
+            self._checked = time.monotonic()
+
+    def _read_updates(self) -> None:
+        """Reads terms and documents appended (by any process) since the last read."""
+        try:
+            with open(self._path("vocab.txt"), "rb") as file:
+                file.seek(self._vocab_bytes)
+                appended = file.read()
+        except FileNotFoundError:
+            appended = b""
+        complete = appended.rfind(b"\n") + 1  # A concurrent append may end mid-line
+        for term in appended[:complete].decode("utf-8").split("\n")[:-1]:
+            self._vocab[term] = len(self._vocab)
+        self._vocab_bytes += complete
+
+        try:
+            keys = np.fromfile(self._path("docs.u64"), dtype=np.uint64)
+            self._docs.update(keys[len(self._docs):].tolist())
+        except FileNotFoundError:
+            pass
+
+        path = self._path("df.u32")
+        on_disk = os.path.getsize(path) // 4 if os.path.exists(path) else 0
+        capacity = max(INITIAL_CAPACITY, on_disk)
+        while capacity < len(self._vocab):
+            capacity *= 2
+        if self._df is None or len(self._df) != capacity:
+            self._map(capacity)
+
+    def _refresh(self) -> None:
+        """Loads the index, re-reading it when another process may have updated it."""
+        self._load()
+        now = time.monotonic()
+        if now - self._checked > RELOAD_INTERVAL:
+            self._checked = now
+            path = self._path("docs.u64")
+            if os.path.exists(path) and os.path.getsize(path) // 8 != len(self._docs):
+                self._read_updates()
+
+    # --------------- UPDATE API ---------------
+    def add_terms(self, terms: Iterable[str], key: int) -> bool:
+        """
+        Adds one document, given its distinct terms and its `document_key`.
+
+        Returns:
+            - bool: False if the document was already indexed (nothing changes).
+        """
+        with self._lock:
+            self._load()
+            with self._file_lock:
+                return self._add_terms(terms, key)
+
+    def _add_terms(self, terms: Iterable[str], key: int) -> bool:
+        """`add_terms` while holding both locks."""
+        # Another process may have appended terms: ids are assigned after its ones
+        self._read_updates()
+        self._checked = time.monotonic()
+        if key in self._docs:
+            return False
+
+        terms = set(terms)
+        new_terms = [term for term in terms if term not in self._vocab]
+        if new_terms:
+            payload = "".join(f"{term}\n" for term in new_terms).encode("utf-8")
+            with open(self._path("vocab.txt"), "ab") as file:
+                file.write(payload)
+            self._vocab_bytes += len(payload)
+            for term in new_terms:
+                self._vocab[term] = len(self._vocab)
+            capacity = len(self._df)
+            while capacity < len(self._vocab):
+                capacity *= 2
+            if capacity != len(self._df):
+                self._map(capacity)
+
+        vocab = self._vocab
+        ids = np.fromiter((vocab[term] for term in terms), dtype=np.int64, count=len(terms))
+        self._df[ids] += 1  # Ids are distinct, so plain fancy-index addition is exact
+
+        with open(self._path("docs.u64"), "ab") as file:
+            file.write(np.array([key], dtype=np.uint64).tobytes())
+        self._docs.add(key)
+        return True
+
+    def flush(self) -> None:
+        """Writes pending document frequency updates to disk."""
+        with self._lock:
+            if self._df is not None:
+                self._df.flush()
+
+    # --------------- SCORING ---------------
+    @property
+    def documents(self) -> int:
+        """Number of indexed documents (N)."""
+        with self._lock:
+            self._refresh()
+            return len(self._docs)
+
+    def ready(self) -> bool:
+        return self.documents >= MIN_DOCUMENTS
+
+    def idf(self, terms: Sequence[str]) -> np.ndarray:
+        """
+        Smoothed inverse document frequency of each term: ln((1 + N) / (1 + df)) + 1.
+        Terms the index has never seen get the highest IDF.
+        """
+        with self._lock:
+            self._refresh()
+            vocab, df, documents = self._vocab, self._df, len(self._docs)
+
+        ids = np.fromiter((vocab.get(term, -1) for term in terms), dtype=np.int64, count=len(terms))
+        ids[ids >= len(df)] = -1  # Added by a concurrent update after `df` was snapshot
+        frequencies = np.where(ids >= 0, df[np.maximum(ids, 0)], 0)
+        return np.log((1 + documents) / (1.0 + frequencies)) + 1
+
+    def tf_idf(self, term_counts: Mapping[str, int]) -> np.ndarray:
+        """
+        Scores a document's terms against the corpus: tf * idf.
+
+        Returns:
+            - np.ndarray: One score per term, in `term_counts` order.
+        """
+        counts = np.fromiter(term_counts.values(), dtype=np.float64, count=len(term_counts))
+        return counts * self.idf(list(term_counts))
+
+    def top_terms(self, term_counts: Mapping[str, int], top_n: int = 100) -> Dict[str, int]:
+        """Returns the `top_n` terms by TF-IDF (best first), with their raw counts."""
+        if not term_counts:
+            return {}
+        terms = list(term_counts)
+        scores = self.tf_idf(term_counts)
+        k = min(top_n, len(terms))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return {terms[i]: term_counts[terms[i]] for i in top}
+
+
+idf_index = IdfIndex()
@@ -0,0 +1,70 @@
+from collections import deque
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+
+class PhraseMatcher:
+    """
+    Aho–Corasick automaton over word tokens.
+
+    Phrases are matched as whole token sequences, so counting is word-bounded
+    ("design" does not match inside "designs") and every phrase, including
+    overlapping ones, is counted in a single linear pass over the token stream.
+    """
+
+    def __init__(self, phrases: Iterable[Sequence[str]]):
+        self.phrases: List[Tuple[str, ...]] = []
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[int]] = [[]]
+
+        seen = {}
+        for phrase in phrases:
+            phrase = tuple(phrase)
+            if not phrase or phrase in seen:
+                continue
+            seen[phrase] = len(self.phrases)
+            self.phrases.append(phrase)
+            self._insert(phrase, seen[phrase])
+
+        self._build_failure_links()
+
+    def _insert(self, phrase: Tuple[str, ...], phrase_id: int) -> None:
+        state = 0
+        for token in phrase:
+            next_state = self._goto[state].get(token)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][token] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        self._output[state].append(phrase_id)
+
+    def _build_failure_links(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for token, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and token not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(token, 0)
+                # Inherit matches that end at the fallback state (suffix phrases)
+                self._output[next_state] += self._output[self._fail[next_state]]
+
+    def count(self, tokens: Iterable[str]) -> Dict[Tuple[str, ...], int]:
+        """Counts occurrences of every phrase in one pass over `tokens`."""
+        goto, fail, output = self._goto, self._fail, self._output
+        counts = [0] * len(self.phrases)
+        state = 0
+
+        for token in tokens:
+            while state and token not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(token, 0)
+            for phrase_id in output[state]:
+                counts[phrase_id] += 1
+
+        return dict(zip(self.phrases, counts))
@@ -0,0 +1,185 @@
+import os
+import re
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+# Labels returned by ResultClassifier.classify
+BLOG = "blog"  # Allowed domain, blog-like path or an article page
+DENIED = "denied"  # Domain (or domain path) is on the deny list
+INVALID = "invalid"  # Missing or non-HTTP link
+OTHER = "other"  # Valid link that does not look like a blog post
+
+# Seconds between checks whether external list files changed on disk
+LIST_RELOAD_INTERVAL = 30.0
+
+
+class DomainIndex:
+    """
+    Hash index over registered domains, optionally restricted to path prefixes.
+
+    Entries are domains ("hubspot.com") or domain paths ("webflow.com/blog").
+    A host matches when it or one of its parent domains is registered, so
+    "www.hubspot.com" and "blog.hubspot.com" match "hubspot.com" but
+    "nothubspot.com" does not. Lookups cost one dict probe per host label,
+    independent of the number of entries.
+    """
+
+    def __init__(self, entries: Iterable[str] = ()):
+        self._prefixes: Dict[str, Tuple[str, ...]] = {}
+        for entry in entries:
+            self.add(entry)
+
+    def add(self, entry: str) -> None:
+        domain, path = split_entry(entry)
+        if not domain:
+            return
+        prefixes = self._prefixes.get(domain, ())
+        if path not in prefixes:
+            self._prefixes[domain] = prefixes + (path,)
+
+    def __len__(self) -> int:
+        return len(self._prefixes)
+
+    def match(self, host: str, path: str = "/") -> bool:
+        """True if `host` (or a parent domain) is registered for `path`."""
+        labels = host.split(".")
+        for start in range(len(labels) - 1):  # Never match a bare TLD
+            prefixes = self._prefixes.get(".".join(labels[start:]))
+            if prefixes and any(path_has_prefix(path, prefix) for prefix in prefixes):
+                return True
+        return False
+
+
+def path_has_prefix(path: str, prefix: str) -> bool:
+    """Segment-aware prefix test: "/blog" matches "/blog" and "/blog/x", not "/blogging"."""
+    if not prefix:
+        return True
+    prefix = prefix.rstrip("/")
+    return path == prefix or path.startswith(prefix + "/")
+
+
+def split_entry(entry: str) -> Tuple[str, str]:
+    """Splits "webflow.com/blog" (or a full URL) into ("webflow.com", "/blog")."""
+    entry = entry.strip().lower()
+    if "//" in entry:
+        entry = entry.split("//", 1)[1]
+    domain, _, path = entry.partition("/")
+    domain = domain.split(":")[0].strip(".")
+    if domain.startswith("www."):
+        domain = domain[4:]
+    return domain, f"/{path}" if path else ""
+
+
+def load_domain_list(path: str) -> List[str]:
+    """Reads one domain (or domain path) per line, skipping blank lines and # comments."""
+    with open(path, "r") as file:
+        return [
+            line.split("#", 1)[0].strip()
+            for line in file
+            if line.split("#", 1)[0].strip()
+        ]
+
+
+def compile_path_patterns(patterns: Iterable[str]) -> Optional[re.Pattern]:
+    """Compiles the blog path fragments into one alternation regex."""
+    patterns = sorted({pattern.lower() for pattern in patterns if pattern}, key=len, reverse=True)
+    if not patterns:
+        return None
+    return re.compile("|".join(re.escape(pattern) for pattern in patterns))
+
+
+class ResultClassifier:
+    """
+    Classifies search results as blog candidates in one pass per result.
+
+    Built-in allow/deny entries can be extended with external list files
+    (one domain per line, tens of thousands of entries are fine). The files
+    are loaded on first use and reloaded automatically when they change on
+    disk (checked at most every LIST_RELOAD_INTERVAL seconds), or explicitly
+    with `reload()`. Indexes are rebuilt off to the side and swapped in, so
+    concurrent classification never sees a half-loaded list.
+    """
+
+    def __init__(
+        self,
+        allow: Iterable[str] = (),
+        deny: Iterable[str] = (),
+        blog_patterns: Iterable[str] = (),
+        allow_path: Optional[str] = None,
+        deny_path: Optional[str] = None,
+    ):
+        self.allow_entries = list(allow)
+        self.deny_entries = list(deny)
+        self.path_pattern = compile_path_patterns(blog_patterns)
+        self.allow_path = allow_path
+        self.deny_path = deny_path
+        self._indexes: Optional[Tuple[DomainIndex, DomainIndex]] = None
+        self._mtimes: Tuple[Optional[float], Optional[float]] = (None, None)
+        self._checked = 0.0
+        self._lock = threading.Lock()
+
+    def _list_mtimes(self) -> Tuple[Optional[float], Optional[float]]:
+        return tuple(
+            os.path.getmtime(path) if path and os.path.exists(path) else None
+            for path in (self.allow_path, self.deny_path)
+        )
+
+    def reload(self) -> None:
+        """Rebuilds the domain indexes from the built-in entries and the list files."""
+        with self._lock:
+            mtimes = self._list_mtimes()
+            allow, deny = list(self.allow_entries), list(self.deny_entries)
+            if mtimes[0] is not None:
+                allow += load_domain_list(self.allow_path)
+            if mtimes[1] is not None:
+                deny += load_domain_list(self.deny_path)
+            self._indexes = (DomainIndex(allow), DomainIndex(deny))
+            self._mtimes = mtimes
+            self._checked = time.monotonic()
+
+    def indexes(self) -> Tuple[DomainIndex, DomainIndex]:
+        """Returns (allow, deny) indexes, loading or reloading changed list files."""
+        now = time.monotonic()
+        if self._indexes is None:
+            self.reload()
+        elif (self.allow_path or self.deny_path) and now - self._checked > LIST_RELOAD_INTERVAL:
+            self._checked = now
+            if self._list_mtimes() != self._mtimes:
+                self.reload()
+        return self._indexes
+
+    def classify(self, results: List[dict]) -> List[str]:
+        """
+        Labels a batch of raw search results (BLOG, DENIED, INVALID or OTHER).
+
+        Returns:
+            - List[str]: One label per result, in input order.
+        """
+        allow, deny = self.indexes()
+        path_pattern = self.path_pattern
+        labels = []
+
+        for result in results:
+            url = result.get("link", "").lower()
+            if len(url) < 10 or not url.startswith("http"):
+                labels.append(INVALID)
+                continue
+
+            parts = urlsplit(url)
+            host = (parts.hostname or "").rstrip(".")
+            path = parts.path or "/"
+            if deny.match(host, path):
+                labels.append(DENIED)
+                continue
+
+            meta_tags = (result.get("pagemap", {}).get("metatags") or [{}])[0]
+            is_blog_post = (
+                allow.match(host, path)
+                or (path_pattern is not None and path_pattern.search(path) is not None)
+                or meta_tags.get("og:type", "").lower() == "article"
+            )
+            labels.append(BLOG if is_blog_post else OTHER)
+
+        return labels
@@ -1,54 +1,162 @@
+import asyncio
+import multiprocessing
+import os
 import re
+import threading
 from collections import Counter
-from nltk.corpus import stopwords
-import nltk
-import yake
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Iterable, Iterator
 
-# Ensure stopwords are available
-nltk.download("stopwords", quiet=True)
+from core.singleflight import SingleFlight
+from tools.content_cache import KEYWORD_CACHE_VERSION, keyword_cache, text_hash
+from tools.idf_index import document_key, idf_index
+from tools.phrase_matcher import PhraseMatcher
 
 # Precompiled regex for tokenization
 WORD_PATTERN = re.compile(r'\b\w+\b')
-STOP_WORDS = frozenset(stopwords.words("english"))
+WHITESPACE_PATTERN = re.compile(r'\s')
+
+# Large texts are lowercased and tokenized in chunks of about this many characters
+TOKEN_CHUNK_CHARS = 64 * 1024
+
+# Rank single words by TF-IDF against the scraped corpus once the index is large enough
+IDF_RANKING = True
+
+# Concurrent runs scoring the same article text share one extraction
+keyword_flight = SingleFlight("keyword_frequencies")
+
+# Batch extraction workers are started by a fork server (or spawned), never forked
+# from this multi-threaded process, where a lock held by another thread would stay
+# locked in the child forever
+POOL_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+_keyword_pool = None
+_keyword_pool_workers = 0
+_keyword_pool_lock = threading.Lock()
+
+# --------------- CACHED RESOURCES (built once per process) ---------------
+@lru_cache(maxsize=None)
+def get_stop_words(language: str = "english") -> frozenset:
+    """Loads the NLTK stopword set on first use; downloads it only if it is missing."""
+    import nltk  # Heavy imports, deferred until first use
+    from nltk.corpus import stopwords
+
+    try:
+        words = stopwords.words(language)
+    except LookupError:
+        nltk.download("stopwords", quiet=True)
+        words = stopwords.words(language)
+    return frozenset(words)
+
+@lru_cache(maxsize=32)
+def get_keyword_extractor(n: int = 4, top: int = 20, language: str = "en"):
+    """Returns a YAKE! extractor shared by every call with the same (n, top, language)."""
+    import yake  # Heavy import, deferred until first use
+
+    return yake.KeywordExtractor(lan=language, n=n, top=top)
 
 # --------------- TEXT PROCESSING FUNCTIONS ---------------
 def tokenize_text(text: str) -> list:
     """Tokenizes text into lowercase words (removes punctuation)."""
     return WORD_PATTERN.findall(text.lower())
 
-def remove_stopwords(words: list) -> list:
+def iter_text_chunks(text: str, chunk_chars: int = TOKEN_CHUNK_CHARS) -> Iterator[str]:
+    """Splits text into chunks of about `chunk_chars`, cut at whitespace so no word is split."""
+    start, length = 0, len(text)
+    while start < length:
+        end = start + chunk_chars
+        if end < length:
+            boundary = WHITESPACE_PATTERN.search(text, end)
+            end = boundary.end() if boundary else length
+        yield text[start:end]
+        start = end
+
+def iter_tokens(chunks: Iterable[str]) -> Iterator[str]:
+    """
+    Streams lowercase word tokens out of text chunks (e.g. `iter_text_chunks` or
+    extracted lines). Only one lowercased chunk is held at a time.
+    """
+    for chunk in chunks:
+        for match in WORD_PATTERN.finditer(chunk.lower()):
+            yield match.group()
+
+def stream_tokens(text: str) -> Iterator[str]:
+    """Memory-bounded equivalent of `tokenize_text` for large texts."""
+    return iter_tokens(iter_text_chunks(text))
+
+def remove_stopwords(words: list, language: str = "english") -> list:
     """Removes stopwords from a list of words."""
-    return [word for word in words if word not in STOP_WORDS]
+    stop_words = get_stop_words(language)
+    return [word for word in words if word not in stop_words]
 
-def count_frequencies(words: list) -> Counter:
+def count_frequencies(words: Iterable[str]) -> Counter:
     """Counts the frequency of words in a list."""
     return Counter(words)
 
 # --------------- SINGLE-WORD KEYWORD EXTRACTION ---------------
-def extract_single_word_keywords(text: str, top_n: int = 100, min_occurrences: int = 3) -> dict:
-    """Extracts frequent single-word keywords."""
-    words = tokenize_text(text)
-    filtered_words = remove_stopwords(words)
-    word_counts = count_frequencies(filtered_words)
+def extract_single_word_keywords(text: str, top_n: int = 100, min_occurrences: int = 3, tokens: Iterable[str] = None) -> dict:
+    """
+    Extracts frequent single-word keywords. Pass `tokens` to reuse an existing
+    tokenization of `text`; otherwise the text is streamed chunk by chunk.
+    """
+    stop_words = get_stop_words()
+    words = tokens if tokens is not None else stream_tokens(text)
+    word_counts = count_frequencies(word for word in words if word not in stop_words)
+    return top_single_words(word_counts, top_n, min_occurrences)
+
+def top_single_words(word_counts: Counter, top_n: int = 100, min_occurrences: int = 3) -> dict:
+    """
+    Picks the `top_n` words occurring at least `min_occurrences` times, with their counts.
+
+    Words are ranked by TF-IDF against the corpus index (see tools.idf_index), so
+    words every article uses lose to the ones specific to this text; until the
+    index holds enough documents they are ranked by raw frequency.
+    """
+    if IDF_RANKING and idf_index.ready():
+        candidates = {word: count for word, count in word_counts.items() if count >= min_occurrences}
+        return idf_index.top_terms(candidates, top_n)
     return {word: count for word, count in word_counts.most_common(top_n) if count >= min_occurrences}
 
+def index_document(text: str) -> bool:
+    """
+    Adds an article's distinct non-stopword terms to the corpus IDF index.
+
+    Returns:
+    - bool: False if the text was already indexed.
+    """
+    stop_words = get_stop_words()
+    terms = {token for token in stream_tokens(text) if token not in stop_words}
+    return idf_index.add_terms(terms, document_key(text))
+
 # --------------- MULTI-WORD KEYWORD EXTRACTION USING YAKE! ---------------
 def extract_long_tail_keywords(text: str, max_key_phrases: int = 20, ngram_size: int = 4) -> list:
     """Extracts multi-word keywords using YAKE!"""
-    keyword_extractor = yake.KeywordExtractor(n=ngram_size, top=max_key_phrases)
+    keyword_extractor = get_keyword_extractor(n=ngram_size, top=max_key_phrases)
     return [phrase.lower() for phrase, _ in keyword_extractor.extract_keywords(text) if " " in phrase]
 
-def count_keyword_occurrences(text: str, keywords: list) -> dict:
-    """Counts occurrences of extracted multi-word keywords."""
-    text_lower = text.lower()
-    return {keyword: text_lower.count(keyword) for keyword in keywords if text_lower.count(keyword) > 0}
+def count_keyword_occurrences(text: str, keywords: list, tokens: Iterable[str] = None) -> dict:
+    """
+    Counts word-bounded occurrences of extracted multi-word keywords.
+
+    All keywords are matched in a single pass over the token stream with an
+    Aho–Corasick automaton. Pass `tokens` to reuse an existing tokenization of
+    `text`; otherwise the text is streamed chunk by chunk.
+    """
+    keyword_tokens = {keyword: tuple(tokenize_text(keyword)) for keyword in keywords}
+    words = tokens if tokens is not None else stream_tokens(text)
+    phrase_counts = PhraseMatcher(keyword_tokens.values()).count(words)
+    return keyword_counts(keyword_tokens, phrase_counts)
+
+def keyword_counts(keyword_tokens: dict, phrase_counts: dict) -> dict:
+    counts = {keyword: phrase_counts.get(phrase, 0) for keyword, phrase in keyword_tokens.items()}
+    return {keyword: count for keyword, count in counts.items() if count > 0}
 
 def sort_for_model(keywords: list) -> str:
     """
-    Sorts keyword data by frequency (highest first) and returns as a formatted string.
+    Formats ranked keyword data (best first, see `rank_keywords`) as a string.
 
     Parameters:
-    - keywords (list): A list of tuples (word, frequency).
+    - keywords (list): A list of tuples (word, frequency), in rank order.
 
     Returns:
     - str: A formatted string with each keyword tuple on a new line.
@@ -56,23 +164,219 @@ def sort_for_model(keywords: list) -> str:
     if not keywords:
         return "No relevant keywords found."
 
-    # Sort by frequency (highest first)
-    sorted_keywords = sorted(keywords, key=lambda x: x[1], reverse=True)
-
     # Convert to a string, removing list brackets
-    return ", ".join(f"('{word}', {count})" for word, count in sorted_keywords)
+    return ", ".join(f"('{word}', {count})" for word, count in keywords)
 
 
 
 
 # --------------- MAIN FUNCTION FOR LANGRAPH ---------------
+def count_keywords(text: str, min_occurrences: int = 3) -> dict:
+    """
+    Counts a text's YAKE! phrases and its single words occurring at least
+    `min_occurrences` times (uncached).
+
+    Single words and YAKE! phrases are counted together in one streaming pass,
+    so no lowercased copy or token list of the whole text is ever built.
+
+    Returns:
+    - dict: {"phrases": {phrase: count}, "words": {word: count}}.
+    """
+    yake_keywords = extract_long_tail_keywords(text)
+    keyword_tokens = {keyword: tuple(tokenize_text(keyword)) for keyword in yake_keywords}
+    stop_words = get_stop_words()
+    word_counts = Counter()
+
+    def counted(tokens: Iterable[str]) -> Iterator[str]:
+        for token in tokens:
+            if token not in stop_words:
+                word_counts[token] += 1
+            yield token
+
+    phrase_counts = PhraseMatcher(keyword_tokens.values()).count(counted(stream_tokens(text)))
+    return {
+        "phrases": keyword_counts(keyword_tokens, phrase_counts),
+        "words": {word: count for word, count in word_counts.items() if count >= min_occurrences},
+    }
+
+def rank_keywords(counts: dict, top_n: int = 100) -> list:
+    """
+    Ranks a text's keyword counts (see `count_keywords`) for the prompt, best first.
+
+    Once the corpus IDF index is ready, the `top_n` single words are picked by
+    TF-IDF and every keyword is ranked by its count times the mean IDF of its
+    non-stopword words; until then everything is ranked by raw frequency.
+
+    Returns:
+    - list: (keyword, frequency) tuples in rank order.
+    """
+    single_keywords = top_single_words(Counter(counts["words"]), top_n)
+    keywords = {**counts["phrases"], **single_keywords}
+    if not (IDF_RANKING and idf_index.ready()):
+        return sorted(keywords.items(), key=lambda x: x[1], reverse=True)
+
+    stop_words = get_stop_words()
+    keyword_terms = {}
+    for keyword in keywords:
+        terms = tokenize_text(keyword)
+        keyword_terms[keyword] = [term for term in terms if term not in stop_words] or terms
+    terms = list({term for terms in keyword_terms.values() for term in terms})
+    idf = dict(zip(terms, idf_index.idf(terms).tolist()))
+
+    def score(item: tuple) -> float:
+        keyword, count = item
+        weights = [idf[term] for term in keyword_terms[keyword]]
+        return count * sum(weights) / len(weights) if weights else 0.0
+
+    return sorted(keywords.items(), key=score, reverse=True)
+
+def compute_keyword_frequencies(text: str) -> list:
+    """Extracts ranked single and multi-word keywords as (keyword, frequency) tuples (uncached)."""
+    return rank_keywords(count_keywords(text))
+
+def keyword_cache_key(text: str) -> str:
+    """Content address of a text's keyword counts (the same article text is never counted twice)."""
+    return f"{KEYWORD_CACHE_VERSION}:{text_hash(text)}"
+
+def get_cached_counts(text: str):
+    """Returns the cached `count_keywords` result for `text`, or None."""
+    return keyword_cache.get(keyword_cache_key(text))
+
+def extract_keyword_frequencies(text: str) -> list:
+    """
+    Cached version of `compute_keyword_frequencies`. The raw counts are cached
+    by a hash of the text and ranked on every call, so rankings follow the
+    IDF index as it grows. Concurrent calls for the same text share one extraction.
+    """
+    key = keyword_cache_key(text)
+    return keyword_flight.do(key, cached_keyword_frequencies, text, key)
+
+async def aextract_keyword_frequencies(text: str) -> list:
+    """Async version of `extract_keyword_frequencies`; scoring runs in a worker thread."""
+    key = await asyncio.to_thread(keyword_cache_key, text)
+    return await keyword_flight.ado(key, asyncio.to_thread, cached_keyword_frequencies, text, key)
+
+def cached_keyword_frequencies(text: str, key: str) -> list:
+    """Uncoalesced `extract_keyword_frequencies` for the text's cache `key`."""
+    counts = keyword_cache.get(key)
+    if counts is None:
+        counts = count_keywords(text)
+        keyword_cache.set(key, counts)
+    return rank_keywords(counts)
+
 def extract_keywords_from_text(text: str) -> str:
     """Extracts keywords from raw article text instead of a file."""
-    single_keywords = extract_single_word_keywords(text)
-    yake_keywords = extract_long_tail_keywords(text)
-    keyword_frequencies = count_keyword_occurrences(text, yake_keywords)
-    
-    # Merge single and multi-word keywords
-    keywords = list(keyword_frequencies.items()) + list(single_keywords.items())
-    return sort_for_model(keywords)
+    return sort_for_model(extract_keyword_frequencies(text))
+
+async def aextract_keywords_from_text(text: str) -> str:
+    """Async version of `extract_keywords_from_text`; scoring runs in a worker thread."""
+    return sort_for_model(await aextract_keyword_frequencies(text))
+
+# --------------- BATCH EXTRACTION (MULTI-DOCUMENT CORPORA) ---------------
+def merge_keyword_counts(per_document: list) -> dict:
+    """
+    Merges per-document keyword counts (see `count_keywords`) into one set of
+    counts, to be ranked by `rank_keywords` like a single document's.
+
+    Each keyword's total count is scaled by the share of documents it appears in,
+    so terms shared across sources outrank terms that one page repeats heavily.
+
+    Returns:
+    - dict: {"phrases": {phrase: weighted count}, "words": {word: weighted count}}.
+    """
+    merged = {}
+    for kind in ("phrases", "words"):
+        totals = Counter()
+        document_frequency = Counter()
+        for counts in per_document:
+            for keyword, count in counts[kind].items():
+                totals[keyword] += count
+                document_frequency[keyword] += 1
+        merged[kind] = {
+            keyword: max(1, round(total * document_frequency[keyword] / len(per_document)))
+            for keyword, total in totals.items()
+        }
+    return merged
+
+def available_cpus() -> int:
+    """Returns the number of CPUs this process may run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+def warm_keyword_worker() -> None:
+    """Process pool initializer: loads the stopwords and the YAKE! extractor once per worker."""
+    get_stop_words()
+    get_keyword_extractor()
+
+def get_keyword_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    Returns the long-lived batch extraction pool with `workers` processes, so
+    workers (and their warm resources) are reused across batches. A call asking
+    for a different size replaces the pool.
+    """
+    global _keyword_pool, _keyword_pool_workers
+    with _keyword_pool_lock:
+        if _keyword_pool is None or _keyword_pool_workers != workers:
+            if _keyword_pool is not None:
+                _keyword_pool.shutdown(wait=False)
+            _keyword_pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context(POOL_START_METHOD),
+                initializer=warm_keyword_worker,
+            )
+            _keyword_pool_workers = workers
+        return _keyword_pool
+
+def shutdown_keyword_pool() -> None:
+    """Stops the batch extraction workers (they are started again on demand)."""
+    global _keyword_pool
+    with _keyword_pool_lock:
+        if _keyword_pool is not None:
+            _keyword_pool.shutdown()
+            _keyword_pool = None
+
+def extract_keywords_batch(documents: list, max_workers: int = None, chunksize: int = None) -> dict:
+    """
+    Extracts keywords from many documents in parallel across a process pool.
+
+    YAKE! scoring is CPU-bound pure Python, so documents are spread over worker
+    processes (one per core by default) in chunks of `chunksize` documents.
+    Documents already in the keyword cache are answered in the parent process;
+    only cache misses are counted by the workers. Ranking (which reads the IDF
+    index) always happens in the parent.
+
+    Parameters:
+    - documents (list): Article texts (e.g. the top-N scraped articles for a topic).
+    - max_workers (int): Number of worker processes. Defaults to the available CPUs.
+    - chunksize (int): Documents handed to a worker per task. Defaults to an even split.
+
+    Returns:
+    - dict: {"documents": [(keyword, frequency), ...] per document, "merged": the same
+      for all documents together (see `merge_keyword_counts`)}.
+    """
+    documents = [document or "" for document in documents]
+    counts = [get_cached_counts(document) for document in documents]
+    misses = [i for i, cached in enumerate(counts) if cached is None]
+    workers = max_workers or available_cpus()
+
+    if workers <= 1 or len(misses) <= 1:
+        computed = [count_keywords(documents[i]) for i in misses]
+    else:
+        # The pool keeps its size across batches; the miss count only sets the split
+        chunksize = chunksize or max(1, len(misses) // (min(workers, len(misses)) * 4))
+        pool = get_keyword_pool(workers)
+        computed = list(pool.map(count_keywords, [documents[i] for i in misses], chunksize=chunksize))
+
+    for i, document_counts in zip(misses, computed):
+        keyword_cache.set(keyword_cache_key(documents[i]), document_counts)
+        counts[i] = document_counts
+
+    per_document = [rank_keywords(document_counts) for document_counts in counts]
+    merged = rank_keywords(merge_keyword_counts(counts)) if counts else []
+
+    return {"documents": per_document, "merged": merged}
 
+async def aextract_keywords_batch(documents: list, max_workers: int = None, chunksize: int = None) -> dict:
+    """Async version of `extract_keywords_batch`; the event loop is not blocked while workers run."""
+    return await asyncio.to_thread(extract_keywords_batch, documents, max_workers, chunksize)
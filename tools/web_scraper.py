@@ -1,60 +1,207 @@
-import requests
-from bs4 import BeautifulSoup
-from newspaper import Article
-from typing import Optional
+import asyncio
+import time
+from typing import List, Optional
 
+from core.singleflight import SingleFlight
+from tools import http_client
+from tools.content_cache import (
+    canonical_url,
+    conditional_headers,
+    get_cached_article,
+    is_unchanged,
+    store_article,
+)
+from tools.domain_health import domain_health
+from tools.html_extractor import MAX_TEXT_CHARS, extract_main_text
+from tools.tokenize_text import index_document
 
-def extract_article_content(url: str) -> Optional[str]:
+# Concurrent runs scraping the same article share one download and parse
+scrape_flight = SingleFlight("article_content")
+
+
+def extract_article_content(url: str, page: Optional[dict] = None) -> Optional[str]:
     """
-    Fetches and extracts the main article text from a blog post URL.
-    Tries using Newspaper3k first, then falls back to BeautifulSoup.
+    Extracts the main article text from a blog post URL.
+
+    If `page` (as returned by `http_client.fetch_page`, e.g. during URL
+    validation) is given, its in-memory HTML is parsed and nothing is
+    downloaded; otherwise the page is fetched once through the shared client.
+
+    Extracted text is cached per canonical URL. A cached article is reused
+    when the server answers 304 Not Modified or the page carries the same
+    ETag/Last-Modified validators, so unchanged pages are never re-parsed.
+    Concurrent calls for the same canonical URL (and the same given page, if
+    any) share one download and parse.
+    Newly extracted articles are added to the corpus IDF index.
     """
-    # First, try using Newspaper3k (best for news & blogs)
-    try:
-        article = Article(url)
-        article.download()
-        article.parse()
-        return article.text.strip()
-    except Exception as e:
-        print(f"Newspaper3k failed: {e}")
+    return scrape_flight.do(flight_key(url, page), load_article_content, url, page)
+
+
+def flight_key(url: str, page: Optional[dict]) -> tuple:
+    """
+    Key of a scrape in `scrape_flight`: calls only share work when they would
+    parse the same input (the same pre-downloaded page, or none).
+    """
+    if page is None:
+        return (canonical_url(url), None)
+    return (canonical_url(url), page["status_code"], page.get("final_url"), hash(page.get("html")))
 
-    # If Newspaper3k fails, fall back to BeautifulSoup
-    try:
-        headers = {"User-Agent": "Mozilla/5.0"}
-        response = requests.get(url, headers=headers, timeout=10)
 
-        if response.status_code != 200:
-            print(f"Failed to fetch page, status code: {response.status_code}")
+def load_article_content(url: str, page: Optional[dict] = None) -> Optional[str]:
+    """Uncoalesced `extract_article_content`."""
+    cached = get_cached_article(url)
+    if page is not None and page["status_code"] == 304 and not cached:
+        page = None  # Revalidated entry was evicted since; download the full page
+    if page is None:
+        started = time.perf_counter()
+        try:
+            page = http_client.fetch_page(url, headers=conditional_headers(cached))
+        except Exception as e:
+            print(f"Failed to fetch page: {e}")
+            domain_health.record_failure(url, type(e).__name__, time.perf_counter() - started)
             return None
+        record_download(url, page, time.perf_counter() - started)
 
-        soup = BeautifulSoup(response.text, "html.parser")
+    if is_unchanged(cached, page):
+        return cached["text"]
 
-        # Extract article content based on common article tag patterns
-        article_tags = ["article", "main", "section"]
-        article_content = None
+    if page["status_code"] != 200:
+        print(f"Failed to fetch page, status code: {page['status_code']}")
+        return None
+
+    text = extract_from_html(page["html"], page.get("final_url") or url)
+    if text:
+        store_article(url, text, page.get("headers"))
+        index_article(text)
+    else:
+        domain_health.record_failure(url, "no content")
+    return text
+
+
+async def aextract_article_content(url: str, page: Optional[dict] = None) -> Optional[str]:
+    """
+    Async version of `extract_article_content`. The download is non-blocking and
+    parsing (CPU-bound) runs in a worker thread.
+    """
+    return await scrape_flight.ado(flight_key(url, page), aload_article_content, url, page)
+
+
+async def aload_article_content(url: str, page: Optional[dict] = None) -> Optional[str]:
+    """Async version of `load_article_content`."""
+    cached = await asyncio.to_thread(get_cached_article, url)
+    if page is not None and page["status_code"] == 304 and not cached:
+        page = None  # Revalidated entry was evicted since; download the full page
+    if page is None:
+        started = time.perf_counter()
+        try:
+            page = await http_client.afetch_page(
+                url, headers=conditional_headers(cached)
+            )
+        except Exception as e:
+            print(f"Failed to fetch page: {e}")
+            domain_health.record_failure(url, type(e).__name__, time.perf_counter() - started)
+            return None
+        record_download(url, page, time.perf_counter() - started)
+
+    if is_unchanged(cached, page):
+        return cached["text"]
+
+    if page["status_code"] != 200:
+        print(f"Failed to fetch page, status code: {page['status_code']}")
+        return None
 
-        for tag in article_tags:
-            article_content = soup.find(tag)
-            if article_content:
-                break
+    text = await asyncio.to_thread(
+        extract_from_html, page["html"], page.get("final_url") or url
+    )
+    if text:
+        await asyncio.to_thread(store_article, url, text, page.get("headers"))
+        await asyncio.to_thread(index_article, text)
+    else:
+        domain_health.record_failure(url, "no content")
+    return text
+
+
+def record_download(url: str, page: dict, latency: float) -> None:
+    """Reports a page download to the domain health tracker."""
+    if page["status_code"] >= 400:
+        domain_health.record_failure(url, f"HTTP {page['status_code']}", latency)
+    else:
+        domain_health.record_success(url, latency)
+
+
+def index_article(text: str) -> None:
+    """Adds extracted text to the corpus IDF index; an index error never fails the scrape."""
+    try:
+        index_document(text)
+    except Exception as e:
+        print(f"Failed to add article to the keyword index: {e}")
+
+
+def extract_from_html(html: str, url: str = "") -> Optional[str]:
+    """
+    Extracts the main article text from an HTML buffer.
+    Tries using Newspaper3k first, then falls back to the lxml extractor.
+    Newspaper3k is skipped for domains where it keeps failing.
+    """
+    # First, try using Newspaper3k (best for news & blogs)
+    if domain_health.use_newspaper(url):
+        try:
+            from newspaper import Article  # Heavy import, deferred until first use
+
+            article = Article(url)
+            article.download(input_html=html)
+            article.parse()
+            text = article.text.strip()[:MAX_TEXT_CHARS]
+            domain_health.record_newspaper(url, bool(text))
+            if text:
+                return text
+            print("Newspaper3k found no article text.")
+        except Exception as e:
+            print(f"Newspaper3k failed: {e}")
+            domain_health.record_newspaper(url, False)
+
+    # If Newspaper3k fails, fall back to the lxml text-density extractor
+    try:
+        article_content = extract_main_text(html)
 
         if not article_content:
             print("Could not find main article content.")
             return None
 
-        # Remove unnecessary elements like ads, scripts, sidebars
-        for unwanted in article_content.find_all(
-            ["script", "style", "aside", "nav", "footer"]
-        ):
-            unwanted.extract()
-
-        return article_content.get_text(separator="\n", strip=True)
+        return article_content
 
     except Exception as e:
-        print(f"BeautifulSoup failed: {e}")
+        print(f"lxml extraction failed: {e}")
         return None
 
 
+def dedupe_paragraphs(texts: List[Optional[str]]) -> List[str]:
+    """
+    Removes paragraphs that already appeared in an earlier text.
+
+    Paragraphs are compared case- and whitespace-insensitively, so boilerplate
+    and quotes shared by several sources are kept only once (in the first,
+    best-ranked source).
+
+    Returns:
+        - List[str]: The deduplicated texts, in the same order as the input.
+    """
+    seen = set()
+    deduped = []
+
+    for text in texts:
+        paragraphs = []
+        for paragraph in (text or "").splitlines():
+            key = " ".join(paragraph.lower().split())
+            if not key or key in seen:
+                continue
+            seen.add(key)
+            paragraphs.append(paragraph.strip())
+        deduped.append("\n".join(paragraphs))
+
+    return deduped
+
+
 # ? Example usage
 # url = get_top_blog_post("web design")['url']
 # article_text = extract_article_content(url)
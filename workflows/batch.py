@@ -0,0 +1,252 @@
+"""
+Batch blog generation: runs the workflow for many topics with bounded concurrency.
+
+Search, scrape and LLM stages get separate concurrency caps, Google and OpenAI
+calls are rate-limited, failed runs are retried with backoff, and every result
+is appended to a JSONL file as soon as its run finishes.
+
+Runs are checkpointed to local SQLite (one thread per topic, deleted once the
+topic's post is generated), so retries and restarted batches continue from the
+last completed node, and topics already written as "ok" to the output file are
+skipped. Repeated topics are run once.
+
+Usage (from the repository root):
+    python -m workflows.batch topics.txt --output posts.jsonl
+    python -m workflows.batch --topic "web design" --topic "seo basics"
+    python -m workflows.batch topics.txt --metrics metrics.prom
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import time
+from typing import List, Optional, Set
+
+import orjson
+
+from core.checkpoints import aclose_checkpointer, get_async_checkpointer
+from core.instrumentation import write_metrics
+from core.limits import configure_provider, configure_stage, reset_limits
+from workflows.main import (
+    RESEARCH_MODE,
+    ainvoke_resumable,
+    build_workflow,
+    configure_logging,
+    has_generated_post,
+)
+
+DEFAULT_OUTPUT = "posts.jsonl"
+DEFAULT_MAX_RUNS = 32  # Topics in flight at once
+DEFAULT_SEARCH_CONCURRENCY = 8
+DEFAULT_SCRAPE_CONCURRENCY = 16
+DEFAULT_LLM_CONCURRENCY = 4
+DEFAULT_GOOGLE_RPM = 60  # Custom Search allows 100 queries per 100 seconds by default
+DEFAULT_OPENAI_RPM = 500
+DEFAULT_RETRIES = 2
+RETRY_BACKOFF = 2.0  # seconds, doubled after every failed attempt
+
+
+def completed_topics(output_path: str) -> Set[str]:
+    """Topics that already have an "ok" record in the output file (from an earlier run)."""
+    if not os.path.exists(output_path):
+        return set()
+    done = set()
+    with open(output_path, "rb") as output:
+        for line in output:
+            try:
+                record = orjson.loads(line)
+            except orjson.JSONDecodeError:
+                continue  # Line cut short by an interrupted write
+            if record.get("status") == "ok":
+                done.add(record["topic"])
+    return done
+
+
+def load_topics(path: str) -> List[str]:
+    """Reads one topic per line, skipping blank lines and # comments."""
+    with open(path, "r") as file:
+        return [
+            line.strip()
+            for line in file
+            if line.strip() and not line.lstrip().startswith("#")
+        ]
+
+
+def unique_topics(topics: List[str]) -> List[str]:
+    """Drops repeated topics (same words, any case), which would share one checkpoint thread."""
+    seen = {}
+    for topic in topics:
+        seen.setdefault(" ".join(topic.lower().split()), topic)
+    return list(seen.values())
+
+
+async def run_topic(
+    graph,
+    topic: str,
+    retries: int = DEFAULT_RETRIES,
+    research_mode: bool = RESEARCH_MODE,
+) -> dict:
+    """
+    Runs the workflow for one topic, retrying failed runs with exponential backoff.
+
+    Nodes log and swallow their own errors, so a run counts as failed when it
+    raises or finishes without a generated post. On a checkpointed graph every
+    attempt resumes the topic's thread instead of starting over.
+
+    Returns:
+        - dict: One JSONL record (status "ok" with the post, or "failed" with the last error).
+    """
+    started = time.perf_counter()
+    error = None
+
+    for attempt in range(1, retries + 2):
+        try:
+            state = await ainvoke_resumable(graph, topic, research_mode)
+            if has_generated_post(state):
+                return {
+                    "topic": topic,
+                    "status": "ok",
+                    "attempts": attempt,
+                    "duration": time.perf_counter() - started,
+                    "blog_url": (state.get("blog_url") or {}).get("url"),
+                    "post": state["messages"][-1].content,
+                    "generation_metrics": state.get("generation_metrics"),
+                    "prompt_stats": state.get("prompt_stats"),
+                }
+            error = "workflow finished without a generated post"
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+
+        logging.warning(f"⚠️ Attempt {attempt} failed for '{topic}': {error}")
+        if attempt <= retries:
+            await asyncio.sleep(RETRY_BACKOFF * 2 ** (attempt - 1))
+
+    return {
+        "topic": topic,
+        "status": "failed",
+        "attempts": retries + 1,
+        "duration": time.perf_counter() - started,
+        "error": error,
+    }
+
+
+async def run_batch(
+    topics: List[str],
+    output_path: str = DEFAULT_OUTPUT,
+    max_runs: int = DEFAULT_MAX_RUNS,
+    search_concurrency: int = DEFAULT_SEARCH_CONCURRENCY,
+    scrape_concurrency: int = DEFAULT_SCRAPE_CONCURRENCY,
+    llm_concurrency: int = DEFAULT_LLM_CONCURRENCY,
+    google_rpm: Optional[float] = DEFAULT_GOOGLE_RPM,
+    openai_rpm: Optional[float] = DEFAULT_OPENAI_RPM,
+    retries: int = DEFAULT_RETRIES,
+    research_mode: bool = RESEARCH_MODE,
+    resume: bool = True,
+) -> dict:
+    """
+    Generates a post for every topic on the async graph and appends each result
+    to `output_path` (JSONL) as soon as it completes.
+
+    With `resume`, runs are checkpointed and topics already completed in
+    `output_path` are skipped, so an interrupted batch can simply be restarted.
+
+    Returns:
+        - dict: Summary with ok/failed/skipped counts and total duration.
+    """
+    configure_stage("search", search_concurrency)
+    configure_stage("scrape", scrape_concurrency)
+    configure_stage("llm", llm_concurrency)
+    configure_provider("google", google_rpm, burst=search_concurrency)
+    configure_provider("openai", openai_rpm, burst=llm_concurrency)
+
+    checkpointer = get_async_checkpointer() if resume else None
+    graph = build_workflow(
+        research_mode=research_mode, use_async=True, checkpointer=checkpointer
+    )
+    topics = unique_topics(topics)
+    run_slots = asyncio.Semaphore(max_runs)
+    summary = {"ok": 0, "failed": 0, "skipped": 0}
+    started = time.perf_counter()
+
+    if resume:
+        done = completed_topics(output_path)
+        summary["skipped"] = sum(topic in done for topic in topics)
+        topics = [topic for topic in topics if topic not in done]
+        if summary["skipped"]:
+            logging.info(f"⏭️ Skipping {summary['skipped']} topics already completed")
+
+    async def run_one(topic: str) -> dict:
+        async with run_slots:
+            return await run_topic(graph, topic, retries, research_mode)
+
+    try:
+        with open(output_path, "ab") as output:
+            for finished in asyncio.as_completed([run_one(t) for t in topics]):
+                result = await finished
+                output.write(orjson.dumps(result) + b"\n")
+                output.flush()
+                summary[result["status"]] += 1
+                logging.info(
+                    f"📝 [{summary['ok'] + summary['failed']}/{len(topics)}] "
+                    f"{result['status']}: {result['topic']}"
+                )
+    finally:
+        reset_limits()
+        if checkpointer is not None:
+            await aclose_checkpointer()
+
+    summary["duration"] = time.perf_counter() - started
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate blog posts for many topics.")
+    parser.add_argument("topics_file", nargs="?", help="File with one topic per line")
+    parser.add_argument("--topic", action="append", default=[], help="Topic (repeatable)")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="JSONL file to append to")
+    parser.add_argument("--max-runs", type=int, default=DEFAULT_MAX_RUNS)
+    parser.add_argument("--search-concurrency", type=int, default=DEFAULT_SEARCH_CONCURRENCY)
+    parser.add_argument("--scrape-concurrency", type=int, default=DEFAULT_SCRAPE_CONCURRENCY)
+    parser.add_argument("--llm-concurrency", type=int, default=DEFAULT_LLM_CONCURRENCY)
+    parser.add_argument("--google-rpm", type=float, default=DEFAULT_GOOGLE_RPM)
+    parser.add_argument("--openai-rpm", type=float, default=DEFAULT_OPENAI_RPM)
+    parser.add_argument("--retries", type=int, default=DEFAULT_RETRIES)
+    parser.add_argument("--research", action="store_true", help="Use multi-source research mode")
+    parser.add_argument("--no-resume", action="store_true", help="Disable checkpointing and start every topic over")
+    parser.add_argument("--metrics", help="Write per-node metrics (Prometheus text format) to this file")
+    args = parser.parse_args()
+    configure_logging()
+
+    topics = list(args.topic)
+    if args.topics_file:
+        topics += load_topics(args.topics_file)
+    if not topics:
+        parser.error("no topics given")
+
+    summary = asyncio.run(
+        run_batch(
+            topics,
+            output_path=args.output,
+            max_runs=args.max_runs,
+            search_concurrency=args.search_concurrency,
+            scrape_concurrency=args.scrape_concurrency,
+            llm_concurrency=args.llm_concurrency,
+            google_rpm=args.google_rpm,
+            openai_rpm=args.openai_rpm,
+            retries=args.retries,
+            research_mode=args.research or RESEARCH_MODE,
+            resume=not args.no_resume,
+        )
+    )
+    logging.info(
+        f"✅ Batch finished: {summary['ok']} ok, {summary['failed']} failed, "
+        f"{summary['skipped']} skipped "
+        f"in {summary['duration']:.1f}s"
+    )
+    if args.metrics:
+        write_metrics(args.metrics)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,108 +1,481 @@
-from typing import Literal
-from langchain_openai import ChatOpenAI
+from functools import lru_cache
+from typing import Annotated, Literal, Optional
+import asyncio
+import hashlib
+import threading
+import weakref
+from datetime import datetime, timezone
 from langgraph.graph import StateGraph
-from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
+from langgraph.graph.message import add_messages
+from langgraph.types import Send
+from langchain_core.messages import (
+    SystemMessage,
+    HumanMessage,
+    AIMessage,
+    messages_from_dict,
+    messages_to_dict,
+)
+from langchain_core.runnables import RunnableConfig
 import json
 import logging
+import orjson
+import time
 
 
 # Import functions
-from core.prompt_builder import build_prompt
-from tools.tokenize_text import extract_keywords_from_text
-from tools.google_search import get_top_blog_post
-from tools.web_scraper import extract_article_content
+from core import llm_cache
+from core.blob_store import (
+    BlobRef,
+    MissingBlobError,
+    put_json,
+    put_text,
+    resolve_json,
+    resolve_text,
+)
+from core.checkpoints import get_checkpointer
+from core.instrumentation import instrument_node, should_log_payload
+from core.limits import stage_slot
+from core.prompt_builder import assemble_prompt
+from tools.tokenize_text import (
+    aextract_keyword_frequencies,
+    aextract_keywords_batch,
+    extract_keyword_frequencies,
+    extract_keywords_batch,
+    sort_for_model,
+)
+from tools.google_search import (
+    aget_top_blog_post,
+    aget_top_blog_posts,
+    get_top_blog_post,
+    get_top_blog_posts,
+)
+from tools.web_scraper import (
+    aextract_article_content,
+    dedupe_paragraphs,
+    extract_article_content,
+)
 from typing import TypedDict, List
 
 
+def add_sources(existing: List[dict], new: List[dict]) -> List[dict]:
+    """Reducer for research sources: appends new sources, ignoring URLs already present."""
+    existing = existing or []
+    urls = {source["url"] for source in existing}
+    return existing + [source for source in new or [] if source["url"] not in urls]
+
+
+# Large artifacts live in the blob store (core.blob_store); the state only holds
+# their BlobRefs, and nodes return just the keys they change. Checkpoints and
+# the served API therefore serialize a few KB per step.
 class WorkflowState(TypedDict):
-    messages: List[HumanMessage | SystemMessage]
-    blog_url: str  # Stores the blog URL
-    blog_article_original: str  # Stores article text
-    extracted_keywords: List  # Stores extracted keywords
-    gpt_prompt: (
-        List[HumanMessage | SystemMessage] | HumanMessage
-    )  # GPT formatted messages
+    messages: Annotated[List[HumanMessage | SystemMessage | AIMessage], add_messages]
+    blog_url: dict  # Stores the blog URL: {"url": ...}
+    blog_page: dict  # Page fetched during URL validation (final_url, headers, html blob)
+    blog_article_original: BlobRef  # Article text
+    extracted_keywords: BlobRef  # Keywords formatted for the prompt
+    keyword_frequencies: BlobRef  # (keyword, frequency) table behind `extracted_keywords`
+    gpt_prompt: BlobRef  # GPT formatted messages
+    prompt_stats: dict  # Prompt token count, budget and keywords kept
+    generation_metrics: dict  # Time-to-first-token, tokens/sec, ... of the last generation
+    research_candidates: List[dict]  # Research mode: top-N {url, page} results
+    research_sources: Annotated[List[dict], add_sources]  # Research mode: {url, text blob}
 
 
-# Initialize logging
-logging.basicConfig(level=logging.INFO)
+class SourceState(TypedDict):
+    source: dict  # One research candidate: {url, page}
+
 
 # Define which model to use: "o1-preview" or "gpt-4o"
 SELECTED_MODEL = "o1-preview"  # Change to "gpt-4o" when needed
 
-# Initialize OpenAI model based on selection
-if SELECTED_MODEL != "o1-preview":
-    model = ChatOpenAI(model=SELECTED_MODEL, temperature=0)
-else:
-    model = ChatOpenAI(model=SELECTED_MODEL)
+# Compile the graph from asyncio-native nodes (run it with ainvoke/astream)
+USE_ASYNC_NODES = False
 
+# Persist every node's output (SQLite) so failed or interrupted runs resume where they stopped
+CHECKPOINT_RUNS = True
+CHECKPOINT_MAX_AGE = 24 * 60 * 60  # Unfinished runs older than this start over (seconds)
 
-# --- Step 1: Call Google API, and get relevant Blog Article URL based on user keyword ---
-def get_blog_url_from_google(state: WorkflowState) -> WorkflowState:
-    """
-    Parameters: Input from user
-    Returns: a blog post object: blog_url:{url:www.example.com}
-    """
+# Research mode: scrape the top N results concurrently and merge their keywords
+RESEARCH_MODE = False
+RESEARCH_SOURCES = 3  # Number of blog posts to merge
+RESEARCH_MAX_PARALLEL = 3  # Sources one run extracts at the same time
+RESEARCH_SOURCE_TIMEOUT = 20.0  # Seconds one source's page download may take before it is dropped
+
+# Per-run semaphores bounding the parallel `scrape_source` branches (LangGraph
+# already runs Send branches in parallel; a run's slots go away with its branches)
+_research_slots = weakref.WeakValueDictionary()  # run key -> threading.BoundedSemaphore
+_async_research_slots = weakref.WeakValueDictionary()  # run key -> asyncio.Semaphore
+_research_slots_lock = threading.Lock()
+
+
+def configure_logging() -> None:
+    """Initializes logging (called by the entry points, not at import time)."""
+    logging.basicConfig(level=logging.INFO)
+
+
+def model_params(model_name: str = SELECTED_MODEL) -> dict:
+    """Sampling parameters used for `model_name` (also part of the generation cache key)."""
+    # o1-preview only supports the default temperature
+    return {} if model_name == "o1-preview" else {"temperature": 0}
+
+
+@lru_cache(maxsize=None)
+def get_model(model_name: str = SELECTED_MODEL):
+    """Returns the OpenAI chat client for `model_name`, created once per process."""
+    from langchain_openai import ChatOpenAI  # Heavy import, deferred until first use
+
+    # Initialize OpenAI model based on selection
+    return ChatOpenAI(model=model_name, stream_usage=True, **model_params(model_name))
+
+
+def get_user_query(state: WorkflowState) -> Optional[str]:
+    """Returns the content of the last user message, or None if there is none."""
     messages = state.get("messages", [])  # ✅ Ensure messages exist
 
     if not messages:
         logging.error("❌ No messages found in state!")
-        return state  # Return unchanged state
+        return None
 
     last_message = messages[-1]
 
     # ✅ Ensure last message is a HumanMessage before accessing `.content`
     if isinstance(last_message, HumanMessage):
-        user_query = last_message.content
-    elif (
-        isinstance(last_message, dict) and "content" in last_message
-    ):  # Handle raw dict format
-        user_query = last_message["content"]
-    else:
-        logging.error("❌ Last message does not have a valid content field!")
-        return state  # Return unchanged state
+        return last_message.content
+    if isinstance(last_message, dict) and "content" in last_message:
+        return last_message["content"]  # Handle raw dict format
+
+    logging.error("❌ Last message does not have a valid content field!")
+    return None
+
+
+# --- Step 1: Call Google API, and get relevant Blog Article URL based on user keyword ---
+def get_blog_url_from_google(state: WorkflowState) -> WorkflowState:
+    """
+    Parameters: Input from user
+    Returns: a blog post object: blog_url:{url:www.example.com}, plus the page
+    downloaded while validating it (blog_page) so it is not fetched again.
+    """
+    user_query = get_user_query(state)
+
+    if not user_query:
+        return {}  # Leave state unchanged
 
     logging.info(f"🔍 Searching Google for: {user_query}")
 
-    blog_url = get_top_blog_post(user_query)  # ✅ Call Google API function
+    blog_post = get_top_blog_post(user_query)  # ✅ Call Google API function
+    return blog_url_update(blog_post)
+
+
+async def aget_blog_url_from_google(state: WorkflowState) -> WorkflowState:
+    """Async version of `get_blog_url_from_google`."""
+    user_query = get_user_query(state)
+
+    if not user_query:
+        return {}  # Leave state unchanged
+
+    logging.info(f"🔍 Searching Google for: {user_query}")
+
+    async with stage_slot("search"):
+        blog_post = await aget_top_blog_post(user_query)  # ✅ Call Google API function
+    return await asyncio.to_thread(blog_url_update, blog_post)
+
+
+def blog_url_update(blog_post: Optional[dict]) -> dict:
+    """Stores the found blog post (and its validated page) in state."""
+    if not blog_post:
+        logging.error("❌ No valid blog post found!")
+        return {"blog_url": None}
+
+    blog_url = {"url": blog_post["url"]}
     logging.info(f"✅ Found Blog URL: {blog_url}")
 
-    return {**state, "blog_url": blog_url}  # ✅ Add `blog_url` to state
+    # ✅ Add `blog_url` and the already-downloaded page to state
+    return {"blog_url": blog_url, "blog_page": store_page(blog_post["page"])}
+
+
+def store_page(page: Optional[dict]) -> Optional[dict]:
+    """Moves a downloaded page's HTML into the blob store, keeping its metadata inline."""
+    if not page:
+        return page
+    return {**page, "html": put_text(page.get("html") or "", "text/html")}
+
+
+def load_page(page: Optional[dict]) -> Optional[dict]:
+    """
+    Inverse of `store_page`: returns the page with its HTML loaded, or None
+    (so the page is downloaded again) if its blob was pruned.
+    """
+    if not page:
+        return page
+    try:
+        return {**page, "html": resolve_text(page.get("html"))}
+    except MissingBlobError:
+        logging.warning(f"♻️ Stored page of {page.get('url')} was pruned, fetching it again")
+        return None
 
 
 # --- Step 2: Scrape blog post URL ---
 def scrape_blog_url(state: WorkflowState) -> WorkflowState:
     logging.info(f"🔍 Scraping blog article...")
 
+    target = get_scrape_target(state)
+    if not target:
+        return {}  # ✅ Leave state unchanged if blog_url is missing
+
+    scrapped_url = extract_article_content(*target)
+    logging.info(f"✅ Scraped Blog Article Successfully")
+
+    return article_update(scrapped_url)
+
+
+async def ascrape_blog_url(state: WorkflowState) -> WorkflowState:
+    """Async version of `scrape_blog_url`."""
+    logging.info(f"🔍 Scraping blog article...")
+
+    target = await asyncio.to_thread(get_scrape_target, state)
+    if not target:
+        return {}  # ✅ Leave state unchanged if blog_url is missing
+
+    async with stage_slot("scrape"):
+        scrapped_url = await aextract_article_content(*target)
+    logging.info(f"✅ Scraped Blog Article Successfully")
+
+    return await asyncio.to_thread(article_update, scrapped_url)
+
+
+def article_update(text: Optional[str]) -> dict:
+    """Stores the scraped article text in the blob store and its reference in state."""
+    return {"blog_article_original": put_text(text) if text else None}
+
+
+def get_scrape_target(state: WorkflowState) -> Optional[tuple]:
+    """Returns (url, page) to scrape; page is the validated download if it matches url."""
     # ✅ Ensure "blog_url" exists before calling .get()
     blog_url_data = state.get("blog_url", None)
 
     if not blog_url_data or not isinstance(blog_url_data, dict):
         logging.error("❌ No valid blog URL found in state!")
-        return state  # ✅ Return unchanged state if blog_url is missing
+        return None
 
     url = blog_url_data.get("url", None)
 
     if not url:
         logging.error("❌ Blog URL exists but is empty!")
-        return state  # ✅ Return unchanged state
+        return None
 
-    scrapped_url = extract_article_content(url)
-    logging.info(f"✅ Scraped Blog Article Successfully")
+    # ✅ Parse the page fetched during validation instead of downloading it again
+    page = state.get("blog_page")
+    if page and url not in (page.get("url"), page.get("final_url")):
+        page = None
 
-    return {**state, "blog_article_original": scrapped_url}
+    return url, load_page(page)
 
 
 #  --- Step 3: Extract keyword from document ---
 def extract_keywords_node(state: WorkflowState) -> WorkflowState:
     """Extracts important keywords from a reference document."""
     logging.info(f"🔍 Extracting keywords...")
-    document = state.get("blog_article_original", "")
-    extracted_keywords_str = extract_keywords_from_text(document)
-    logging.info(f"📌 Extracted Keywords: {extracted_keywords_str}")
+    document = resolve_text(state.get("blog_article_original")) or ""
+    keywords = extract_keyword_frequencies(document)
+    return keywords_update(keywords)
+
+
+async def aextract_keywords_node(state: WorkflowState) -> WorkflowState:
+    """Async version of `extract_keywords_node`; scoring runs off the event loop."""
+    logging.info(f"🔍 Extracting keywords...")
+    document = await asyncio.to_thread(resolve_text, state.get("blog_article_original"))
+    keywords = await aextract_keyword_frequencies(document or "")
+    return await asyncio.to_thread(keywords_update, keywords)
+
+
+def keywords_update(keywords: list) -> dict:
+    """Stores the keyword table and its formatted string in the blob store."""
+    extracted_keywords_str = sort_for_model(keywords)
+    logging.info(f"📌 Extracted {len(keywords)} keywords")
+    if should_log_payload():
+        logging.debug(f"Extracted keywords: {extracted_keywords_str}")
+
+    return {
+        "extracted_keywords": put_text(extracted_keywords_str),
+        "keyword_frequencies": put_json(keywords),
+    }
+
+
+# --- Research mode, Step 1: Find the top N blog posts ---
+def get_blog_urls_from_google(state: WorkflowState) -> WorkflowState:
+    """Finds the top RESEARCH_SOURCES valid blog posts (with their validated pages)."""
+    user_query = get_user_query(state)
+
+    if not user_query:
+        return {}  # Leave state unchanged
+
+    logging.info(f"🔍 Searching Google for {RESEARCH_SOURCES} sources: {user_query}")
+    candidates = get_top_blog_posts(
+        user_query, limit=RESEARCH_SOURCES, read_timeout=RESEARCH_SOURCE_TIMEOUT
+    )
+    return research_candidates_update(candidates)
+
+
+async def aget_blog_urls_from_google(state: WorkflowState) -> WorkflowState:
+    """Async version of `get_blog_urls_from_google`."""
+    user_query = get_user_query(state)
+
+    if not user_query:
+        return {}  # Leave state unchanged
+
+    logging.info(f"🔍 Searching Google for {RESEARCH_SOURCES} sources: {user_query}")
+    async with stage_slot("search"):
+        candidates = await aget_top_blog_posts(
+            user_query, limit=RESEARCH_SOURCES, read_timeout=RESEARCH_SOURCE_TIMEOUT
+        )
+    return await asyncio.to_thread(research_candidates_update, candidates)
+
+
+def research_candidates_update(candidates: List[dict]) -> dict:
+    """Stores the research candidates (pages in the blob store) in state."""
+    logging.info(f"✅ Found {len(candidates)} Blog URLs: {[c['url'] for c in candidates]}")
+
+    blog_url = {"url": candidates[0]["url"]} if candidates else None
+    candidates = [{**c, "page": store_page(c.get("page"))} for c in candidates]
+    return {"blog_url": blog_url, "research_candidates": candidates}
+
+
+# --- Research mode, Step 2a: Fan out one scrape per source ---
+def fan_out_sources(state: WorkflowState) -> List[Send] | Literal["merge_sources"]:
+    """Sends every research candidate to its own `scrape_source` task."""
+    candidates = state.get("research_candidates") or []
+    if not candidates:
+        logging.error("❌ No research sources found!")
+        return "merge_sources"
+    return [Send("scrape_source", {"source": candidate}) for candidate in candidates]
+
+
+# --- Research mode, Step 2b: Scrape a single source ---
+def research_run_key(config: Optional[RunnableConfig]) -> Optional[str]:
+    """Identifies the run a Send branch belongs to (its parent checkpoint)."""
+    configurable = (config or {}).get("configurable", {})
+    return configurable.get("checkpoint_map", {}).get("") or None
+
+
+def research_slot(config: Optional[RunnableConfig]) -> threading.BoundedSemaphore:
+    """Returns the semaphore shared by one run's `scrape_source` branches."""
+    key = research_run_key(config)
+    if key is None:
+        return threading.BoundedSemaphore(RESEARCH_MAX_PARALLEL)
+    with _research_slots_lock:
+        slot = _research_slots.get(key)
+        if slot is None:
+            slot = _research_slots[key] = threading.BoundedSemaphore(RESEARCH_MAX_PARALLEL)
+        return slot
+
+
+def async_research_slot(config: Optional[RunnableConfig]) -> asyncio.Semaphore:
+    """Async version of `research_slot`."""
+    key = research_run_key(config)
+    if key is None:
+        return asyncio.Semaphore(RESEARCH_MAX_PARALLEL)
+    slot = _async_research_slots.get(key)
+    if slot is None:
+        slot = _async_research_slots[key] = asyncio.Semaphore(RESEARCH_MAX_PARALLEL)
+    return slot
+
+
+def scrape_source(state: SourceState, config: Optional[RunnableConfig] = None) -> dict:
+    """
+    Extracts one source from the page downloaded during validation (whose body
+    download was bound by RESEARCH_SOURCE_TIMEOUT). At most RESEARCH_MAX_PARALLEL
+    sources of a run are extracted at once.
+    """
+    source = state["source"]
+    url = source["url"]
+
+    with research_slot(config):
+        try:
+            text = extract_article_content(url, page=load_page(source.get("page")))
+        except Exception as e:
+            logging.error(f"❌ Error scraping {url}: {e}")
+            return {"research_sources": []}
+
+    return scraped_source_update(url, text)
+
+
+async def ascrape_source(state: SourceState, config: Optional[RunnableConfig] = None) -> dict:
+    """Async version of `scrape_source`."""
+    source = state["source"]
+    url = source["url"]
+
+    page = await asyncio.to_thread(load_page, source.get("page"))
+    try:
+        async with async_research_slot(config), stage_slot("scrape"):
+            text = await aextract_article_content(url, page=page)
+    except Exception as e:
+        logging.error(f"❌ Error scraping {url}: {e}")
+        return {"research_sources": []}
+
+    return await asyncio.to_thread(scraped_source_update, url, text)
+
+
+def scraped_source_update(url: str, text: Optional[str]) -> dict:
+    """Adds one scraped source to the fan-in list."""
+    if not text:
+        return {"research_sources": []}
+
+    logging.info(f"✅ Scraped source: {url}")
+    return {"research_sources": [{"url": url, "text": put_text(text)}]}
+
+
+# --- Research mode, Step 3: Merge sources and their keywords ---
+def merge_sources(state: WorkflowState) -> WorkflowState:
+    """
+    Deduplicates overlapping paragraphs across sources (keeping the best-ranked copy)
+    and builds one merged keyword frequency table for the prompt.
+    """
+    texts = deduped_source_texts(state)
+    if not texts:
+        return {}  # Leave state unchanged
+
+    keywords = extract_keywords_batch(texts)["merged"]
+    return merged_sources_update(texts, keywords)
+
+
+async def amerge_sources(state: WorkflowState) -> WorkflowState:
+    """Async version of `merge_sources`."""
+    texts = await asyncio.to_thread(deduped_source_texts, state)
+    if not texts:
+        return {}  # Leave state unchanged
+
+    keywords = (await aextract_keywords_batch(texts))["merged"]
+    return await asyncio.to_thread(merged_sources_update, texts, keywords)
 
-    # ✅ Store extracted keywords correctly as a user message
-    return {**state, "extracted_keywords": extracted_keywords_str}
+
+def deduped_source_texts(state: WorkflowState) -> List[str]:
+    """Returns the scraped source texts in search rank order, minus repeated paragraphs."""
+    # Fan-in order is completion order; restore search rank order
+    rank = {c["url"]: i for i, c in enumerate(state.get("research_candidates") or [])}
+    sources = sorted(
+        state.get("research_sources") or [], key=lambda s: rank.get(s["url"], len(rank))
+    )
+
+    if not sources:
+        logging.error("❌ No research sources could be scraped!")
+        return []
+
+    texts = [resolve_text(s["text"]) for s in sources]
+    return [text for text in dedupe_paragraphs(texts) if text]
+
+
+def merged_sources_update(texts: List[str], keywords: list) -> dict:
+    """Stores the merged article text and keyword table in the blob store."""
+    extracted_keywords_str = sort_for_model(keywords)
+    logging.info(f"📌 Merged {len(keywords)} keywords from {len(texts)} sources")
+    if should_log_payload():
+        logging.debug(f"Merged keywords: {extracted_keywords_str}")
+
+    return {
+        "blog_article_original": put_text("\n\n".join(texts)),
+        "extracted_keywords": put_text(extracted_keywords_str),
+        "keyword_frequencies": put_json(keywords),
+    }
 
 
 # --- Step 4: Prepare GPT Prompt (with Extracted Keywords) ---
@@ -113,68 +486,289 @@ def format_prompt_messages(state: WorkflowState) -> WorkflowState:
     - For `gpt-4o`: Keeps system and user messages separate.
     - For `o1-preview`: Merges everything into a single user message.
 
+    Keywords are ranked by frequency and trimmed to the model's input token budget.
+
     Returns:
-    - WorkflowState: Updated state with properly formatted messages.
+    - WorkflowState: Updated state with properly formatted messages and prompt token stats.
     """
-    extracted_keywords = state.get("extracted_keywords", "")
+    extracted_keywords = state.get("extracted_keywords")
     if not extracted_keywords:
         logging.error("❌ No keywords found to build prompt..")
-        return state  # ✅ Return unchanged state if no keywords found
-
-    user_input = state.get("messages", "")
-    # Generate prompt using the existing function
-    prompt_messages = build_prompt(
-        blog_topic=user_input, extracted_keywords_str=extracted_keywords
-    )
-    if SELECTED_MODEL == "o1-preview":
+        return {}  # ✅ Leave state unchanged if no keywords found
+
+    prompt = assemble_prompt(
+        blog_topic=get_user_query(state) or "",
+        # Runs checkpointed before keyword tables were stored only have the string
+        keywords=resolve_json(state.get("keyword_frequencies"))
+        or resolve_text(extracted_keywords),
+        model_name=SELECTED_MODEL,
         # ❌ o1-preview does NOT support system messages, merge into a single user message
-        combined_message = "\n\n".join([msg.content for msg in prompt_messages])
+        merge_messages=SELECTED_MODEL == "o1-preview",
+    )
+    prompt_stats = {key: value for key, value in prompt.items() if key != "messages"}
+    if prompt["keywords_used"] is not None and prompt["keywords_used"] < prompt["keywords_total"]:
+        logging.info(
+            f"✂️ Kept the top {prompt['keywords_used']} of {prompt['keywords_total']} keywords "
+            f"to fit the {prompt['budget']}-token budget"
+        )
+    logging.info(f"🧮 Prompt: {prompt['prompt_tokens']} tokens for {SELECTED_MODEL}")
 
-        return {
-            **state,
-            "gpt_prompt": [HumanMessage(content=combined_message)],
-        }
-    # ✅ gpt-4o supports system messages, format them properly
     return {
-        **state,
-        "gpt_prompt": prompt_messages,  # ✅ Store unmodified messages in state
+        "gpt_prompt": put_json(messages_to_dict(prompt["messages"])),
+        "prompt_stats": prompt_stats,
     }
 
 
+async def aformat_prompt_messages(state: WorkflowState) -> WorkflowState:
+    """Async version of `format_prompt_messages` (blob reads and writes run in a thread)."""
+    return await asyncio.to_thread(format_prompt_messages, state)
+
+
+def prompt_messages(state: WorkflowState) -> list:
+    """Loads the formatted prompt messages referenced by the state."""
+    prompt = state.get("gpt_prompt")
+    if not prompt:
+        return []
+    if isinstance(prompt, list):
+        return prompt  # Checkpointed before prompts moved to the blob store
+    return messages_from_dict(resolve_json(prompt))
+
+
+def keywords_text(state: WorkflowState) -> str:
+    """Loads the formatted keyword string referenced by the state."""
+    return resolve_text(state.get("extracted_keywords")) or ""
+
+
 # --- Step 6: Generate Blog Article with GPT ---
-def generate_blog_w_gpt(state: WorkflowState) -> WorkflowState:
-    """Sends properly formatted messages to GPT and returns the response."""
-    messages = state.get("gpt_prompt", [])
+class GenerationRecorder:
+    """
+    Assembles a streamed completion and measures it.
+
+    Content parts are collected as chunks arrive and joined once at the end,
+    instead of re-concatenating the growing message on every chunk.
+    """
+
+    def __init__(self):
+        self.parts = []
+        self.usage = None
+        self.response_metadata = {}
+        self.chunk_count = 0
+        self.time_to_first_token = None
+        self.started = time.perf_counter()
+
+    def add(self, chunk) -> None:
+        if chunk.content:
+            if self.time_to_first_token is None:
+                self.time_to_first_token = time.perf_counter() - self.started
+            self.parts.append(chunk.content)
+            self.chunk_count += 1
+        if chunk.usage_metadata:
+            self.usage = chunk.usage_metadata
+        if chunk.response_metadata:
+            self.response_metadata.update(chunk.response_metadata)
+
+    def finish(self) -> tuple:
+        """Returns (AIMessage, metrics dict with time_to_first_token, duration, tokens, tokens_per_second)."""
+        duration = time.perf_counter() - self.started
+        output_tokens = self.usage["output_tokens"] if self.usage else self.chunk_count
+        generation_time = duration - (self.time_to_first_token or 0.0)
+
+        metrics = {
+            "model": SELECTED_MODEL,
+            "time_to_first_token": self.time_to_first_token,
+            "duration": duration,
+            "output_tokens": output_tokens,
+            "input_tokens": self.usage["input_tokens"] if self.usage else None,
+            "tokens_per_second": (
+                output_tokens / generation_time if generation_time > 0 else None
+            ),
+        }
+        ai_message = AIMessage(
+            content="".join(self.parts),
+            usage_metadata=self.usage,
+            response_metadata=self.response_metadata,
+        )
+        return ai_message, metrics
+
+
+def stream_generation(messages: list, config: Optional[RunnableConfig] = None) -> tuple:
+    """
+    Streams a completion from the model and assembles the final AIMessage.
+
+    Chunks flow through LangGraph's "messages" stream mode as they arrive
+    (`graph.stream(inputs, stream_mode="messages")`).
+
+    Returns:
+        - tuple: (AIMessage, metrics dict).
+    """
+    recorder = GenerationRecorder()
+    for chunk in get_model().stream(messages, config=config):
+        recorder.add(chunk)
+    return recorder.finish()
+
+
+async def astream_generation(messages: list, config: Optional[RunnableConfig] = None) -> tuple:
+    """Async version of `stream_generation`, built on `model.astream`."""
+    recorder = GenerationRecorder()
+    async for chunk in get_model().astream(messages, config=config):
+        recorder.add(chunk)
+    return recorder.finish()
+
+
+def generate_blog_w_gpt(
+    state: WorkflowState, config: Optional[RunnableConfig] = None
+) -> WorkflowState:
+    """Streams properly formatted messages to GPT and returns the response."""
+    messages = prompt_messages(state)
 
     if not messages:
         logging.error("❌ No formatted messages found to send to GPT.")
-        return state  # Return unchanged state
+        return {}  # Leave state unchanged
 
-    logging.info(
-        f"🚀 Sending formatted messages to {SELECTED_MODEL}:\n{json.dumps([m.content for m in messages], indent=2)}"
-    )
+    cached = cached_generation(state, messages)
+    if cached:
+        return generation_update(state, *cached)
+
+    log_prompt(messages)
 
     try:
-        response = model.invoke(messages)  # ✅ Call GPT model
+        ai_message, metrics = stream_generation(messages, config)  # ✅ Call GPT model
+    except Exception as e:
+        logging.error(f"❌ Error generating blog content: {e}")
+        return {}  # ✅ Leave state unchanged in case of failure
 
-        if not response or not response.content:
-            logging.error("❌ GPT response was empty!")
-            return state  # Return unchanged state if response is empty
+    cache_generation(state, messages, ai_message, metrics)
+    return generation_update(state, ai_message, metrics)
 
-        logging.info(f"🎉 GPT Response: {response.content}")
 
-        # ✅ Save response as an AIMessage
-        ai_message = AIMessage(content=response.content)
+async def agenerate_blog_w_gpt(
+    state: WorkflowState, config: Optional[RunnableConfig] = None
+) -> WorkflowState:
+    """Async version of `generate_blog_w_gpt`."""
+    messages = await asyncio.to_thread(prompt_messages, state)
 
-        return {
-            **state,
-            "messages": state["messages"]
-            + [ai_message],  # ✅ Append to conversation history
-        }
+    if not messages:
+        logging.error("❌ No formatted messages found to send to GPT.")
+        return {}  # Leave state unchanged
+
+    cached = await asyncio.to_thread(cached_generation, state, messages)
+    if cached:
+        return generation_update(state, *cached)
+
+    log_prompt(messages)
 
+    try:
+        async with stage_slot("llm"):
+            ai_message, metrics = await astream_generation(messages, config)  # ✅ Call GPT model
     except Exception as e:
         logging.error(f"❌ Error generating blog content: {e}")
-        return state  # ✅ Return unchanged state in case of failure
+        return {}  # ✅ Leave state unchanged in case of failure
+
+    await asyncio.to_thread(cache_generation, state, messages, ai_message, metrics)
+    return generation_update(state, ai_message, metrics)
+
+
+def cached_generation(state: WorkflowState, messages: list) -> Optional[tuple]:
+    """
+    Looks the formatted prompt up in the generation cache.
+
+    Exact matches (same model, parameters and prompt) are always reused; with
+    `llm_cache.SIMILARITY_THRESHOLD` set, a generation for the same topic with a
+    near-identical keyword set is reused as well.
+
+    Returns:
+        - tuple: (AIMessage, metrics dict) rebuilt from the cache, or None on a miss.
+    """
+    params = model_params(SELECTED_MODEL)
+    match = "exact"
+    try:
+        key = llm_cache.generation_key(SELECTED_MODEL, params, messages)
+        entry = llm_cache.get_generation(key)
+        if entry is None:
+            match = "similar"
+            entry = llm_cache.find_similar_generation(
+                SELECTED_MODEL,
+                params,
+                get_user_query(state) or "",
+                keywords_text(state),
+                threshold=llm_cache.SIMILARITY_THRESHOLD,
+            )
+    except Exception as e:
+        logging.warning(f"⚠️ Generation cache lookup failed: {e}")
+        return None
+
+    if entry is None:
+        return None
+
+    logging.info(f"♻️ Reusing cached {SELECTED_MODEL} generation ({match} match)")
+    ai_message = AIMessage(
+        content=entry["content"],
+        usage_metadata=entry.get("usage_metadata"),
+        response_metadata=entry.get("response_metadata") or {},
+    )
+    return ai_message, {**entry["metrics"], "cache": match}
+
+
+def cache_generation(
+    state: WorkflowState, messages: list, ai_message: AIMessage, metrics: dict
+) -> None:
+    """Stores a completed generation so reruns of the same prompt are free."""
+    if not ai_message.content:
+        return
+
+    params = model_params(SELECTED_MODEL)
+    try:
+        llm_cache.store_generation(
+            llm_cache.generation_key(SELECTED_MODEL, params, messages),
+            {
+                "content": ai_message.content,
+                "usage_metadata": ai_message.usage_metadata,
+                "response_metadata": orjson.loads(
+                    orjson.dumps(ai_message.response_metadata, default=str)
+                ),
+                "metrics": metrics,
+            },
+            SELECTED_MODEL,
+            params,
+            topic=get_user_query(state),
+            keywords=keywords_text(state),
+        )
+    except Exception as e:
+        logging.warning(f"⚠️ Could not cache generation: {e}")
+
+
+def log_prompt(messages: list) -> None:
+    """Logs the prompt size; the full payload only for a sampled share of DEBUG runs."""
+    logging.info(
+        f"🚀 Sending {len(messages)} formatted messages "
+        f"({sum(len(m.content) for m in messages)} chars) to {SELECTED_MODEL}"
+    )
+    if should_log_payload():
+        logging.debug(
+            f"Prompt payload:\n{json.dumps([m.content for m in messages], indent=2)}"
+        )
+
+
+def generation_update(state: WorkflowState, ai_message: AIMessage, metrics: dict) -> WorkflowState:
+    """Appends the generated post to the conversation and records its metrics."""
+    if not ai_message.content:
+        logging.error("❌ GPT response was empty!")
+        return {}  # Leave state unchanged if response is empty
+
+    ttft = metrics["time_to_first_token"] or 0.0
+    tps = metrics["tokens_per_second"] or 0.0
+    logging.info(
+        f"🎉 GPT Response: {len(ai_message.content)} chars, "
+        f"{metrics['output_tokens']} tokens, first token after {ttft:.2f}s, "
+        f"{tps:.1f} tokens/s"
+    )
+    if should_log_payload():
+        logging.debug(f"GPT Response body: {ai_message.content}")
+
+    return {
+        "messages": [ai_message],  # ✅ Appended to the conversation by `add_messages`
+        "generation_metrics": metrics,
+    }
 
 
 # --- Step 7: Decide if Workflow Continues ---
@@ -184,27 +778,210 @@ def should_continue(state: WorkflowState) -> Literal["__end__"]:
     return "__end__"
 
 
+# --- Node implementations (sync and asyncio-native) ---
+SYNC_NODES = {
+    "get_blog_url": get_blog_url_from_google,
+    "scrape_blog": scrape_blog_url,
+    "extract_keywords": extract_keywords_node,
+    "get_blog_urls": get_blog_urls_from_google,
+    "scrape_source": scrape_source,
+    "merge_sources": merge_sources,
+    "format_prompt": format_prompt_messages,
+    "generate_blog": generate_blog_w_gpt,
+}
+ASYNC_NODES = {
+    "get_blog_url": aget_blog_url_from_google,
+    "scrape_blog": ascrape_blog_url,
+    "extract_keywords": aextract_keywords_node,
+    "get_blog_urls": aget_blog_urls_from_google,
+    "scrape_source": ascrape_source,
+    "merge_sources": amerge_sources,
+    "format_prompt": aformat_prompt_messages,
+    "generate_blog": agenerate_blog_w_gpt,
+}
+
+
 # --- Function to Return the Workflow ---
 def get_workflow():
-    """Creates and compiles the LangGraph workflow."""
+    """Returns the compiled LangGraph workflow (compiled once per configuration)."""
+    configure_logging()
+    return build_workflow(research_mode=RESEARCH_MODE, use_async=USE_ASYNC_NODES)
+
+
+def get_resumable_workflow():
+    """
+    Returns the sync workflow checkpointed to local SQLite (with CHECKPOINT_RUNS).
+    Run it with `invoke_resumable`, which continues failed runs of a topic.
+    """
+    configure_logging()
+    checkpointer = get_checkpointer() if CHECKPOINT_RUNS else None
+    return build_workflow(research_mode=RESEARCH_MODE, checkpointer=checkpointer)
+
+
+@lru_cache(maxsize=None)
+def build_workflow(research_mode: bool = False, use_async: bool = False, checkpointer=None):
+    """
+    Creates and compiles the LangGraph workflow. Compiled graphs are stateless
+    and reused, so each configuration is only built once per process.
+
+    With `research_mode`, steps 1-3 become a fan-out/fan-in stage: the top
+    RESEARCH_SOURCES results are scraped concurrently and merged before the prompt
+    is built.
+
+    With `use_async`, every node is its asyncio-native variant; run the graph with
+    `ainvoke`/`astream` so one worker can keep many generations in flight.
+
+    With a `checkpointer` (see core.checkpoints), every node's output is saved
+    per thread and runs can be resumed.
+    """
+    nodes = {
+        name: instrument_node(name, node)  # Per-node latency/bytes/cache metrics
+        for name, node in (ASYNC_NODES if use_async else SYNC_NODES).items()
+    }
     workflow = StateGraph(WorkflowState)
 
     # ✅ Step 1: Add nodes (functions)
-    workflow.add_node("get_blog_url", get_blog_url_from_google)
-    workflow.add_node("scrape_blog", scrape_blog_url)
-    workflow.add_node("extract_keywords", extract_keywords_node)
-    workflow.add_node("format_prompt", format_prompt_messages)
-    workflow.add_node("generate_blog", generate_blog_w_gpt)
-
+    if research_mode:
+        workflow.add_node("get_blog_urls", nodes["get_blog_urls"])
+        workflow.add_node("scrape_source", nodes["scrape_source"])
+        workflow.add_node("merge_sources", nodes["merge_sources"])
+    else:
+        workflow.add_node("get_blog_url", nodes["get_blog_url"])
+        workflow.add_node("scrape_blog", nodes["scrape_blog"])
+        workflow.add_node("extract_keywords", nodes["extract_keywords"])
+    workflow.add_node("format_prompt", nodes["format_prompt"])
+    workflow.add_node("generate_blog", nodes["generate_blog"])
 
     # ✅ Step 2: Define execution order (edges)
-    workflow.set_entry_point("get_blog_url")  # 🔹 Start here
-    workflow.add_edge("get_blog_url", "scrape_blog")
-    workflow.add_edge("scrape_blog", "extract_keywords")
-    workflow.add_edge("extract_keywords", "format_prompt")
+    if research_mode:
+        workflow.set_entry_point("get_blog_urls")  # 🔹 Start here
+        workflow.add_conditional_edges(
+            "get_blog_urls", fan_out_sources, ["scrape_source", "merge_sources"]
+        )
+        workflow.add_edge("scrape_source", "merge_sources")  # 🔹 Fan-in
+        workflow.add_edge("merge_sources", "format_prompt")
+    else:
+        workflow.set_entry_point("get_blog_url")  # 🔹 Start here
+        workflow.add_edge("get_blog_url", "scrape_blog")
+        workflow.add_edge("scrape_blog", "extract_keywords")
+        workflow.add_edge("extract_keywords", "format_prompt")
     workflow.add_edge("format_prompt", "generate_blog")
 
     # ✅ Step 3: Conditional ending
     workflow.add_conditional_edges("generate_blog", should_continue)
 
-    return workflow.compile()
+    return workflow.compile(checkpointer=checkpointer)
+
+
+# --- Checkpointed runs: one thread per topic, resumed from the last completed node ---
+def thread_config(topic: str, research_mode: bool = RESEARCH_MODE) -> RunnableConfig:
+    """
+    Returns the run config whose thread holds the checkpoints of `topic`.
+    A thread only lives until its run produced a post (or CHECKPOINT_MAX_AGE).
+    """
+    key = json.dumps([" ".join(topic.lower().split()), research_mode, SELECTED_MODEL])
+    thread_id = hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+    return {"configurable": {"thread_id": thread_id}}
+
+
+def has_generated_post(values: Optional[dict]) -> bool:
+    """True if a run's state ends with the generated post."""
+    messages = (values or {}).get("messages") or []
+    return bool(messages) and isinstance(messages[-1], AIMessage)
+
+
+def resume_plan(snapshot) -> str:
+    """
+    Decides how to continue a thread from its latest checkpoint:
+    "done" (post exists), "resume" (interrupted mid-run), "regenerate" (the run
+    finished but generation failed, so only generate_blog is rerun), "expired"
+    (older than CHECKPOINT_MAX_AGE, so its search results are stale) or "start".
+    """
+    if snapshot.created_at:
+        age = datetime.now(timezone.utc) - datetime.fromisoformat(snapshot.created_at)
+        if age.total_seconds() > CHECKPOINT_MAX_AGE:
+            return "expired"
+    if has_generated_post(snapshot.values):
+        return "done"
+    if snapshot.next:
+        return "resume"
+    if snapshot.values.get("gpt_prompt"):
+        return "regenerate"
+    return "start"
+
+
+def invoke_resumable(graph, topic: str, research_mode: bool = RESEARCH_MODE) -> dict:
+    """
+    Runs the checkpointed graph for `topic`, continuing an earlier attempt of
+    the same topic instead of repeating its search and scrape work. Once the
+    run returns a post its thread is deleted, so the next run of the topic
+    searches and scrapes again instead of returning the checkpointed state (the
+    generation itself may still be answered by `llm_cache` when the prompt
+    matches a cached one). A checkpoint referencing a pruned blob starts over.
+    """
+    if graph.checkpointer is None:
+        return graph.invoke({"messages": [HumanMessage(content=topic)]})
+
+    config = thread_config(topic, research_mode)
+    thread_id = config["configurable"]["thread_id"]
+    snapshot = graph.get_state(config)
+    plan = resume_plan(snapshot)
+    logging.info(f"💾 Checkpointed run for '{topic}': {plan}")
+
+    if plan == "expired":
+        graph.checkpointer.delete_thread(thread_id)
+    try:
+        if plan == "done":
+            state = snapshot.values
+        elif plan == "resume":
+            state = graph.invoke(None, config)
+        elif plan == "regenerate":
+            graph.update_state(config, None, as_node="format_prompt")
+            state = graph.invoke(None, config)
+        else:
+            state = graph.invoke({"messages": [HumanMessage(content=topic)]}, config)
+    except MissingBlobError as e:
+        if plan not in ("resume", "regenerate"):
+            raise
+        logging.warning(f"♻️ Checkpoint of '{topic}' lost a blob ({e}), starting over")
+        graph.checkpointer.delete_thread(thread_id)
+        state = graph.invoke({"messages": [HumanMessage(content=topic)]}, config)
+
+    if has_generated_post(state):
+        graph.checkpointer.delete_thread(thread_id)
+    return state
+
+
+async def ainvoke_resumable(graph, topic: str, research_mode: bool = RESEARCH_MODE) -> dict:
+    """Async version of `invoke_resumable`."""
+    if graph.checkpointer is None:
+        return await graph.ainvoke({"messages": [HumanMessage(content=topic)]})
+
+    config = thread_config(topic, research_mode)
+    thread_id = config["configurable"]["thread_id"]
+    snapshot = await graph.aget_state(config)
+    plan = resume_plan(snapshot)
+    logging.info(f"💾 Checkpointed run for '{topic}': {plan}")
+
+    if plan == "expired":
+        await graph.checkpointer.adelete_thread(thread_id)
+    try:
+        if plan == "done":
+            state = snapshot.values
+        elif plan == "resume":
+            state = await graph.ainvoke(None, config)
+        elif plan == "regenerate":
+            await graph.aupdate_state(config, None, as_node="format_prompt")
+            state = await graph.ainvoke(None, config)
+        else:
+            state = await graph.ainvoke({"messages": [HumanMessage(content=topic)]}, config)
+    except MissingBlobError as e:
+        if plan not in ("resume", "regenerate"):
+            raise
+        logging.warning(f"♻️ Checkpoint of '{topic}' lost a blob ({e}), starting over")
+        await graph.checkpointer.adelete_thread(thread_id)
+        state = await graph.ainvoke({"messages": [HumanMessage(content=topic)]}, config)
+
+    if has_generated_post(state):
+        await graph.checkpointer.adelete_thread(thread_id)
+    return state